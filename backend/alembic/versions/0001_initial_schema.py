@@ -0,0 +1,187 @@
+"""initial schema
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+ORDER_STATUS = sa.Enum(
+    "PENDING", "CONFIRMED", "PROCESSING", "SHIPPED", "DELIVERED", "CANCELLED", "REFUNDED",
+    name="orderstatus"
+)
+PAYMENT_STATUS = sa.Enum("PENDING", "PAID", "FAILED", "REFUNDED", name="paymentstatus")
+
+
+def upgrade() -> None:
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("email", sa.String(255), nullable=False),
+        sa.Column("username", sa.String(100), nullable=False),
+        sa.Column("first_name", sa.String(100), nullable=False),
+        sa.Column("last_name", sa.String(100), nullable=False),
+        sa.Column("hashed_password", sa.String(255), nullable=False),
+        sa.Column("is_active", sa.Boolean(), nullable=True),
+        sa.Column("is_admin", sa.Boolean(), nullable=True),
+        sa.Column("phone", sa.String(20), nullable=True),
+        sa.Column("address", sa.Text(), nullable=True),
+        sa.Column("city", sa.String(100), nullable=True),
+        sa.Column("state", sa.String(100), nullable=True),
+        sa.Column("zip_code", sa.String(20), nullable=True),
+        sa.Column("country", sa.String(100), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index("ix_users_id", "users", ["id"])
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+    op.create_index("ix_users_username", "users", ["username"], unique=True)
+
+    op.create_table(
+        "categories",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(100), nullable=False, unique=True),
+        sa.Column("description", sa.Text(), nullable=True),
+        sa.Column("slug", sa.String(100), nullable=False, unique=True),
+        sa.Column("is_active", sa.Boolean(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    )
+    op.create_index("ix_categories_id", "categories", ["id"])
+
+    op.create_table(
+        "products",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(255), nullable=False),
+        sa.Column("description", sa.Text(), nullable=False),
+        sa.Column("price", sa.Numeric(10, 2), nullable=False),
+        sa.Column("original_price", sa.Numeric(10, 2), nullable=True),
+        sa.Column("sku", sa.String(100), nullable=False, unique=True),
+        sa.Column("category_id", sa.Integer(), sa.ForeignKey("categories.id"), nullable=False),
+        sa.Column("brand", sa.String(100), nullable=True),
+        sa.Column("is_featured", sa.Boolean(), nullable=True),
+        sa.Column("is_active", sa.Boolean(), nullable=True),
+        sa.Column("stock_quantity", sa.Integer(), nullable=True),
+        sa.Column("weight", sa.Numeric(5, 2), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index("ix_products_id", "products", ["id"])
+    op.create_index("ix_products_name", "products", ["name"])
+
+    op.create_table(
+        "product_sizes",
+        sa.Column("product_id", sa.Integer(), sa.ForeignKey("products.id"), primary_key=True),
+        sa.Column("size", sa.String(10), primary_key=True),
+    )
+    op.create_table(
+        "product_colors",
+        sa.Column("product_id", sa.Integer(), sa.ForeignKey("products.id"), primary_key=True),
+        sa.Column("color", sa.String(50), primary_key=True),
+    )
+
+    op.create_table(
+        "product_images",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("product_id", sa.Integer(), sa.ForeignKey("products.id"), nullable=False),
+        sa.Column("image_url", sa.String(500), nullable=False),
+        sa.Column("alt_text", sa.String(255), nullable=True),
+        sa.Column("is_main", sa.Boolean(), nullable=True),
+        sa.Column("sort_order", sa.Integer(), nullable=True),
+        sa.Column("content_hash", sa.String(64), nullable=True),
+        sa.Column("variants", sa.JSON(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    )
+    op.create_index("ix_product_images_id", "product_images", ["id"])
+    op.create_index("ix_product_images_content_hash", "product_images", ["content_hash"])
+
+    op.create_table(
+        "orders",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("order_number", sa.String(50), nullable=False),
+        sa.Column("status", ORDER_STATUS, nullable=True),
+        sa.Column("payment_status", PAYMENT_STATUS, nullable=True),
+        sa.Column("subtotal", sa.Numeric(10, 2), nullable=False),
+        sa.Column("tax_amount", sa.Numeric(10, 2), nullable=True),
+        sa.Column("shipping_amount", sa.Numeric(10, 2), nullable=True),
+        sa.Column("discount_amount", sa.Numeric(10, 2), nullable=True),
+        sa.Column("total_amount", sa.Numeric(10, 2), nullable=False),
+        sa.Column("shipping_first_name", sa.String(100), nullable=False),
+        sa.Column("shipping_last_name", sa.String(100), nullable=False),
+        sa.Column("shipping_address", sa.Text(), nullable=False),
+        sa.Column("shipping_city", sa.String(100), nullable=False),
+        sa.Column("shipping_state", sa.String(100), nullable=False),
+        sa.Column("shipping_zip_code", sa.String(20), nullable=False),
+        sa.Column("shipping_country", sa.String(100), nullable=False),
+        sa.Column("shipping_phone", sa.String(20), nullable=True),
+        sa.Column("payment_method", sa.String(50), nullable=True),
+        sa.Column("payment_transaction_id", sa.String(255), nullable=True),
+        sa.Column("tracking_number", sa.String(100), nullable=True),
+        sa.Column("notes", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("shipped_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("delivered_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index("ix_orders_id", "orders", ["id"])
+    op.create_index("ix_orders_order_number", "orders", ["order_number"], unique=True)
+
+    op.create_table(
+        "order_items",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("order_id", sa.Integer(), sa.ForeignKey("orders.id"), nullable=False),
+        sa.Column("product_id", sa.Integer(), sa.ForeignKey("products.id"), nullable=False),
+        sa.Column("quantity", sa.Integer(), nullable=False),
+        sa.Column("size", sa.String(10), nullable=False),
+        sa.Column("color", sa.String(50), nullable=False),
+        sa.Column("unit_price", sa.Numeric(10, 2), nullable=False),
+        sa.Column("total_price", sa.Numeric(10, 2), nullable=False),
+    )
+    op.create_index("ix_order_items_id", "order_items", ["id"])
+
+    op.create_table(
+        "carts",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False, unique=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index("ix_carts_id", "carts", ["id"])
+
+    op.create_table(
+        "cart_items",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("cart_id", sa.Integer(), sa.ForeignKey("carts.id"), nullable=False),
+        sa.Column("product_id", sa.Integer(), sa.ForeignKey("products.id"), nullable=False),
+        sa.Column("quantity", sa.Integer(), nullable=False),
+        sa.Column("size", sa.String(10), nullable=False),
+        sa.Column("color", sa.String(50), nullable=False),
+        sa.Column("added_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    )
+    op.create_index("ix_cart_items_id", "cart_items", ["id"])
+
+
+def downgrade() -> None:
+    op.drop_table("cart_items")
+    op.drop_table("carts")
+    op.drop_table("order_items")
+    op.drop_table("orders")
+    op.drop_table("product_images")
+    op.drop_table("product_colors")
+    op.drop_table("product_sizes")
+    op.drop_table("products")
+    op.drop_table("categories")
+    op.drop_table("users")
+    ORDER_STATUS.drop(op.get_bind(), checkfirst=True)
+    PAYMENT_STATUS.drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,60 @@
+"""hot query indexes
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+ACTIVE = sa.text("is_active = true")
+
+# (name, table, columns, partial predicate)
+INDEXES = [
+    # Catalog listing: active products newest first, optionally by category
+    ("ix_products_active_created_at", "products", ["created_at"], ACTIVE),
+    ("ix_products_active_category_created_at", "products", ["category_id", "created_at"], ACTIVE),
+    ("ix_products_active_featured_created_at", "products", ["created_at"], sa.text("is_active = true AND is_featured = true")),
+    ("ix_products_active_price", "products", ["price"], ACTIVE),
+    ("ix_products_category_id", "products", ["category_id"], None),
+    ("ix_product_images_product_id", "product_images", ["product_id"], None),
+    # Order history per user and admin listing by status
+    ("ix_orders_user_id_created_at", "orders", ["user_id", "created_at"], None),
+    ("ix_orders_status_created_at", "orders", ["status", "created_at"], None),
+    ("ix_orders_created_at", "orders", ["created_at"], None),
+    ("ix_order_items_order_id", "order_items", ["order_id"], None),
+    ("ix_order_items_product_id", "order_items", ["product_id"], None),
+    # Cart line lookup when adding an item
+    ("ix_cart_items_cart_product_variant", "cart_items", ["cart_id", "product_id", "size", "color"], None),
+]
+
+
+def upgrade() -> None:
+    # CONCURRENTLY avoids locking writes on large tables but cannot run
+    # inside a transaction
+    with op.get_context().autocommit_block():
+        for name, table, columns, where in INDEXES:
+            op.create_index(
+                name,
+                table,
+                columns,
+                postgresql_where=where,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
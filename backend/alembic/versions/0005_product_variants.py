@@ -0,0 +1,66 @@
+"""product variants
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "product_variants",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("product_id", sa.Integer(), sa.ForeignKey("products.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("size", sa.String(10), nullable=False),
+        sa.Column("color", sa.String(50), nullable=False),
+        sa.Column("sku", sa.String(100), nullable=False, unique=True),
+        sa.Column("stock_quantity", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index("ix_product_variants_id", "product_variants", ["id"])
+    op.create_index(
+        "ix_product_variants_product_size_color", "product_variants", ["product_id", "size", "color"], unique=True
+    )
+    op.create_index("ix_product_variants_size_color_product", "product_variants", ["size", "color", "product_id"])
+    op.create_index("ix_product_variants_color_product", "product_variants", ["color", "product_id"])
+
+    # Every size/color pair the old association tables allowed becomes a
+    # variant; there was no per-pair stock, so it starts at zero
+    op.execute("""
+        INSERT INTO product_variants (product_id, size, color, sku, stock_quantity)
+        SELECT p.id, s.size, c.color, upper(replace(p.sku || '-' || s.size || '-' || c.color, ' ', '-')), 0
+        FROM products p
+        JOIN product_sizes s ON s.product_id = p.id
+        JOIN product_colors c ON c.product_id = p.id
+    """)
+    op.drop_table("product_sizes")
+    op.drop_table("product_colors")
+
+
+def downgrade() -> None:
+    op.create_table(
+        "product_sizes",
+        sa.Column("product_id", sa.Integer(), sa.ForeignKey("products.id"), primary_key=True),
+        sa.Column("size", sa.String(10), primary_key=True),
+    )
+    op.create_table(
+        "product_colors",
+        sa.Column("product_id", sa.Integer(), sa.ForeignKey("products.id"), primary_key=True),
+        sa.Column("color", sa.String(50), primary_key=True),
+    )
+    op.execute("INSERT INTO product_sizes SELECT DISTINCT product_id, size FROM product_variants")
+    op.execute("INSERT INTO product_colors SELECT DISTINCT product_id, color FROM product_variants")
+    op.drop_table("product_variants")
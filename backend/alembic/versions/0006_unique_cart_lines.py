@@ -0,0 +1,51 @@
+"""unique cart lines
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0006"
+down_revision: Union[str, None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = ["cart_id", "product_id", "size", "color"]
+
+
+def upgrade() -> None:
+    # Fold duplicate lines into the oldest one before enforcing uniqueness
+    op.execute("""
+        UPDATE cart_items c
+        SET quantity = d.quantity
+        FROM (
+            SELECT min(id) AS id, sum(quantity) AS quantity
+            FROM cart_items
+            GROUP BY cart_id, product_id, size, color
+            HAVING count(*) > 1
+        ) d
+        WHERE c.id = d.id
+    """)
+    op.execute("""
+        DELETE FROM cart_items c
+        USING cart_items keep
+        WHERE c.cart_id = keep.cart_id
+          AND c.product_id = keep.product_id
+          AND c.size = keep.size
+          AND c.color = keep.color
+          AND c.id > keep.id
+    """)
+    op.drop_index("ix_cart_items_cart_product_variant", table_name="cart_items")
+    op.create_index("ix_cart_items_cart_product_variant", "cart_items", COLUMNS, unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_cart_items_cart_product_variant", table_name="cart_items")
+    op.create_index("ix_cart_items_cart_product_variant", "cart_items", COLUMNS)
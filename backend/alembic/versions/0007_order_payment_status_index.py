@@ -0,0 +1,27 @@
+"""order payment status index
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0007"
+down_revision: Union[str, None] = "0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Admin order listing filtered by payment status, newest first
+    op.create_index("ix_orders_payment_status_created_at", "orders", ["payment_status", "created_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_orders_payment_status_created_at", table_name="orders")
@@ -0,0 +1,164 @@
+"""partition orders by month and add order archive
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from datetime import date, datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0008"
+down_revision: Union[str, None] = "0007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Partitions created past the current month; the archive job keeps this up
+MONTHS_AHEAD = 3
+
+ORDER_INDEXES = [
+    ("ix_orders_id", ["id"]),
+    ("ix_orders_user_id_created_at", ["user_id", "created_at"]),
+    ("ix_orders_status_created_at", ["status", "created_at"]),
+    ("ix_orders_created_at", ["created_at"]),
+    ("ix_orders_payment_status_created_at", ["payment_status", "created_at"]),
+]
+ORDER_ITEM_INDEXES = [
+    ("ix_order_items_id", ["id"]),
+    ("ix_order_items_order_id", ["order_id"]),
+    ("ix_order_items_product_id", ["product_id"]),
+]
+
+
+def next_month(month: date) -> date:
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def create_partitions(first: date, last: date) -> None:
+    month = first
+    while month <= last:
+        start = datetime(month.year, month.month, 1, tzinfo=timezone.utc).isoformat()
+        end = datetime(next_month(month).year, next_month(month).month, 1, tzinfo=timezone.utc).isoformat()
+        for table in ("orders", "order_items"):
+            op.execute(
+                f"CREATE TABLE {table}_p{month:%Y%m} PARTITION OF {table} "
+                f"FOR VALUES FROM ('{start}') TO ('{end}')"
+            )
+        month = next_month(month)
+    # Catches rows outside the monthly ranges so inserts never fail; it
+    # should stay empty
+    for table in ("orders", "order_items"):
+        op.execute(f"CREATE TABLE {table}_default PARTITION OF {table} DEFAULT")
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    oldest = bind.execute(sa.text("SELECT min(created_at) FROM orders")).scalar()
+    today = datetime.now(timezone.utc).date()
+    first = date((oldest or today).year, (oldest or today).month, 1)
+    last = date(today.year, today.month, 1)
+    for _ in range(MONTHS_AHEAD):
+        last = next_month(last)
+
+    # Keep the id sequences when the old tables are dropped
+    op.execute("ALTER SEQUENCE orders_id_seq OWNED BY NONE")
+    op.execute("ALTER SEQUENCE order_items_id_seq OWNED BY NONE")
+    op.execute("ALTER TABLE order_items RENAME TO order_items_unpartitioned")
+    op.execute("ALTER TABLE orders RENAME TO orders_unpartitioned")
+    op.execute("UPDATE orders_unpartitioned SET created_at = now() WHERE created_at IS NULL")
+
+    op.execute("""
+        CREATE TABLE orders (LIKE orders_unpartitioned INCLUDING DEFAULTS)
+        PARTITION BY RANGE (created_at)
+    """)
+    op.execute("ALTER TABLE orders ALTER COLUMN created_at SET NOT NULL")
+    # Items carry the order's created_at so they partition (and prune) with it
+    op.execute("""
+        CREATE TABLE order_items (
+            LIKE order_items_unpartitioned INCLUDING DEFAULTS,
+            order_created_at timestamp with time zone NOT NULL
+        ) PARTITION BY RANGE (order_created_at)
+    """)
+    create_partitions(first, last)
+
+    op.execute("INSERT INTO orders SELECT * FROM orders_unpartitioned")
+    op.execute("""
+        INSERT INTO order_items
+        SELECT i.*, o.created_at
+        FROM order_items_unpartitioned i
+        JOIN orders_unpartitioned o ON o.id = i.order_id
+    """)
+    op.execute("DROP TABLE order_items_unpartitioned")
+    op.execute("DROP TABLE orders_unpartitioned")
+    op.execute("ALTER SEQUENCE orders_id_seq OWNED BY orders.id")
+    op.execute("ALTER SEQUENCE order_items_id_seq OWNED BY order_items.id")
+
+    # Keys on partitioned tables must include the partition column
+    op.create_primary_key("orders_pkey", "orders", ["id", "created_at"])
+    op.create_foreign_key("orders_user_id_fkey", "orders", "users", ["user_id"], ["id"])
+    op.create_index("ix_orders_order_number", "orders", ["order_number", "created_at"], unique=True)
+    for name, columns in ORDER_INDEXES:
+        op.create_index(name, "orders", columns)
+
+    op.create_primary_key("order_items_pkey", "order_items", ["id", "order_created_at"])
+    op.create_foreign_key(
+        "order_items_order_fkey", "order_items", "orders",
+        ["order_id", "order_created_at"], ["id", "created_at"]
+    )
+    op.create_foreign_key("order_items_product_id_fkey", "order_items", "products", ["product_id"], ["id"])
+    for name, columns in ORDER_ITEM_INDEXES:
+        op.create_index(name, "order_items", columns)
+
+    op.create_table(
+        "order_archive",
+        sa.Column("order_number", sa.String(50), primary_key=True),
+        sa.Column("order_id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("document", sa.LargeBinary(), nullable=False),
+        sa.Column("archived_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    )
+    op.create_index("ix_order_archive_user_id", "order_archive", ["user_id"])
+
+
+def downgrade() -> None:
+    # Archived orders only exist as documents and are not restored
+    op.drop_index("ix_order_archive_user_id", table_name="order_archive")
+    op.drop_table("order_archive")
+
+    op.execute("ALTER SEQUENCE orders_id_seq OWNED BY NONE")
+    op.execute("ALTER SEQUENCE order_items_id_seq OWNED BY NONE")
+    op.execute("ALTER TABLE order_items RENAME TO order_items_partitioned")
+    op.execute("ALTER TABLE orders RENAME TO orders_partitioned")
+
+    op.execute("CREATE TABLE orders (LIKE orders_partitioned INCLUDING DEFAULTS)")
+    op.execute("CREATE TABLE order_items (LIKE order_items_partitioned INCLUDING DEFAULTS)")
+    op.execute("ALTER TABLE order_items DROP COLUMN order_created_at")
+    op.execute("INSERT INTO orders SELECT * FROM orders_partitioned")
+    op.execute("""
+        INSERT INTO order_items (id, order_id, product_id, quantity, size, color, unit_price, total_price)
+        SELECT id, order_id, product_id, quantity, size, color, unit_price, total_price
+        FROM order_items_partitioned
+    """)
+    # Drops the partitions and their indexes with the parents
+    op.execute("DROP TABLE order_items_partitioned")
+    op.execute("DROP TABLE orders_partitioned")
+    op.execute("ALTER SEQUENCE orders_id_seq OWNED BY orders.id")
+    op.execute("ALTER SEQUENCE order_items_id_seq OWNED BY order_items.id")
+
+    op.create_primary_key("orders_pkey", "orders", ["id"])
+    op.create_foreign_key("orders_user_id_fkey", "orders", "users", ["user_id"], ["id"])
+    op.create_index("ix_orders_order_number", "orders", ["order_number"], unique=True)
+    for name, columns in ORDER_INDEXES:
+        op.create_index(name, "orders", columns)
+
+    op.create_primary_key("order_items_pkey", "order_items", ["id"])
+    op.create_foreign_key("order_items_order_id_fkey", "order_items", "orders", ["order_id"], ["id"])
+    op.create_foreign_key("order_items_product_id_fkey", "order_items", "products", ["product_id"], ["id"])
+    for name, columns in ORDER_ITEM_INDEXES:
+        op.create_index(name, "order_items", columns)
@@ -0,0 +1,37 @@
+"""order number registry
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0009"
+down_revision: Union[str, None] = "0008"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # The partitioned orders table is only unique on (order_number,
+    # created_at); order numbers are claimed here first
+    op.create_table(
+        "order_numbers",
+        sa.Column("order_number", sa.String(50), primary_key=True),
+    )
+    op.execute("""
+        INSERT INTO order_numbers (order_number)
+        SELECT order_number FROM orders
+        UNION
+        SELECT order_number FROM order_archive
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table("order_numbers")
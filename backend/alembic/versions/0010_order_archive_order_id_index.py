@@ -0,0 +1,27 @@
+"""order archive order id index
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-19 19:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0010"
+down_revision: Union[str, None] = "0009"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Order lookups by ID fall back to the archive
+    op.create_index("ix_order_archive_order_id", "order_archive", ["order_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_order_archive_order_id", table_name="order_archive")
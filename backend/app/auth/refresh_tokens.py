@@ -0,0 +1,142 @@
+from typing import Optional, Tuple
+import hashlib
+import secrets
+
+from app.config import settings
+from app.database import get_redis_client
+from app.memory_store import memory_script
+
+TOKEN_PREFIX = "refresh:token:"
+FAMILY_PREFIX = "refresh:family:"
+USER_PREFIX = "refresh:user:"
+
+# Atomically rotate a refresh token.
+# KEYS[1] = presented token key, KEYS[2] = replacement token key
+# ARGV[1] = lifetime (ms), ARGV[2] = family key prefix
+# A token that was already rotated revokes its whole family, so a stolen
+# token stops working for both the thief and the legitimate client.
+ROTATE_LUA = """
+local data = redis.call('HMGET', KEYS[1], 'sub', 'family', 'used')
+if not data[1] then
+    return {'missing'}
+end
+local family_key = ARGV[2] .. data[2]
+if data[3] == '1' then
+    redis.call('DEL', family_key)
+    return {'reused', data[1], data[2]}
+end
+if redis.call('EXISTS', family_key) == 0 then
+    return {'revoked', data[1], data[2]}
+end
+redis.call('HSET', KEYS[1], 'used', '1')
+redis.call('HSET', KEYS[2], 'sub', data[1], 'family', data[2], 'used', '0')
+redis.call('PEXPIRE', KEYS[2], ARGV[1])
+redis.call('PEXPIRE', family_key, ARGV[1])
+return {'ok', data[1], data[2]}
+"""
+
+
+@memory_script(ROTATE_LUA)
+def _rotate(store, keys, args):
+    subject, family, used = store.hmget(keys[0], "sub", "family", "used")
+    if not subject:
+        return ["missing"]
+    family_key = args[1] + family
+    if used == "1":
+        store.delete(family_key)
+        return ["reused", subject, family]
+    if not store.exists(family_key):
+        return ["revoked", subject, family]
+    store.hset(keys[0], "used", "1")
+    store.hset(keys[1], mapping={"sub": subject, "family": family, "used": "0"})
+    store.pexpire(keys[1], args[0])
+    store.pexpire(family_key, args[0])
+    return ["ok", subject, family]
+
+
+class RefreshTokenError(Exception):
+    """Raised when a refresh token cannot be used"""
+
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
+def _hash_token(token: str) -> str:
+    """Refresh tokens are only ever stored hashed"""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+class RefreshTokenStore:
+    """Opaque, rotating refresh tokens stored hashed in Redis
+
+    Each login starts a token family. Refreshing marks the presented token
+    used and issues a new one in the same family; presenting a used token
+    again is treated as theft and revokes the family.
+    """
+
+    def __init__(self, redis=None):
+        self._redis = redis
+        self._rotate_script = None
+
+    @property
+    def redis(self):
+        if self._redis is None:
+            self._redis = get_redis_client()
+        return self._redis
+
+    @property
+    def rotate_script(self):
+        if self._rotate_script is None:
+            self._rotate_script = self.redis.register_script(ROTATE_LUA)
+        return self._rotate_script
+
+    @property
+    def ttl_seconds(self) -> int:
+        return settings.refresh_token_expire_days * 86400
+
+    async def issue(self, subject: str) -> str:
+        """Start a new token family for a subject and return its first token"""
+        token = secrets.token_urlsafe(32)
+        family = secrets.token_urlsafe(16)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hset(TOKEN_PREFIX + _hash_token(token), mapping={
+                "sub": subject, "family": family, "used": "0"
+            })
+            pipe.expire(TOKEN_PREFIX + _hash_token(token), self.ttl_seconds)
+            pipe.set(FAMILY_PREFIX + family, subject, ex=self.ttl_seconds)
+            pipe.sadd(USER_PREFIX + subject, family)
+            pipe.expire(USER_PREFIX + subject, self.ttl_seconds)
+            await pipe.execute()
+        return token
+
+    async def rotate(self, token: str) -> Tuple[str, str]:
+        """Exchange a refresh token for a new one, returning (subject, new token)"""
+        new_token = secrets.token_urlsafe(32)
+        result = await self.rotate_script(
+            keys=[TOKEN_PREFIX + _hash_token(token), TOKEN_PREFIX + _hash_token(new_token)],
+            args=[self.ttl_seconds * 1000, FAMILY_PREFIX]
+        )
+        if result[0] != "ok":
+            raise RefreshTokenError(result[0])
+        return result[1], new_token
+
+    async def revoke(self, token: str) -> Optional[str]:
+        """Revoke the family a refresh token belongs to, returning its subject"""
+        data = await self.redis.hmget(TOKEN_PREFIX + _hash_token(token), "sub", "family")
+        subject, family = data
+        if not family:
+            return None
+        await self.redis.delete(FAMILY_PREFIX + family)
+        await self.redis.srem(USER_PREFIX + subject, family)
+        return subject
+
+    async def revoke_all(self, subject: str):
+        """Revoke every refresh token family of a subject"""
+        families = await self.redis.smembers(USER_PREFIX + subject)
+        if families:
+            await self.redis.delete(*(FAMILY_PREFIX + family for family in families))
+        await self.redis.delete(USER_PREFIX + subject)
+
+
+refresh_token_store = RefreshTokenStore()
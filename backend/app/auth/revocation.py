@@ -0,0 +1,115 @@
+from typing import Dict, Optional
+import asyncio
+import logging
+import time
+
+from redis.exceptions import RedisError
+
+from app.config import settings
+from app.database import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+REVOKED_PREFIX = "revoked:jti:"
+REVOCATION_CHANNEL = "auth:revocations"
+
+
+class RevocationList:
+    """Revoked access token ids, mirrored in memory on every worker
+
+    Redis holds each revoked ``jti`` with a TTL equal to the token's
+    remaining lifetime and is the source of truth. Workers keep an in-memory
+    copy that is seeded by a scan on (re)connect and kept current via
+    pub/sub, so checking a token in ``get_current_user`` never leaves the
+    process. An exact dict is used rather than a Bloom filter: entries only
+    live as long as an access token, so the set stays small.
+    """
+
+    def __init__(self, redis=None):
+        self._redis = redis
+        self._revoked: Dict[str, float] = {}
+        self._next_prune = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def redis(self):
+        if self._redis is None:
+            self._redis = get_redis_client()
+        return self._redis
+
+    def is_revoked(self, jti: Optional[str]) -> bool:
+        """Check a token id against the in-memory mirror"""
+        if not jti:
+            return False
+        expires_at = self._revoked.get(jti)
+        if expires_at is None:
+            return False
+        if expires_at < time.time():
+            self._revoked.pop(jti, None)
+            return False
+        return True
+
+    def _add(self, jti: str, expires_at: float):
+        now = time.time()
+        if expires_at > now:
+            self._revoked[jti] = expires_at
+        if now >= self._next_prune:
+            self._revoked = {k: v for k, v in self._revoked.items() if v > now}
+            self._next_prune = now + 60
+
+    async def revoke(self, jti: str, expires_at: float):
+        """Revoke a token id until its expiry, on all workers"""
+        ttl = int(expires_at - time.time()) + 1
+        if ttl <= 1:
+            return
+        self._add(jti, expires_at)
+        await self.redis.set(REVOKED_PREFIX + jti, expires_at, ex=ttl)
+        await self.redis.publish(REVOCATION_CHANNEL, f"{jti}:{expires_at}")
+
+    async def _sync(self):
+        """Load every revoked token id currently held in Redis"""
+        keys = [key async for key in self.redis.scan_iter(match=REVOKED_PREFIX + "*", count=500)]
+        if not keys:
+            return
+        values = await self.redis.mget(keys)
+        for key, expires_at in zip(keys, values):
+            if expires_at is not None:
+                self._add(key[len(REVOKED_PREFIX):], float(expires_at))
+
+    async def _listen(self):
+        while True:
+            pubsub = self.redis.pubsub()
+            try:
+                await pubsub.subscribe(REVOCATION_CHANNEL)
+                # Sync after subscribing so revocations in between are not lost
+                await self._sync()
+                async for message in pubsub.listen():
+                    if message["type"] != "message":
+                        continue
+                    jti, _, expires_at = message["data"].rpartition(":")
+                    self._add(jti, float(expires_at))
+            except asyncio.CancelledError:
+                raise
+            except (RedisError, OSError, ValueError) as exc:
+                logger.warning(f"Revocation listener error, resubscribing: {exc}")
+                await asyncio.sleep(settings.revocation_retry_seconds)
+            finally:
+                await pubsub.close()
+
+    def start(self):
+        """Start mirroring revocations into this worker"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        """Stop the pub/sub listener"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+revocation_list = RevocationList()
@@ -1,16 +1,20 @@
 from datetime import datetime, timedelta
 from typing import Optional
+import uuid
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, bindparam
 
 from app.config import settings
 from app.database import get_db
 from app.models.user import User
 from app.schemas.user import TokenData
+from app.auth.revocation import revocation_list
+from app.batch import BATCH_USER_KEY
+from app.tracing import tracer
 
 # Password hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -18,6 +22,9 @@ pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 # JWT token scheme
 security = HTTPBearer()
 
+# Built once; runs on every authenticated request
+USER_BY_USERNAME = select(User).where(User.username == bindparam("username"))
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash"""
     return pwd_context.verify(plain_password, hashed_password)
@@ -34,49 +41,68 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     else:
         expire = datetime.utcnow() + timedelta(minutes=settings.access_token_expire_minutes)
     
-    to_encode.update({"exp": expire})
+    # jti identifies the token so it can be revoked before it expires
+    to_encode.update({"exp": expire, "jti": uuid.uuid4().hex})
     encoded_jwt = jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
     return encoded_jwt
 
+def get_bearer_subject(authorization: Optional[str]) -> Optional[str]:
+    """Username from an Authorization header, without touching the database"""
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
+    except JWTError:
+        return None
+    if revocation_list.is_revoked(payload.get("jti")):
+        return None
+    return payload.get("sub")
+
 async def get_current_user(
+    request: Request,
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: AsyncSession = Depends(get_db)
 ) -> User:
     """Get current user from JWT token"""
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
+    # Sub-requests of /batch share the user resolved once for the batch
+    batch_user = request.scope.get(BATCH_USER_KEY)
+    if batch_user is not None:
+        return batch_user
     
-    try:
-        payload = jwt.decode(
-            credentials.credentials, 
-            settings.secret_key, 
-            algorithms=[settings.algorithm]
+    with tracer.span("get_current_user"):
+        credentials_exception = HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
         )
-        username: str = payload.get("sub")
-        if username is None:
+        
+        try:
+            payload = jwt.decode(
+                credentials.credentials, 
+                settings.secret_key, 
+                algorithms=[settings.algorithm]
+            )
+            username: str = payload.get("sub")
+            if username is None:
+                raise credentials_exception
+            if revocation_list.is_revoked(payload.get("jti")):
+                raise credentials_exception
+            token_data = TokenData(username=username)
+        except JWTError:
             raise credentials_exception
-        token_data = TokenData(username=username)
-    except JWTError:
-        raise credentials_exception
-    
-    # Get user from database
-    result = await db.execute(
-        select(User).where(User.username == token_data.username)
-    )
-    user = result.scalar_one_or_none()
-    
-    if user is None:
-        raise credentials_exception
-    return user
+        
+        # Get user from database
+        result = await db.execute(USER_BY_USERNAME, {"username": token_data.username})
+        user = result.scalar_one_or_none()
+        
+        if user is None:
+            raise credentials_exception
+        return user
 
 async def authenticate_user(db: AsyncSession, username: str, password: str) -> Optional[User]:
     """Authenticate user with username and password"""
-    result = await db.execute(
-        select(User).where(User.username == username)
-    )
+    result = await db.execute(USER_BY_USERNAME, {"username": username})
     user = result.scalar_one_or_none()
     
     if not user:
@@ -0,0 +1,145 @@
+from typing import List, Optional, Tuple
+from urllib.parse import urlsplit
+import asyncio
+import json
+import logging
+
+from starlette.exceptions import HTTPException
+from starlette.requests import Request
+
+from app.config import settings
+from app.schemas.batch import BatchRequestItem
+from app.tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+# Scope key holding the user resolved once for the whole batch
+BATCH_USER_KEY = "batch_user"
+BATCH_PATH = "/api/v1/batch"
+# Sub-requests have no body of their own and run as the batch caller. Their
+# responses are embedded in the batch's JSON, so they are not compressed or
+# conditional on the batch request's validators.
+BODY_HEADERS = {
+    "content-length", "content-type", "transfer-encoding", "idempotency-key",
+    "accept-encoding", "if-none-match", "if-modified-since"
+}
+FIXED_HEADERS = BODY_HEADERS | {"authorization"}
+REDIRECTS = {301, 302, 303, 307, 308}
+
+
+class SubResponse:
+    def __init__(self):
+        self.status = 500
+        self.headers: List[Tuple[bytes, bytes]] = []
+        self.body = bytearray()
+
+    async def send(self, message):
+        if message["type"] == "http.response.start":
+            self.status = message["status"]
+            self.headers = message.get("headers", [])
+        elif message["type"] == "http.response.body":
+            self.body.extend(message.get("body", b""))
+
+    def header(self, name: bytes) -> Optional[str]:
+        return next((value.decode("latin-1") for key, value in self.headers if key.lower() == name), None)
+
+    def to_json(self) -> bytes:
+        """Response item with the body spliced in as-is when it is already JSON"""
+        headers = {
+            key.decode("latin-1"): value.decode("latin-1")
+            for key, value in self.headers if key.lower() != b"content-length"
+        }
+        if not self.body:
+            body = b"null"
+        elif (self.header(b"content-type") or "").startswith("application/json"):
+            body = bytes(self.body)
+        else:
+            body = json.dumps(self.body.decode("utf-8", "replace")).encode()
+        return json.dumps({"status": self.status, "headers": headers})[:-1].encode() + b',"body":' + body + b"}"
+
+
+def _subrequest_scope(parent: dict, path: str, query: str, headers: dict, user) -> dict:
+    scope = {
+        key: parent[key]
+        for key in ("asgi", "http_version", "scheme", "server", "client", "root_path", "app", "state")
+        if key in parent
+    }
+    headers = {key: value for key, value in headers.items() if key not in FIXED_HEADERS}
+    forwarded = [
+        (key, value) for key, value in parent["headers"]
+        if key.decode("latin-1") not in BODY_HEADERS and key.decode("latin-1") not in headers
+    ]
+    forwarded += [(key.encode("latin-1"), value.encode("latin-1")) for key, value in headers.items()]
+    scope.update({
+        "type": "http",
+        "method": "GET",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "headers": forwarded,
+        # HTTPException and validation handlers, installed by ExceptionMiddleware
+        "starlette.exception_handlers": parent.get("starlette.exception_handlers"),
+        BATCH_USER_KEY: user,
+    })
+    return scope
+
+
+async def _receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def _dispatch(request: Request, item: BatchRequestItem, user) -> SubResponse:
+    url = urlsplit(item.path)
+    headers = {key.lower(): value for key, value in item.headers.items()}
+    response = SubResponse()
+    # One hop, for the trailing-slash redirects the router issues
+    for _ in range(2):
+        if url.path.rstrip("/") == BATCH_PATH:
+            response.status = 400
+            response.headers = [(b"content-type", b"application/json")]
+            response.body = bytearray(b'{"detail":"Batches cannot be nested"}')
+            return response
+        scope = _subrequest_scope(request.scope, url.path, url.query, headers, user)
+        response = SubResponse()
+        try:
+            # Routed past the middleware stack: the batch request itself is traced and profiled
+            await request.app.router(scope, _receive, response.send)
+        except HTTPException as exc:
+            # Raised by the router itself for unknown paths and methods
+            response.status = exc.status_code
+            response.headers = [(b"content-type", b"application/json")]
+            response.body = bytearray(json.dumps({"detail": exc.detail}).encode())
+        location = response.header(b"location")
+        if response.status not in REDIRECTS or not location:
+            break
+        url = urlsplit(location)
+    return response
+
+
+async def _run(request: Request, item: BatchRequestItem, user, semaphore: asyncio.Semaphore) -> bytes:
+    async with semaphore:
+        with tracer.span("batch.request", path=item.path):
+            try:
+                response = await _dispatch(request, item, user)
+            except Exception as exc:
+                logger.error(f"Batch sub-request {item.path} failed: {exc}")
+                response = SubResponse()
+                response.headers = [(b"content-type", b"application/json")]
+                response.body = bytearray(json.dumps({
+                    "error": "Internal server error",
+                    "message": "An unexpected error occurred",
+                    "details": str(exc) if settings.debug else None
+                }).encode())
+    return response.to_json()
+
+
+async def run_batch(request: Request, items: List[BatchRequestItem], user=None) -> bytes:
+    """Run sub-requests concurrently against the app's routes; JSON body with results in order
+
+    Each sub-request goes through its route's dependencies as usual, so it
+    gets its own database session, but authentication resolves to the
+    given user instead of being repeated.
+    """
+    semaphore = asyncio.Semaphore(settings.batch_concurrency)
+    results = await asyncio.gather(*(_run(request, item, user, semaphore) for item in items))
+    return b'{"responses":[' + b",".join(results) + b"]}"
\ No newline at end of file
@@ -0,0 +1,412 @@
+from collections import Counter, OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+import asyncio
+import json
+import logging
+import math
+import random
+import time
+import uuid
+
+from redis.exceptions import RedisError
+
+from app.config import settings
+from app.database import get_redis_client
+from app.memory_store import memory_script
+
+logger = logging.getLogger(__name__)
+
+Loader = Callable[[], Awaitable[Any]]
+
+# Delete the lock only if we still own it
+RELEASE_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+@memory_script(RELEASE_LUA)
+def _release(store, keys, args):
+    if store.get(keys[0]) == str(args[0]):
+        return store.delete(keys[0])
+    return 0
+
+
+def jittered(seconds: float) -> float:
+    """Shorten a TTL by up to cache_ttl_jitter so keys filled together expire apart"""
+    return seconds * (1 - settings.cache_ttl_jitter * random.random())
+
+
+def hit_ratio(hits: int, misses: int) -> Optional[float]:
+    lookups = hits + misses
+    return round(hits / lookups, 4) if lookups else None
+
+
+class SingleFlightCache:
+    """Redis read-through cache that loads each key at most once at a time
+
+    Concurrent misses in one process share a single in-flight load, and a
+    short Redis lock keeps other processes from loading the same key; they
+    wait for the winner's value instead. Entries stay in Redis past their
+    TTL so stale values can be served while one caller refreshes them.
+    Values must be JSON serializable.
+    """
+
+    def __init__(self, redis=None, prefix: str = "cache"):
+        self._redis = redis
+        self._release_script = None
+        self.prefix = prefix
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._refreshing: set = set()
+        # Redis lookups: fresh hits, stale hits served while refreshing, loads
+        self.counts: Counter = Counter()
+
+    @property
+    def redis(self):
+        if self._redis is None:
+            self._redis = get_redis_client()
+        return self._redis
+
+    @property
+    def release_script(self):
+        if self._release_script is None:
+            self._release_script = self.redis.register_script(RELEASE_LUA)
+        return self._release_script
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}:{key}"
+
+    def _lock_key(self, key: str) -> str:
+        return f"{self.prefix}:lock:{key}"
+
+    async def get_or_load(
+        self,
+        key: str,
+        loader: Loader,
+        ttl: Optional[int] = None,
+        stale_ttl: Optional[int] = None
+    ) -> Any:
+        """Cached value for key, calling loader at most once across callers"""
+        value, _ = await self._get_entry(key, loader, ttl, stale_ttl)
+        return value
+
+    async def invalidate(self, *keys: str):
+        """Mark entries stale; the next read refreshes them in the background"""
+        try:
+            for key in keys:
+                raw = await self.redis.get(self._key(key))
+                if raw is None:
+                    continue
+                entry = json.loads(raw)
+                entry["fresh_until"] = 0
+                await self.redis.set(self._key(key), json.dumps(entry), keepttl=True)
+        except (RedisError, OSError) as exc:
+            logger.warning(f"Cache invalidation failed for {keys}: {exc}")
+
+    async def delete(self, *keys: str):
+        """Drop entries outright, for values that must not be served stale"""
+        try:
+            await self.redis.delete(*(self._key(key) for key in keys))
+        except (RedisError, OSError) as exc:
+            logger.warning(f"Cache delete failed for {keys}: {exc}")
+
+    def stats(self) -> dict:
+        """Hit counts and ratio for this worker"""
+        counts = self.counts
+        return {
+            "redis": {
+                "hits": counts["hit"],
+                "stale_hits": counts["stale"],
+                "misses": counts["miss"],
+                "hit_ratio": hit_ratio(counts["hit"] + counts["stale"], counts["miss"]),
+            },
+        }
+
+    async def _get_entry(
+        self, key: str, loader: Loader, ttl: Optional[int], stale_ttl: Optional[int]
+    ) -> Tuple[Any, float]:
+        """Value and the time it stops being fresh (0 if it was not cached)"""
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self._fetch(key, loader, ttl, stale_ttl))
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # Shield so one cancelled request does not cancel the shared load
+        return await asyncio.shield(future)
+
+    async def _fetch(
+        self, key: str, loader: Loader, ttl: Optional[int], stale_ttl: Optional[int]
+    ) -> Tuple[Any, float]:
+        ttl = ttl or settings.cache_ttl_seconds
+        stale_ttl = settings.cache_stale_seconds if stale_ttl is None else stale_ttl
+        try:
+            raw = await self.redis.get(self._key(key))
+        except (RedisError, OSError) as exc:
+            logger.warning(f"Cache unavailable, loading {key} directly: {exc}")
+            self.counts["miss"] += 1
+            return await loader(), 0
+
+        if raw is not None:
+            entry = json.loads(raw)
+            if entry["fresh_until"] > time.time():
+                self.counts["hit"] += 1
+            else:
+                self.counts["stale"] += 1
+                if key not in self._refreshing:
+                    self._refreshing.add(key)
+                    task = asyncio.create_task(self._refresh(key, loader, ttl, stale_ttl))
+                    task.add_done_callback(lambda _: self._refreshing.discard(key))
+            return entry["value"], entry["fresh_until"]
+
+        return await self._load_locked(key, loader, ttl, stale_ttl)
+
+    async def _load_locked(self, key: str, loader: Loader, ttl: int, stale_ttl: int) -> Tuple[Any, float]:
+        """Load behind the cross-process lock, or wait for whoever holds it"""
+        token = uuid.uuid4().hex
+        lock_key = self._lock_key(key)
+        deadline = time.monotonic() + settings.cache_lock_seconds
+        try:
+            while not await self.redis.set(lock_key, token, nx=True, px=settings.cache_lock_seconds * 1000):
+                await asyncio.sleep(0.05)
+                raw = await self.redis.get(self._key(key))
+                if raw is not None:
+                    entry = json.loads(raw)
+                    self.counts["hit"] += 1
+                    return entry["value"], entry["fresh_until"]
+                if time.monotonic() >= deadline:
+                    # The holder is stuck or gone; load ourselves
+                    return await self._load(key, loader, ttl, stale_ttl)
+        except (RedisError, OSError) as exc:
+            logger.warning(f"Cache lock unavailable, loading {key} directly: {exc}")
+            self.counts["miss"] += 1
+            return await loader(), 0
+
+        try:
+            # The previous holder may have filled the key just before releasing
+            raw = await self.redis.get(self._key(key))
+            if raw is not None:
+                entry = json.loads(raw)
+                self.counts["hit"] += 1
+                return entry["value"], entry["fresh_until"]
+            return await self._load(key, loader, ttl, stale_ttl)
+        finally:
+            try:
+                await self.release_script(keys=[lock_key], args=[token])
+            except (RedisError, OSError):
+                pass
+
+    async def _load(self, key: str, loader: Loader, ttl: int, stale_ttl: int) -> Tuple[Any, float]:
+        self.counts["miss"] += 1
+        value = await loader()
+        ttl = jittered(ttl)
+        fresh_until = time.time() + ttl
+        entry = {"value": value, "fresh_until": fresh_until}
+        try:
+            await self.redis.set(self._key(key), json.dumps(entry), ex=math.ceil(ttl + stale_ttl))
+        except (RedisError, OSError) as exc:
+            logger.warning(f"Could not cache {key}: {exc}")
+            return value, 0
+        return value, fresh_until
+
+    async def _refresh(self, key: str, loader: Loader, ttl: int, stale_ttl: int):
+        token = uuid.uuid4().hex
+        lock_key = self._lock_key(key)
+        try:
+            # Another process is already refreshing; keep serving stale
+            if not await self.redis.set(lock_key, token, nx=True, px=settings.cache_lock_seconds * 1000):
+                return
+            try:
+                await self._load(key, loader, ttl, stale_ttl)
+            finally:
+                await self.release_script(keys=[lock_key], args=[token])
+        except Exception as exc:
+            logger.warning(f"Background refresh of {key} failed: {exc}")
+
+
+class LocalCache:
+    """In-process LRU of decoded values with per-entry expiry, bounded by size
+
+    Sizes are the JSON length of each value, an estimate of what it costs
+    to hold and what it would cost to fetch again.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self._entries: "OrderedDict[str, Tuple[Any, float, int]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        if entry[1] <= time.monotonic():
+            self._remove(key)
+            return False, None
+        self._entries.move_to_end(key)
+        return True, entry[0]
+
+    def put(self, key: str, value: Any, ttl: float):
+        size = len(json.dumps(value))
+        if size > self.max_bytes or ttl <= 0:
+            return
+        self.discard(key)
+        self._entries[key] = (value, time.monotonic() + ttl, size)
+        self.current_bytes += size
+        while self.current_bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+
+    def discard(self, key: str):
+        if key in self._entries:
+            self._remove(key)
+
+    def clear(self):
+        self._entries.clear()
+        self.current_bytes = 0
+
+    def _remove(self, key: str):
+        _, _, size = self._entries.pop(key)
+        self.current_bytes -= size
+
+
+class TwoTierCache(SingleFlightCache):
+    """SingleFlightCache with an in-process LRU in front of Redis
+
+    Hot keys are served from memory without a round-trip or a JSON decode.
+    A local entry lives for at most cache_local_ttl_seconds and never past
+    the Redis entry's freshness; stale Redis values are not kept locally.
+    Invalidations and deletes are published on a channel that every worker
+    subscribes to, so all of them drop their local copy; a worker that is
+    not subscribed (scripts, or while reconnecting) keeps nothing locally.
+    Values are shared between callers and must not be mutated.
+    """
+
+    def __init__(self, redis=None, prefix: str = "cache", max_bytes: Optional[int] = None):
+        super().__init__(redis=redis, prefix=prefix)
+        self.local = LocalCache(max_bytes or settings.cache_local_max_bytes)
+        self.channel = f"{prefix}:invalidations"
+        # Bumped on every invalidation so loads that raced one are not kept
+        self._generation = 0
+        self._subscribed = False
+        self._task: Optional[asyncio.Task] = None
+
+    async def get_or_load(
+        self,
+        key: str,
+        loader: Loader,
+        ttl: Optional[int] = None,
+        stale_ttl: Optional[int] = None
+    ) -> Any:
+        found, value = self.local.get(key)
+        if found:
+            self.counts["local_hit"] += 1
+            return value
+        self.counts["local_miss"] += 1
+        generation = self._generation
+        value, fresh_until = await self._get_entry(key, loader, ttl, stale_ttl)
+        # Unsubscribed workers would not hear about invalidations
+        if self._subscribed and generation == self._generation:
+            remaining = fresh_until - time.time()
+            self.local.put(key, value, jittered(min(settings.cache_local_ttl_seconds, remaining)))
+        return value
+
+    async def invalidate(self, *keys: str):
+        # Redis first: a local miss in between must not refill from the old entry
+        await super().invalidate(*keys)
+        self._drop_local(keys)
+        await self._publish(keys)
+
+    async def delete(self, *keys: str):
+        await super().delete(*keys)
+        self._drop_local(keys)
+        await self._publish(keys)
+
+    def stats(self) -> dict:
+        counts = self.counts
+        hits = counts["local_hit"] + counts["hit"] + counts["stale"]
+        return {
+            "local": {
+                "hits": counts["local_hit"],
+                "misses": counts["local_miss"],
+                "hit_ratio": hit_ratio(counts["local_hit"], counts["local_miss"]),
+                "entries": len(self.local),
+                "bytes": self.local.current_bytes,
+                "max_bytes": self.local.max_bytes,
+                "subscribed": self._subscribed,
+            },
+            **super().stats(),
+            # Share of all lookups that never reached the loader
+            "overall_hit_ratio": hit_ratio(hits, counts["miss"]),
+        }
+
+    def _drop_local(self, keys):
+        self._generation += 1
+        for key in keys:
+            self.local.discard(key)
+
+    async def _publish(self, keys):
+        try:
+            await self.redis.publish(self.channel, json.dumps(list(keys)))
+        except (RedisError, OSError) as exc:
+            logger.warning(f"Could not publish cache invalidation for {keys}: {exc}")
+
+    async def _listen(self):
+        while True:
+            pubsub = self.redis.pubsub()
+            try:
+                await pubsub.subscribe(self.channel)
+                self._subscribed = True
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        self._drop_local(json.loads(message["data"]))
+            except asyncio.CancelledError:
+                raise
+            except (RedisError, OSError, ValueError) as exc:
+                logger.warning(f"Cache invalidation listener error, resubscribing: {exc}")
+                await asyncio.sleep(settings.cache_invalidation_retry_seconds)
+            finally:
+                # Invalidations sent until we resubscribe are missed
+                self._subscribed = False
+                self._generation += 1
+                self.local.clear()
+                await pubsub.close()
+
+    def start(self):
+        """Start receiving invalidations from other workers"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        """Stop the pub/sub listener"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# Bumped on every catalog write; payloads precomputed from the catalog are
+# rebuilt by each worker when it changes
+CATALOG_VERSION_KEY = "catalog:version"
+CATALOG_VERSION_CHANNEL = "catalog:version"
+
+
+async def bump_catalog_version(redis=None) -> Optional[int]:
+    """Record a catalog write and announce the new version to every worker"""
+    redis = redis or get_redis_client()
+    try:
+        version = await redis.incr(CATALOG_VERSION_KEY)
+        await redis.publish(CATALOG_VERSION_CHANNEL, version)
+        return version
+    except (RedisError, OSError) as exc:
+        logger.warning(f"Could not bump the catalog version: {exc}")
+        return None
+
+
+catalog_cache = TwoTierCache(prefix="cache:catalog")
\ No newline at end of file
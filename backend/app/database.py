@@ -1,29 +1,169 @@
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
-from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy import DateTime, event, make_url, text
+from sqlalchemy.engine.interfaces import CacheStats
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql import functions
+from sqlalchemy.types import TypeDecorator
+from datetime import timezone
+from typing import Dict
 from app.config import settings
-import redis.asyncio as redis
+from app.tracing import KIND_CLIENT, instrument_engine, instrument_redis, tracer
+from app.slow_queries import slow_query_log
+import os
 
 # SQLAlchemy setup
 class Base(DeclarativeBase):
     pass
 
+class TZDateTime(TypeDecorator):
+    """DateTime(timezone=True) that is timezone-aware on SQLite too
+    
+    SQLite stores timestamps without an offset; values are written as UTC
+    and read back as UTC, so both backends return the same datetimes.
+    """
+    impl = DateTime(timezone=True)
+    cache_ok = True
+    
+    def process_bind_param(self, value, dialect):
+        if value is not None and value.tzinfo is not None and dialect.name == "sqlite":
+            return value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value
+    
+    def process_result_value(self, value, dialect):
+        if value is not None and value.tzinfo is None:
+            return value.replace(tzinfo=timezone.utc)
+        return value
+
+@compiles(functions.now, "sqlite")
+def _sqlite_now(element, compiler, **kw):
+    # CURRENT_TIMESTAMP has no fraction, while DateTime binds microseconds.
+    # SQLite compares the text, so a database-side now() written into one
+    # column (orders.created_at) would never equal the same value bound from
+    # Python into another (order_items.order_created_at)
+    return "strftime('%Y-%m-%d %H:%M:%f000', 'now')"
+
+database_url = make_url(settings.database_url)
+
+# Embedded mode: the database is a local SQLite file (aiosqlite)
+IS_SQLITE = database_url.get_backend_name() == "sqlite"
+
+def _engine_options() -> dict:
+    if database_url.drivername == "postgresql+asyncpg":
+        return {"connect_args": {"prepared_statement_cache_size": settings.db_prepared_statement_cache_size}}
+    if IS_SQLITE and database_url.database not in (None, "", ":memory:"):
+        # SQLite has a single writer: with more connections a transaction
+        # that reads and then writes fails with "database is locked". One
+        # connection queues transactions in the pool instead
+        return {"pool_size": 1, "max_overflow": 0}
+    return {}
+
 # Create async engine
 engine = create_async_engine(
     settings.database_url,
     echo=settings.debug,
-    future=True
+    future=True,
+    query_cache_size=settings.db_query_cache_size,
+    **_engine_options()
 )
 
+if IS_SQLITE:
+    @event.listens_for(engine.sync_engine, "connect")
+    def _configure_sqlite(dbapi_connection, connection_record):
+        # Let SQLAlchemy emit BEGIN itself so a transaction covers its reads
+        dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        if database_url.database not in (None, "", ":memory:"):
+            cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.execute(f"PRAGMA busy_timeout={int(settings.sqlite_busy_timeout_ms)}")
+        cursor.execute(f"PRAGMA cache_size=-{int(settings.sqlite_cache_size_kb)}")
+        cursor.execute(f"PRAGMA mmap_size={int(settings.sqlite_mmap_size_mb) * 1024 * 1024}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.close()
+
+    @event.listens_for(engine.sync_engine, "begin")
+    def _begin_sqlite(conn):
+        conn.exec_driver_sql("BEGIN")
+
+# Span per SQL statement within sampled traces
+instrument_engine(engine.sync_engine)
+
+# Statements over slow_query_ms, by fingerprint, for /admin/db/slow-queries
+slow_query_log.instrument(engine)
+
+# Compiled-statement cache outcomes, reported by /admin/db/cache-stats
+query_cache_stats: Dict[str, int] = {"hit": 0, "miss": 0, "uncached": 0}
+
+@event.listens_for(engine.sync_engine, "after_cursor_execute")
+def _count_query_cache(conn, cursor, statement, parameters, context, executemany):
+    if context is None:
+        return
+    if context.cache_hit == CacheStats.CACHE_HIT:
+        query_cache_stats["hit"] += 1
+    elif context.cache_hit == CacheStats.CACHE_MISS:
+        query_cache_stats["miss"] += 1
+    else:
+        query_cache_stats["uncached"] += 1
+
+def get_query_cache_stats() -> dict:
+    """Compiled-statement cache hit rate and size since startup"""
+    lookups = query_cache_stats["hit"] + query_cache_stats["miss"]
+    compiled_cache = engine.sync_engine._compiled_cache
+    return {
+        **query_cache_stats,
+        "hit_rate": round(query_cache_stats["hit"] / lookups, 4) if lookups else None,
+        "size": len(compiled_cache) if compiled_cache is not None else 0,
+        "capacity": settings.db_query_cache_size,
+    }
+
+class TracedSession(AsyncSession):
+    """AsyncSession whose commits show up as spans in sampled traces"""
+    
+    async def commit(self):
+        with tracer.span("db.commit", KIND_CLIENT):
+            await super().commit()
+
 # Create async session factory
 AsyncSessionLocal = async_sessionmaker(
     engine,
-    class_=AsyncSession,
+    class_=TracedSession,
     expire_on_commit=False
 )
 
-# Redis setup
-redis_client = redis.from_url(settings.redis_url, decode_responses=True)
+def upsert(model):
+    """INSERT for a model with the dialect's ON CONFLICT clauses"""
+    if IS_SQLITE:
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        from sqlalchemy.dialects.postgresql import insert
+    return insert(model)
+
+# Redis setup - the client is created on first use so that importing the
+# app (and every worker cold start) does not pay for it
+_redis_client = None
+
+def get_redis_client():
+    """Get the shared Redis client, creating it on first use
+    
+    redis_url="memory://" selects the in-process store (embedded mode).
+    """
+    global _redis_client
+    if _redis_client is None:
+        if settings.embedded:
+            from app.memory_store import MemoryRedis
+            _redis_client = MemoryRedis()
+        else:
+            import redis.asyncio as redis
+            _redis_client = instrument_redis(redis.from_url(settings.redis_url, decode_responses=True))
+    return _redis_client
+
+def __getattr__(name):
+    # Keeps `from app.database import redis_client` working lazily
+    if name == "redis_client":
+        return get_redis_client()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # Dependency to get database session
 async def get_db():
@@ -35,17 +175,52 @@ async def get_db():
 
 # Dependency to get redis client
 async def get_redis():
-    return redis_client
+    return get_redis_client()
 
 # Database initialization
 async def init_db():
-    """Initialize database tables"""
+    """Initialize database tables (development only - runs DDL)"""
     async with engine.begin() as conn:
         # Import all models to ensure they are registered
-        from app.models import user, product, order
+        from app.models import user, product, order, job
         await conn.run_sync(Base.metadata.create_all)
+        if IS_SQLITE:
+            await conn.exec_driver_sql("PRAGMA optimize")
+
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "alembic.ini")
+
+def get_alembic_heads() -> set:
+    """Head revisions of the Alembic migration scripts"""
+    from alembic.config import Config
+    from alembic.script import ScriptDirectory
+    
+    config = Config(ALEMBIC_INI)
+    config.set_main_option(
+        "script_location", os.path.join(os.path.dirname(ALEMBIC_INI), "alembic")
+    )
+    return set(ScriptDirectory.from_config(config).get_heads())
+
+async def verify_schema_version():
+    """Check the database is migrated to the Alembic head, without any DDL"""
+    heads = get_alembic_heads()
+    async with engine.connect() as conn:
+        try:
+            result = await conn.execute(text("SELECT version_num FROM alembic_version"))
+            current = {row[0] for row in result}
+        except Exception as exc:
+            raise RuntimeError(
+                "Database has no alembic_version table; run `alembic upgrade head`, "
+                "or `alembic stamp 0001` first if its tables were made by create_all"
+            ) from exc
+    
+    if current != heads:
+        raise RuntimeError(
+            f"Database schema revision {sorted(current)} does not match "
+            f"migration head {sorted(heads)}; run `alembic upgrade head`"
+        )
 
 async def close_db():
     """Close database connections"""
     await engine.dispose()
-    await redis_client.close()
\ No newline at end of file
+    if _redis_client is not None:
+        await _redis_client.close()
\ No newline at end of file
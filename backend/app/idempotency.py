@@ -0,0 +1,182 @@
+from typing import Iterable
+import asyncio
+import base64
+import hashlib
+import json
+import logging
+
+from redis.exceptions import RedisError
+
+from app.config import settings
+from app.database import get_redis_client
+from app.auth.security import get_bearer_subject
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "idem:"
+REPLAYED_HEADER = (b"idempotent-replayed", b"true")
+# Response headers worth replaying; everything else is regenerated
+STORED_HEADERS = {b"content-type", b"location"}
+
+
+class IdempotencyMiddleware:
+    """Idempotency-Key support for retry-prone POST endpoints
+
+    The first request with a key runs normally and its response is stored
+    in Redis. Retries with the same key get the stored response back
+    without reaching the route, its dependencies or the database.
+    Concurrent duplicates wait for the first one to finish. Reusing a key
+    with a different body is rejected with 422.
+    """
+
+    def __init__(self, app, paths: Iterable[str], redis=None):
+        self.app = app
+        self.paths = {path.rstrip("/") for path in paths}
+        self._redis = redis
+
+    @property
+    def redis(self):
+        if self._redis is None:
+            self._redis = get_redis_client()
+        return self._redis
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] != "POST"
+            or scope["path"].rstrip("/") not in self.paths
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        key = headers.get(b"idempotency-key", b"").decode("latin-1").strip()
+        subject = get_bearer_subject(headers.get(b"authorization", b"").decode("latin-1"))
+        if not key or not subject:
+            # Unauthenticated requests fail in the route as usual
+            await self.app(scope, receive, send)
+            return
+        if len(key) > 255:
+            await self._send_json(send, 400, {"detail": "Idempotency-Key is too long"})
+            return
+
+        body = await self._read_body(receive)
+        fingerprint = hashlib.sha256(body).hexdigest()
+        redis_key = f"{KEY_PREFIX}{subject}:{scope['path'].rstrip('/')}:{key}"
+
+        try:
+            acquired = await self.redis.set(
+                redis_key,
+                json.dumps({"state": "pending", "fingerprint": fingerprint}),
+                nx=True,
+                ex=settings.idempotency_lock_seconds
+            )
+        except (RedisError, OSError) as exc:
+            logger.warning(f"Idempotency store unavailable, executing request: {exc}")
+            await self.app(scope, self._replay_body(body), send)
+            return
+
+        if acquired:
+            await self._execute(scope, body, send, redis_key, fingerprint)
+        else:
+            await self._replay(send, redis_key, fingerprint)
+
+    async def _read_body(self, receive) -> bytes:
+        chunks = []
+        while True:
+            message = await receive()
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                return b"".join(chunks)
+
+    def _replay_body(self, body: bytes):
+        sent = False
+
+        async def receive():
+            nonlocal sent
+            if not sent:
+                sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return {"type": "http.disconnect"}
+
+        return receive
+
+    async def _execute(self, scope, body: bytes, send, redis_key: str, fingerprint: str):
+        response = {"status": 500, "headers": [], "body": []}
+
+        async def capture(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                response["headers"] = [
+                    [name.decode("latin-1"), value.decode("latin-1")]
+                    for name, value in message.get("headers", [])
+                    if name.lower() in STORED_HEADERS
+                ]
+            elif message["type"] == "http.response.body":
+                response["body"].append(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, self._replay_body(body), capture)
+        except BaseException:
+            await self._release(redis_key)
+            raise
+
+        if response["status"] >= 500:
+            # Server errors are not final; let the client retry for real
+            await self._release(redis_key)
+            return
+
+        stored = {
+            "state": "done",
+            "fingerprint": fingerprint,
+            "status": response["status"],
+            "headers": response["headers"],
+            "body": base64.b64encode(b"".join(response["body"])).decode("ascii"),
+        }
+        try:
+            await self.redis.set(redis_key, json.dumps(stored), ex=settings.idempotency_ttl_seconds)
+        except (RedisError, OSError) as exc:
+            logger.warning(f"Could not store idempotent response: {exc}")
+
+    async def _release(self, redis_key: str):
+        try:
+            await self.redis.delete(redis_key)
+        except (RedisError, OSError):
+            pass
+
+    async def _replay(self, send, redis_key: str, fingerprint: str):
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.idempotency_lock_seconds
+        while True:
+            raw = await self.redis.get(redis_key)
+            if raw is None:
+                # The original failed and released the key
+                await self._send_json(send, 409, {"detail": "Original request failed; retry"})
+                return
+            stored = json.loads(raw)
+            if stored["fingerprint"] != fingerprint:
+                await self._send_json(send, 422, {"detail": "Idempotency-Key reused with a different request body"})
+                return
+            if stored["state"] == "done":
+                break
+            if loop.time() >= deadline:
+                await self._send_json(send, 409, {"detail": "A request with this Idempotency-Key is in progress"})
+                return
+            await asyncio.sleep(0.05)
+
+        body = base64.b64decode(stored["body"])
+        headers = [(name.encode("latin-1"), value.encode("latin-1")) for name, value in stored["headers"]]
+        headers.append((b"content-length", str(len(body)).encode("latin-1")))
+        headers.append(REPLAYED_HEADER)
+        await send({"type": "http.response.start", "status": stored["status"], "headers": headers})
+        await send({"type": "http.response.body", "body": body})
+
+    async def _send_json(self, send, status: int, content: dict):
+        body = json.dumps(content).encode()
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,12 @@
+# Background jobs package
+from .backends import Job, get_job_backend
+from .registry import job_handler
+from .outbox import enqueue_job
+from . import handlers
+
+__all__ = [
+    "Job",
+    "get_job_backend",
+    "job_handler",
+    "enqueue_job"
+]
@@ -0,0 +1,264 @@
+from collections import defaultdict, deque
+from typing import Dict, List, Optional
+from pydantic import BaseModel, Field, PrivateAttr
+import asyncio
+import time
+import uuid
+
+from app.config import settings
+from app.database import get_redis_client
+from app.memory_store import memory_script
+
+
+class Job(BaseModel):
+    id: str = Field(default_factory=lambda: uuid.uuid4().hex)
+    queue: str = "default"
+    name: str
+    payload: dict = Field(default_factory=dict)
+    idempotency_key: Optional[str] = None
+    attempts: int = 0
+    max_attempts: int = 5
+    # When the job last became ready to run; used for queue latency
+    enqueued_at: float = Field(default_factory=time.time)
+    last_error: Optional[str] = None
+
+    # Serialized form as popped, needed to remove it from the processing list
+    _raw: Optional[str] = PrivateAttr(default=None)
+
+    @property
+    def dedupe_key(self) -> str:
+        return self.idempotency_key or self.id
+
+
+# Move due delayed jobs to the ready list.
+# KEYS[1] = delayed zset, KEYS[2] = ready list, ARGV[1] = now, ARGV[2] = batch
+PROMOTE_LUA = """
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+for _, raw in ipairs(due) do
+    redis.call('ZREM', KEYS[1], raw)
+    redis.call('LPUSH', KEYS[2], raw)
+end
+return #due
+"""
+
+
+@memory_script(PROMOTE_LUA)
+def _promote(store, keys, args):
+    due = store.zrangebyscore(keys[0], "-inf", args[0], 0, args[1])
+    for raw in due:
+        store.zrem(keys[0], raw)
+        store.lpush(keys[1], raw)
+    return len(due)
+
+
+class RedisJobBackend:
+    """Reliable Redis queues: ready list, per-worker processing lists,
+    a delayed zset for retries and a capped dead-letter list per queue"""
+
+    def __init__(self, redis=None, prefix: str = "jobs"):
+        self._redis = redis
+        self._promote_script = None
+        self.prefix = prefix
+
+    @property
+    def redis(self):
+        if self._redis is None:
+            self._redis = get_redis_client()
+        return self._redis
+
+    @property
+    def promote_script(self):
+        if self._promote_script is None:
+            self._promote_script = self.redis.register_script(PROMOTE_LUA)
+        return self._promote_script
+
+    def _key(self, kind: str, queue: str) -> str:
+        return f"{self.prefix}:{kind}:{queue}"
+
+    def _processing_key(self, queue: str, worker_id: str) -> str:
+        return f"{self.prefix}:processing:{queue}:{worker_id}"
+
+    async def push(self, job: Job):
+        await self.redis.lpush(self._key("ready", job.queue), job.model_dump_json())
+
+    async def pop(self, queue: str, worker_id: str, timeout: float) -> Optional[Job]:
+        raw = await self.redis.blmove(
+            self._key("ready", queue), self._processing_key(queue, worker_id), timeout, "RIGHT", "LEFT"
+        )
+        if raw is None:
+            return None
+        job = Job.model_validate_json(raw)
+        job._raw = raw
+        return job
+
+    async def ack(self, job: Job, worker_id: str):
+        await self.redis.lrem(self._processing_key(job.queue, worker_id), 1, job._raw)
+
+    async def retry(self, job: Job, worker_id: str, run_at: float):
+        job.enqueued_at = run_at
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.lrem(self._processing_key(job.queue, worker_id), 1, job._raw)
+            pipe.zadd(self._key("delayed", job.queue), {job.model_dump_json(): run_at})
+            await pipe.execute()
+
+    async def dead_letter(self, job: Job, worker_id: str):
+        dead_key = self._key("dead", job.queue)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.lrem(self._processing_key(job.queue, worker_id), 1, job._raw)
+            pipe.lpush(dead_key, job.model_dump_json())
+            pipe.ltrim(dead_key, 0, settings.job_dead_letter_max - 1)
+            await pipe.execute()
+
+    async def promote_due(self, queue: str) -> int:
+        return await self.promote_script(
+            keys=[self._key("delayed", queue), self._key("ready", queue)],
+            args=[time.time(), 100]
+        )
+
+    async def is_done(self, key: str) -> bool:
+        return bool(await self.redis.exists(f"{self.prefix}:done:{key}"))
+
+    async def mark_done(self, key: str):
+        await self.redis.set(f"{self.prefix}:done:{key}", 1, ex=settings.job_done_ttl_seconds)
+
+    async def acquire_lock(self, key: str, ttl: float) -> bool:
+        return bool(await self.redis.set(f"{self.prefix}:lock:{key}", 1, nx=True, px=int(ttl * 1000)))
+
+    async def release_lock(self, key: str):
+        await self.redis.delete(f"{self.prefix}:lock:{key}")
+
+    async def heartbeat(self, worker_id: str, ttl: float):
+        await self.redis.set(f"{self.prefix}:worker:{worker_id}", 1, px=int(ttl * 1000))
+
+    async def recover_orphans(self, queue: str) -> int:
+        """Requeue jobs held by workers whose heartbeat has expired"""
+        recovered = 0
+        async for key in self.redis.scan_iter(match=self._processing_key(queue, "*")):
+            worker_id = key.rsplit(":", 1)[1]
+            if await self.redis.exists(f"{self.prefix}:worker:{worker_id}"):
+                continue
+            while await self.redis.lmove(key, self._key("ready", queue), "RIGHT", "LEFT"):
+                recovered += 1
+        return recovered
+
+    async def record_latency(self, queue: str, seconds: float):
+        key = self._key("latency", queue)
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.lpush(key, round(seconds, 4))
+            pipe.ltrim(key, 0, 999)
+            await pipe.execute()
+
+    async def stats(self, queue: str) -> dict:
+        processing = 0
+        async for key in self.redis.scan_iter(match=self._processing_key(queue, "*")):
+            processing += await self.redis.llen(key)
+        latencies = [float(value) for value in await self.redis.lrange(self._key("latency", queue), 0, -1)]
+        return {
+            "ready": await self.redis.llen(self._key("ready", queue)),
+            "delayed": await self.redis.zcard(self._key("delayed", queue)),
+            "processing": processing,
+            "dead": await self.redis.llen(self._key("dead", queue)),
+            "latencies": latencies,
+        }
+
+
+class MemoryJobBackend:
+    """In-process backend with the same interface, for tests and local runs"""
+
+    def __init__(self):
+        self._ready: Dict[str, deque] = defaultdict(deque)
+        self._delayed: Dict[str, List[tuple]] = defaultdict(list)
+        self._processing: Dict[str, Dict[str, Job]] = defaultdict(dict)
+        self._dead: Dict[str, deque] = defaultdict(lambda: deque(maxlen=settings.job_dead_letter_max))
+        self._latencies: Dict[str, deque] = defaultdict(lambda: deque(maxlen=1000))
+        self._events: Dict[str, asyncio.Event] = defaultdict(asyncio.Event)
+        self._done: Dict[str, float] = {}
+        self._locks: Dict[str, float] = {}
+
+    async def push(self, job: Job):
+        self._ready[job.queue].appendleft(job.model_copy())
+        self._events[job.queue].set()
+
+    async def pop(self, queue: str, worker_id: str, timeout: float) -> Optional[Job]:
+        deadline = time.monotonic() + timeout
+        while not self._ready[queue]:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            event = self._events[queue]
+            event.clear()
+            try:
+                await asyncio.wait_for(event.wait(), remaining)
+            except asyncio.TimeoutError:
+                return None
+        job = self._ready[queue].pop()
+        self._processing[queue][job.id] = job
+        return job
+
+    async def ack(self, job: Job, worker_id: str):
+        self._processing[job.queue].pop(job.id, None)
+
+    async def retry(self, job: Job, worker_id: str, run_at: float):
+        self._processing[job.queue].pop(job.id, None)
+        job.enqueued_at = run_at
+        self._delayed[job.queue].append((run_at, job))
+
+    async def dead_letter(self, job: Job, worker_id: str):
+        self._processing[job.queue].pop(job.id, None)
+        self._dead[job.queue].appendleft(job)
+
+    async def promote_due(self, queue: str) -> int:
+        now = time.time()
+        due = [job for run_at, job in self._delayed[queue] if run_at <= now]
+        self._delayed[queue] = [(run_at, job) for run_at, job in self._delayed[queue] if run_at > now]
+        for job in due:
+            await self.push(job)
+        return len(due)
+
+    async def is_done(self, key: str) -> bool:
+        expires_at = self._done.get(key)
+        return expires_at is not None and expires_at > time.time()
+
+    async def mark_done(self, key: str):
+        self._done[key] = time.time() + settings.job_done_ttl_seconds
+
+    async def acquire_lock(self, key: str, ttl: float) -> bool:
+        now = time.time()
+        if self._locks.get(key, 0) > now:
+            return False
+        self._locks[key] = now + ttl
+        return True
+
+    async def release_lock(self, key: str):
+        self._locks.pop(key, None)
+
+    async def heartbeat(self, worker_id: str, ttl: float):
+        pass
+
+    async def recover_orphans(self, queue: str) -> int:
+        # Jobs cannot outlive the process that holds them
+        return 0
+
+    async def record_latency(self, queue: str, seconds: float):
+        self._latencies[queue].appendleft(seconds)
+
+    async def stats(self, queue: str) -> dict:
+        return {
+            "ready": len(self._ready[queue]),
+            "delayed": len(self._delayed[queue]),
+            "processing": len(self._processing[queue]),
+            "dead": len(self._dead[queue]),
+            "latencies": list(self._latencies[queue]),
+        }
+
+
+_backend = None
+
+
+def get_job_backend():
+    """Get the configured job backend"""
+    global _backend
+    if _backend is None:
+        in_process = settings.job_backend == "memory" or settings.embedded
+        _backend = MemoryJobBackend() if in_process else RedisJobBackend()
+    return _backend
@@ -0,0 +1,39 @@
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+import logging
+
+from app.database import AsyncSessionLocal
+from app.jobs.registry import job_handler
+from app.models.order import Order
+from app.services.order_archive_service import OrderArchiveService
+
+logger = logging.getLogger(__name__)
+
+
+@job_handler("send_order_confirmation", queue="email")
+async def send_order_confirmation(payload: dict):
+    """Send the order confirmation for a newly placed order"""
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(Order).options(selectinload(Order.user)).where(Order.id == payload["order_id"])
+        )
+        order = result.scalar_one_or_none()
+    if order is None:
+        return
+    # No mail provider is configured yet; this is where it plugs in
+    logger.info(f"Order confirmation for {order.order_number} to {order.user.email}")
+
+
+@job_handler("order_status_changed")
+async def order_status_changed(payload: dict):
+    """Notify downstream systems of an order status change"""
+    logger.info(f"Order {payload['order_id']} status changed to {payload['status']}")
+
+
+@job_handler("maintain_order_partitions")
+async def maintain_order_partitions(payload: dict):
+    """Create upcoming order partitions and archive months past the horizon"""
+    async with AsyncSessionLocal() as db:
+        service = OrderArchiveService(db)
+        await service.ensure_partitions(payload.get("months_ahead"))
+        await service.archive(payload.get("after_days"))
\ No newline at end of file
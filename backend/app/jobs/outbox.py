@@ -0,0 +1,81 @@
+from typing import Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, delete, func
+
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.jobs.backends import Job
+from app.jobs.registry import get_queue
+from app.models.job import OutboxJob
+
+
+def enqueue_job(
+    db: AsyncSession,
+    name: str,
+    payload: dict,
+    queue: Optional[str] = None,
+    idempotency_key: Optional[str] = None,
+    max_attempts: Optional[int] = None
+) -> OutboxJob:
+    """Stage a job in the caller's transaction
+
+    The job only becomes visible to workers if the transaction commits; the
+    outbox relay then moves it onto the queue, so request latency never
+    includes the side effect itself.
+    """
+    outbox_job = OutboxJob(
+        queue=queue or get_queue(name),
+        name=name,
+        payload=payload,
+        idempotency_key=idempotency_key,
+        max_attempts=max_attempts or settings.job_max_attempts
+    )
+    db.add(outbox_job)
+    return outbox_job
+
+
+async def relay_outbox(backend, batch_size: int = 100) -> int:
+    """Move committed outbox rows onto the job queue
+
+    Rows are deleted and pushed in one transaction; if the push fails the
+    delete rolls back. Several relays can run at once thanks to SKIP LOCKED.
+    """
+    async with AsyncSessionLocal() as db:
+        async with db.begin():
+            pending = (
+                select(OutboxJob.id)
+                .order_by(OutboxJob.id)
+                .limit(batch_size)
+                .with_for_update(skip_locked=True)
+            )
+            result = await db.execute(
+                delete(OutboxJob)
+                .where(OutboxJob.id.in_(pending))
+                .returning(
+                    OutboxJob.id,
+                    OutboxJob.queue,
+                    OutboxJob.name,
+                    OutboxJob.payload,
+                    OutboxJob.idempotency_key,
+                    OutboxJob.max_attempts,
+                    OutboxJob.created_at
+                )
+            )
+            rows = result.all()
+            for row in rows:
+                await backend.push(Job(
+                    id=f"outbox-{row.id}",
+                    queue=row.queue,
+                    name=row.name,
+                    payload=row.payload,
+                    idempotency_key=row.idempotency_key,
+                    max_attempts=row.max_attempts,
+                    enqueued_at=row.created_at.timestamp()
+                ))
+    return len(rows)
+
+
+async def count_pending(db: AsyncSession) -> int:
+    """Number of committed jobs not yet relayed"""
+    result = await db.execute(select(func.count()).select_from(OutboxJob))
+    return result.scalar()
@@ -0,0 +1,29 @@
+from typing import Awaitable, Callable, Dict, Optional
+
+JobHandler = Callable[[dict], Awaitable[None]]
+
+# job name -> (queue, handler)
+_handlers: Dict[str, tuple] = {}
+
+
+def job_handler(name: str, queue: str = "default"):
+    """Register an async handler for a job name
+
+    Jobs are delivered at least once, so handlers must be idempotent. The
+    worker additionally skips jobs whose id (or idempotency key) already
+    completed.
+    """
+    def decorator(func: JobHandler) -> JobHandler:
+        _handlers[name] = (queue, func)
+        return func
+    return decorator
+
+
+def get_handler(name: str) -> Optional[JobHandler]:
+    entry = _handlers.get(name)
+    return entry[1] if entry else None
+
+
+def get_queue(name: str) -> str:
+    entry = _handlers.get(name)
+    return entry[0] if entry else "default"
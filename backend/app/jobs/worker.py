@@ -0,0 +1,180 @@
+from typing import Dict, List, Optional
+import argparse
+import asyncio
+import logging
+import random
+import signal
+import time
+import uuid
+
+from app.config import settings
+from app.jobs.backends import Job, get_job_backend
+from app.jobs.outbox import relay_outbox
+from app.jobs.registry import get_handler, get_queue
+import app.jobs.handlers  # noqa: F401 - registers handlers
+
+logger = logging.getLogger(__name__)
+
+
+class Worker:
+    """Runs jobs from one or more queues
+
+    Each queue gets as many consumer tasks as its concurrency limit. A
+    maintenance task heartbeats, promotes due retries, requeues jobs from
+    dead workers, relays the transactional outbox and queues the periodic
+    order partition maintenance.
+    """
+
+    def __init__(
+        self,
+        backend=None,
+        queues: Optional[Dict[str, int]] = None,
+        worker_id: Optional[str] = None,
+        relay: bool = True
+    ):
+        self.backend = backend or get_job_backend()
+        self.queues = queues or dict(settings.job_queues)
+        self.worker_id = worker_id or uuid.uuid4().hex[:12]
+        self.relay = relay
+        self._stopping = asyncio.Event()
+        self._tasks: List[asyncio.Task] = []
+        self._next_partition_maintenance = 0.0
+
+    def retry_delay(self, attempts: int) -> float:
+        """Exponential backoff with jitter"""
+        delay = min(settings.job_retry_base_seconds * 2 ** (attempts - 1), settings.job_retry_max_seconds)
+        return delay * random.uniform(0.5, 1.5)
+
+    async def execute(self, job: Job):
+        """Run one job and ack, retry or dead-letter it"""
+        await self.backend.record_latency(job.queue, max(0.0, time.time() - job.enqueued_at))
+
+        handler = get_handler(job.name)
+        if handler is None:
+            job.last_error = f"No handler registered for {job.name}"
+            logger.error(job.last_error)
+            await self.backend.dead_letter(job, self.worker_id)
+            return
+
+        if await self.backend.is_done(job.dedupe_key):
+            await self.backend.ack(job, self.worker_id)
+            return
+
+        # Another worker is running a duplicate of this job; look again later
+        if not await self.backend.acquire_lock(job.dedupe_key, settings.job_timeout_seconds):
+            await self.backend.retry(job, self.worker_id, time.time() + 1)
+            return
+
+        try:
+            await asyncio.wait_for(handler(job.payload), timeout=settings.job_timeout_seconds)
+        except Exception as exc:
+            job.attempts += 1
+            job.last_error = repr(exc)
+            if job.attempts >= job.max_attempts:
+                logger.error(f"Job {job.name} ({job.id}) dead-lettered after {job.attempts} attempts: {exc!r}")
+                await self.backend.dead_letter(job, self.worker_id)
+            else:
+                logger.warning(f"Job {job.name} ({job.id}) failed, attempt {job.attempts}: {exc!r}")
+                await self.backend.retry(job, self.worker_id, time.time() + self.retry_delay(job.attempts))
+        else:
+            await self.backend.mark_done(job.dedupe_key)
+            await self.backend.ack(job, self.worker_id)
+        finally:
+            await self.backend.release_lock(job.dedupe_key)
+
+    async def _consume(self, queue: str):
+        while not self._stopping.is_set():
+            try:
+                job = await self.backend.pop(queue, self.worker_id, timeout=1)
+                if job is not None:
+                    await self.execute(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.exception(f"Worker error on queue {queue}: {exc}")
+                await asyncio.sleep(1)
+
+    async def _maintain(self):
+        interval = settings.job_poll_interval_seconds
+        while not self._stopping.is_set():
+            try:
+                await self.backend.heartbeat(self.worker_id, interval * 10)
+                for queue in self.queues:
+                    await self.backend.promote_due(queue)
+                    await self.backend.recover_orphans(queue)
+                if self.relay:
+                    # Keep relaying while batches come back full
+                    while await relay_outbox(self.backend) >= 100:
+                        pass
+                if time.time() >= self._next_partition_maintenance:
+                    await self._schedule_partition_maintenance()
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.exception(f"Worker maintenance error: {exc}")
+            await asyncio.sleep(interval)
+
+    async def _schedule_partition_maintenance(self):
+        """Queue maintain_order_partitions for the current period
+
+        Every worker queues it, under the same idempotency key, so it runs
+        once per period; partitions for the coming months exist before any
+        order needs them.
+        """
+        period = settings.order_partition_maintenance_seconds
+        slot = int(time.time() // period)
+        await self.backend.push(Job(
+            name="maintain_order_partitions",
+            queue=get_queue("maintain_order_partitions"),
+            idempotency_key=f"maintain_order_partitions:{slot}",
+            max_attempts=settings.job_max_attempts
+        ))
+        self._next_partition_maintenance = (slot + 1) * period
+
+    def start(self):
+        """Start consumer and maintenance tasks on the running loop"""
+        self._tasks.append(asyncio.create_task(self._maintain()))
+        for queue, concurrency in self.queues.items():
+            for _ in range(concurrency):
+                self._tasks.append(asyncio.create_task(self._consume(queue)))
+        logger.info(f"Worker {self.worker_id} consuming {self.queues}")
+
+    async def stop(self):
+        """Stop taking jobs and wait for running ones to finish"""
+        self._stopping.set()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+
+def parse_queues(value: str) -> Dict[str, int]:
+    """Parse "default:4,email:2" into {queue: concurrency}"""
+    queues = {}
+    for part in value.split(","):
+        name, _, concurrency = part.partition(":")
+        queues[name.strip()] = int(concurrency or 1)
+    return queues
+
+
+async def run_worker(queues: Dict[str, int]):
+    worker = Worker(queues=queues)
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    worker.start()
+    await stop.wait()
+    logger.info("Stopping worker...")
+    await worker.stop()
+
+    from app.database import close_db
+    await close_db()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a background job worker")
+    parser.add_argument("--queues", default=None, help='e.g. "default:4,email:2"')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(run_worker(parse_queues(args.queues) if args.queues else dict(settings.job_queues)))
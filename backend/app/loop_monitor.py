@@ -0,0 +1,244 @@
+from bisect import bisect_left
+from collections import Counter, deque
+from typing import Optional
+import asyncio
+import weakref
+import logging
+import sys
+import threading
+import time
+import traceback
+
+from app.config import settings
+from app.tracing import route_in_context, route_of_task
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds in milliseconds; the last bucket is +Inf
+LAG_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class LagHistogram:
+    """Cumulative histogram of scheduling delay, Prometheus style"""
+
+    def __init__(self):
+        self.counts = [0] * (len(LAG_BUCKETS_MS) + 1)
+        self.count = 0
+        self.sum_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, lag_ms: float):
+        self.counts[bisect_left(LAG_BUCKETS_MS, lag_ms)] += 1
+        self.count += 1
+        self.sum_ms += lag_ms
+        self.max_ms = max(self.max_ms, lag_ms)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-th observation"""
+        if not self.count:
+            return None
+        target = q * self.count
+        seen = 0
+        for bound, count in zip(LAG_BUCKETS_MS, self.counts):
+            seen += count
+            if seen >= target:
+                return bound
+        return self.max_ms
+
+    def to_dict(self) -> dict:
+        buckets = []
+        cumulative = 0
+        for bound, count in zip(LAG_BUCKETS_MS + ("+Inf",), self.counts):
+            cumulative += count
+            buckets.append({"le": bound, "count": cumulative})
+        return {
+            "buckets": buckets,
+            "count": self.count,
+            "sum_ms": round(self.sum_ms, 1),
+            "max_ms": round(self.max_ms, 1),
+            "p50_ms": self.quantile(0.5),
+            "p99_ms": self.quantile(0.99),
+        }
+
+
+class LoopMonitor:
+    """Event loop lag histogram and blocking-call detector
+
+    A task sleeps for loop_monitor_interval_ms and records how late it
+    wakes up. A watchdog thread notices when that task has not run for
+    loop_stall_ms, captures the loop thread's stack while it is still
+    blocked and attributes it to the request of the running task, or of
+    the task that spawned it (tracked by a task factory). In debug mode
+    every callback is timed as well (asyncio's slow-callback detection),
+    and slow ones are attributed to their task's route.
+    """
+
+    def __init__(self):
+        self.histogram = LagHistogram()
+        self.stalls: deque = deque(maxlen=settings.loop_stall_history)
+        self.slow_callbacks: deque = deque(maxlen=settings.loop_stall_history)
+        self.slow_routes: Counter = Counter()
+        self.debug = False
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[int] = None
+        self._heartbeat = 0.0
+        self._captured_for = None
+        self._pending: Optional[dict] = None
+        self._original_run = None
+        self._previous_factory = None
+        self._spawned_by: "weakref.WeakKeyDictionary[asyncio.Task, asyncio.Task]" = weakref.WeakKeyDictionary()
+
+    def start(self):
+        """Start monitoring the running loop"""
+        if not settings.loop_monitor_enabled or self._task is not None:
+            return
+        loop = self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stopping.clear()
+        self._install_task_factory(loop)
+        self._task = loop.create_task(self._measure())
+        self._thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._thread.start()
+        if settings.loop_debug:
+            self._enable_debug(loop)
+
+    async def stop(self):
+        self._stopping.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+        if self._loop is not None:
+            self._loop.set_task_factory(self._previous_factory)
+            self._loop = None
+        if self._original_run is not None:
+            asyncio.events.Handle._run = self._original_run
+            self._original_run = None
+            self.debug = False
+
+    def report(self) -> dict:
+        return {
+            "interval_ms": settings.loop_monitor_interval_ms,
+            "stall_ms": settings.loop_stall_ms,
+            "lag": self.histogram.to_dict(),
+            "stalls": list(self.stalls),
+            "debug": self.debug,
+            "slow_callbacks": list(self.slow_callbacks),
+            "slow_routes_ms": {route: round(ms, 1) for route, ms in self.slow_routes.most_common(20)},
+        }
+
+    def reset(self):
+        self.histogram = LagHistogram()
+        self.stalls.clear()
+        self.slow_callbacks.clear()
+        self.slow_routes = Counter()
+
+    async def _measure(self):
+        interval = settings.loop_monitor_interval_ms / 1000
+        while True:
+            start = time.monotonic()
+            await asyncio.sleep(interval)
+            now = time.monotonic()
+            lag_ms = max(0.0, (now - start - interval) * 1000)
+            self._heartbeat = now
+            self.histogram.observe(lag_ms)
+            if self._pending is not None:
+                # The stall the watchdog caught is over; record how long it was
+                self._pending["lag_ms"] = round(lag_ms, 1)
+                self._pending = None
+
+    def _watch(self):
+        interval = settings.loop_monitor_interval_ms / 1000
+        threshold = settings.loop_stall_ms / 1000
+        while not self._stopping.wait(min(threshold / 4, 0.05)):
+            heartbeat = self._heartbeat
+            blocked = time.monotonic() - heartbeat - interval
+            if blocked < threshold or self._captured_for == heartbeat:
+                continue
+            self._captured_for = heartbeat
+            frame = sys._current_frames().get(self._loop_thread)
+            if frame is None:
+                continue
+            stack = traceback.format_stack(frame)
+            stall = {
+                "at": time.time(),
+                "blocked_ms": round(blocked * 1000, 1),
+                "lag_ms": None,
+                "route": self._running_route(),
+                "stack": [line.rstrip() for line in stack[-settings.loop_stall_stack_depth:]],
+            }
+            del frame
+            self.stalls.append(stall)
+            self._pending = stall
+            logger.warning(
+                f"Event loop blocked for {stall['blocked_ms']:.0f}ms on {stall['route'] or 'no request'}:\n"
+                + "".join(stack[-10:])
+            )
+
+    def _install_task_factory(self, loop):
+        previous = self._previous_factory = loop.get_task_factory()
+        spawned_by = self._spawned_by
+
+        def factory(loop, coro, **kwargs):
+            task = previous(loop, coro, **kwargs) if previous else asyncio.Task(coro, loop=loop, **kwargs)
+            parent = asyncio.current_task(loop)
+            if parent is not None:
+                spawned_by[task] = parent
+            return task
+
+        loop.set_task_factory(factory)
+
+    def _running_route(self) -> Optional[str]:
+        # Called on the watchdog thread; only reads loop-side dicts
+        task = asyncio.current_task(self._loop)
+        while task is not None:
+            route = route_of_task(task)
+            if route is not None:
+                return route
+            task = self._spawned_by.get(task)
+        return None
+
+    def _enable_debug(self, loop):
+        """Time every callback and attribute slow ones to their task's route
+
+        Has no effect on loops that bring their own handles (uvloop).
+        """
+        loop.set_debug(True)
+        loop.slow_callback_duration = settings.loop_stall_ms / 1000
+        original = self._original_run = asyncio.events.Handle._run
+        monitor = self
+
+        def _run(handle):
+            start = time.perf_counter()
+            try:
+                return original(handle)
+            finally:
+                elapsed_ms = (time.perf_counter() - start) * 1000
+                if elapsed_ms >= settings.loop_stall_ms:
+                    monitor._slow_callback(handle, elapsed_ms)
+
+        asyncio.events.Handle._run = _run
+        self.debug = True
+
+    def _slow_callback(self, handle, elapsed_ms: float):
+        route = route_in_context(getattr(handle, "_context", None))
+        self.slow_callbacks.append({
+            "at": time.time(),
+            "duration_ms": round(elapsed_ms, 1),
+            "route": route,
+            "callback": repr(handle)[:300],
+        })
+        self.slow_routes[route or "(no request)"] += elapsed_ms
+
+
+loop_monitor = LoopMonitor()
\ No newline at end of file
@@ -3,19 +3,37 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
 import logging
+import os
 
 from app.config import settings
-from app.database import init_db, close_db
+from app.database import IS_SQLITE, init_db, close_db, verify_schema_version
+from app.services.image_service import shutdown_image_pool
+from app.auth.revocation import revocation_list
+from app.cache import catalog_cache
+from app.storefront import storefront_home
+from app.order_partitions import order_partitions
+from app.jobs.worker import Worker
+from app.static_files import CachedStaticFiles
+from app.idempotency import IdempotencyMiddleware
+from app.tracing import TracingMiddleware, install_log_correlation, tracer
+from app.profiling import ProfilingMiddleware, profiler
+from app.loop_monitor import loop_monitor
 from app.routers import (
     auth_router,
     products_router,
     orders_router,
     cart_router,
-    admin_router
+    admin_router,
+    batch_router,
+    storefront_router
 )
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Configure logging; records carry the current trace and span ids
+install_log_correlation()
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s %(levelname)s %(name)s [trace=%(trace_id)s span=%(span_id)s] %(message)s"
+)
 logger = logging.getLogger(__name__)
 
 @asynccontextmanager
@@ -23,14 +41,46 @@ async def lifespan(app: FastAPI):
     """Application lifespan events"""
     # Startup
     logger.info("Starting up Nike Store API...")
-    await init_db()
-    logger.info("Database initialized")
+    # The migrations are Postgres-specific; SQLite is created from the models
+    if settings.db_startup_mode == "create_all" or IS_SQLITE:
+        await init_db()
+        logger.info("Database initialized")
+    else:
+        # Schema changes are applied by `alembic upgrade head` at deploy time;
+        # workers only check the revision, so scale-out runs no DDL
+        await verify_schema_version()
+        logger.info("Database schema is at migration head")
+    revocation_list.start()
+    catalog_cache.start()
+    if settings.storefront_warm_on_startup:
+        await storefront_home.warm()
+    storefront_home.start()
+    order_partitions.start()
+    tracer.start()
+    profiler.start()
+    loop_monitor.start()
+    
+    # With the in-process job backend there are no separate worker processes
+    job_worker = None
+    if settings.job_backend == "memory" or settings.embedded:
+        job_worker = Worker()
+        job_worker.start()
     
     yield
     
     # Shutdown
     logger.info("Shutting down Nike Store API...")
+    if job_worker:
+        await job_worker.stop()
+    await revocation_list.stop()
+    await catalog_cache.stop()
+    await storefront_home.stop()
+    await order_partitions.stop()
+    await loop_monitor.stop()
+    await tracer.stop()
+    profiler.stop()
     await close_db()
+    shutdown_image_pool()
     logger.info("Database connections closed")
 
 # Create FastAPI application
@@ -43,6 +93,10 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Replay stored responses for retried order and cart POSTs
+# (added before CORS so that replays still carry CORS headers)
+app.add_middleware(IdempotencyMiddleware, paths=settings.idempotent_paths)
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -50,8 +104,15 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Trace-Id"],
 )
 
+# On-demand and continuous CPU profiles of requests
+app.add_middleware(ProfilingMiddleware)
+
+# Outermost, so the request span covers every other middleware
+app.add_middleware(TracingMiddleware)
+
 # Global exception handler
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
@@ -75,8 +136,7 @@ async def health_check():
         "version": "1.0.0"
     }
 
-# Root endpoint
-@app.get("/")
+# Root endpoint, when there is no built frontend to serve at /
 async def root():
     """Root endpoint"""
     return {
@@ -92,6 +152,19 @@ app.include_router(products_router, prefix="/api/v1")
 app.include_router(cart_router, prefix="/api/v1")
 app.include_router(orders_router, prefix="/api/v1")
 app.include_router(admin_router, prefix="/api/v1")
+app.include_router(batch_router, prefix="/api/v1")
+app.include_router(storefront_router, prefix="/api/v1")
+
+# Static files: uploaded product images and the built frontend (SPA)
+app.mount(settings.upload_url_prefix, CachedStaticFiles(settings.upload_dir), name="uploads")
+if os.path.isdir(settings.frontend_dir):
+    app.mount(
+        "/",
+        CachedStaticFiles(settings.frontend_dir, spa_fallback="index.html", spa_exclude=("/api",)),
+        name="frontend"
+    )
+else:
+    app.add_api_route("/", root, methods=["GET"])
 
 if __name__ == "__main__":
     import uvicorn
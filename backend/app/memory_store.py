@@ -0,0 +1,428 @@
+from collections import defaultdict, deque
+from fnmatch import fnmatchcase
+from itertools import islice
+from typing import Any, Callable, Dict, List, Optional
+import asyncio
+import time
+
+# Python equivalents of the Lua scripts the app registers, keyed by source
+SCRIPTS: Dict[str, Callable] = {}
+
+
+def memory_script(source: str):
+    """Register the in-process implementation of a Lua script
+
+    The function gets the MemoryStore, KEYS and ARGV; it runs without
+    yielding to the event loop, so it is as atomic as the script.
+    """
+    def register(func):
+        SCRIPTS[source] = func
+        return func
+    return register
+
+
+def _encode(value: Any) -> str:
+    # Redis stores bytes and the client decodes them (decode_responses=True)
+    if isinstance(value, bytes):
+        return value.decode()
+    return str(value)
+
+
+class MemoryStore:
+    """Single-process keyspace with the Redis commands the app uses
+
+    Strings, hashes, sets, lists and sorted sets live in one dict; expiry
+    deadlines in another, enforced on access and by a periodic sweep.
+    Commands are synchronous; MemoryRedis exposes them as coroutines.
+    """
+
+    def __init__(self):
+        self._data: Dict[str, Any] = {}
+        self._expires: Dict[str, float] = {}
+        self._next_sweep = 0.0
+        self._list_events: Dict[str, asyncio.Event] = {}
+        self._subscribers: Dict[str, set] = defaultdict(set)
+
+    # Keyspace
+
+    def _live(self, key: str) -> Optional[Any]:
+        deadline = self._expires.get(key)
+        if deadline is not None and deadline <= time.monotonic():
+            self._data.pop(key, None)
+            del self._expires[key]
+        return self._data.get(key)
+
+    def _typed(self, key: str, kind: type, create: bool = False):
+        value = self._live(key)
+        if value is None:
+            if not create:
+                return None
+            value = self._data[key] = kind()
+            self._sweep()
+        elif not isinstance(value, kind):
+            raise TypeError(f"WRONGTYPE Operation against a key holding the wrong kind of value: {key}")
+        return value
+
+    def _sweep(self):
+        now = time.monotonic()
+        if now < self._next_sweep:
+            return
+        self._next_sweep = now + 1.0
+        for key in [key for key, deadline in self._expires.items() if deadline <= now]:
+            self._data.pop(key, None)
+            del self._expires[key]
+
+    def _drop_if_empty(self, key: str, value):
+        if not value:
+            self._data.pop(key, None)
+            self._expires.pop(key, None)
+
+    def delete(self, *keys: str) -> int:
+        deleted = 0
+        for key in keys:
+            if self._live(key) is not None:
+                deleted += 1
+            self._data.pop(key, None)
+            self._expires.pop(key, None)
+        return deleted
+
+    def exists(self, *keys: str) -> int:
+        return sum(1 for key in keys if self._live(key) is not None)
+
+    def pexpire(self, key: str, milliseconds) -> bool:
+        if self._live(key) is None:
+            return False
+        self._expires[key] = time.monotonic() + int(milliseconds) / 1000
+        return True
+
+    def expire(self, key: str, seconds) -> bool:
+        return self.pexpire(key, int(seconds) * 1000)
+
+    def pttl(self, key: str) -> int:
+        if self._live(key) is None:
+            return -2
+        deadline = self._expires.get(key)
+        return -1 if deadline is None else int((deadline - time.monotonic()) * 1000)
+
+    def keys(self, pattern: str = "*") -> List[str]:
+        return [key for key in list(self._data) if fnmatchcase(key, pattern) and self._live(key) is not None]
+
+    # Strings
+
+    def get(self, key: str) -> Optional[str]:
+        return self._typed(key, str)
+
+    def mget(self, keys, *args) -> List[Optional[str]]:
+        names = [keys] if isinstance(keys, str) else list(keys)
+        return [self.get(key) for key in names + list(args)]
+
+    def set(self, key: str, value, ex=None, px=None, nx: bool = False, xx: bool = False, keepttl: bool = False):
+        exists = self._live(key) is not None
+        if (nx and exists) or (xx and not exists):
+            return None
+        deadline = self._expires.get(key) if keepttl else None
+        self._data[key] = _encode(value)
+        self._expires.pop(key, None)
+        if ex is not None:
+            deadline = time.monotonic() + int(ex)
+        elif px is not None:
+            deadline = time.monotonic() + int(px) / 1000
+        if deadline is not None:
+            self._expires[key] = deadline
+        self._sweep()
+        return True
+
+    def incrby(self, key: str, amount: int = 1) -> int:
+        value = int(self.get(key) or 0) + amount
+        self._data[key] = str(value)
+        return value
+
+    def incr(self, key: str, amount: int = 1) -> int:
+        return self.incrby(key, amount)
+
+    # Hashes
+
+    def hset(self, key: str, field=None, value=None, mapping: Optional[dict] = None, items: Optional[list] = None) -> int:
+        pairs = []
+        if field is not None:
+            pairs.append((field, value))
+        if mapping:
+            pairs.extend(mapping.items())
+        if items:
+            pairs.extend(zip(items[::2], items[1::2]))
+        hash_ = self._typed(key, dict, create=True)
+        added = 0
+        for name, item in pairs:
+            name = _encode(name)
+            added += name not in hash_
+            hash_[name] = _encode(item)
+        return added
+
+    def hmget(self, key: str, keys, *args) -> List[Optional[str]]:
+        names = [keys] if isinstance(keys, str) else list(keys)
+        hash_ = self._typed(key, dict) or {}
+        return [hash_.get(_encode(name)) for name in names + list(args)]
+
+    def hgetall(self, key: str) -> dict:
+        return dict(self._typed(key, dict) or {})
+
+    # Sets
+
+    def sadd(self, key: str, *values) -> int:
+        members = self._typed(key, set, create=True)
+        before = len(members)
+        members.update(_encode(value) for value in values)
+        return len(members) - before
+
+    def srem(self, key: str, *values) -> int:
+        members = self._typed(key, set)
+        if members is None:
+            return 0
+        before = len(members)
+        members.difference_update(_encode(value) for value in values)
+        removed = before - len(members)
+        self._drop_if_empty(key, members)
+        return removed
+
+    def smembers(self, key: str) -> set:
+        return set(self._typed(key, set) or ())
+
+    # Lists
+
+    def _pushed(self, key: str):
+        event = self._list_events.get(key)
+        if event is not None:
+            event.set()
+
+    def lpush(self, key: str, *values) -> int:
+        items = self._typed(key, deque, create=True)
+        items.extendleft(_encode(value) for value in values)
+        self._pushed(key)
+        return len(items)
+
+    def rpush(self, key: str, *values) -> int:
+        items = self._typed(key, deque, create=True)
+        items.extend(_encode(value) for value in values)
+        self._pushed(key)
+        return len(items)
+
+    def llen(self, key: str) -> int:
+        return len(self._typed(key, deque) or ())
+
+    def _slice(self, length: int, start: int, end: int) -> range:
+        start = max(start + length if start < 0 else start, 0)
+        end = min(end + length if end < 0 else end, length - 1)
+        return range(start, end + 1)
+
+    def lrange(self, key: str, start: int, end: int) -> List[str]:
+        items = self._typed(key, deque) or deque()
+        span = self._slice(len(items), start, end)
+        return list(islice(items, span.start, span.stop)) if span else []
+
+    def ltrim(self, key: str, start: int, end: int) -> bool:
+        items = self._typed(key, deque)
+        if items is None:
+            return True
+        kept = deque(self.lrange(key, start, end))
+        self._data[key] = kept
+        self._drop_if_empty(key, kept)
+        return True
+
+    def lrem(self, key: str, count: int, value) -> int:
+        items = self._typed(key, deque)
+        if items is None:
+            return 0
+        value = _encode(value)
+        limit = abs(count) or len(items)
+        ordered = list(reversed(items)) if count < 0 else list(items)
+        kept, removed = [], 0
+        for item in ordered:
+            if item == value and removed < limit:
+                removed += 1
+            else:
+                kept.append(item)
+        self._data[key] = deque(reversed(kept) if count < 0 else kept)
+        self._drop_if_empty(key, self._data.get(key))
+        return removed
+
+    def lmove(self, first_list: str, second_list: str, src: str = "LEFT", dest: str = "RIGHT") -> Optional[str]:
+        source = self._typed(first_list, deque)
+        if not source:
+            return None
+        value = source.popleft() if src.upper() == "LEFT" else source.pop()
+        self._drop_if_empty(first_list, source)
+        target = self._typed(second_list, deque, create=True)
+        if dest.upper() == "LEFT":
+            target.appendleft(value)
+        else:
+            target.append(value)
+        self._pushed(second_list)
+        return value
+
+    # Sorted sets
+
+    def zadd(self, key: str, mapping: dict) -> int:
+        scores = self._typed(key, dict, create=True)
+        added = 0
+        for member, score in mapping.items():
+            member = _encode(member)
+            added += member not in scores
+            scores[member] = float(score)
+        return added
+
+    def zrangebyscore(self, key: str, min, max, start: Optional[int] = None, num: Optional[int] = None) -> List[str]:
+        low = float("-inf") if min in ("-inf", b"-inf") else float(min)
+        high = float("inf") if max in ("+inf", b"+inf") else float(max)
+        scores = self._typed(key, dict) or {}
+        members = [member for member, score in sorted(scores.items(), key=lambda item: (item[1], item[0]))
+                   if low <= score <= high]
+        if start is not None and num is not None:
+            members = members[int(start):int(start) + int(num)]
+        return members
+
+    def zrem(self, key: str, *members) -> int:
+        scores = self._typed(key, dict)
+        if scores is None:
+            return 0
+        removed = sum(1 for member in members if scores.pop(_encode(member), None) is not None)
+        self._drop_if_empty(key, scores)
+        return removed
+
+    def zcard(self, key: str) -> int:
+        return len(self._typed(key, dict) or ())
+
+    # Pub/sub
+
+    def publish(self, channel: str, message) -> int:
+        queues = self._subscribers.get(channel, ())
+        for queue in queues:
+            queue.put_nowait({"type": "message", "channel": channel, "pattern": None, "data": _encode(message)})
+        return len(queues)
+
+    def time(self) -> tuple:
+        now = time.time()
+        return int(now), int(now % 1 * 1_000_000)
+
+
+class MemoryScript:
+    """Registered script; calls its Python equivalent against the store"""
+
+    def __init__(self, store: MemoryStore, func: Callable):
+        self.store = store
+        self.func = func
+
+    async def __call__(self, keys=None, args=None, client=None):
+        return self.func(self.store, list(keys or []), list(args or []))
+
+
+class MemoryPipeline:
+    """Queued commands executed back to back, which makes them atomic here"""
+
+    def __init__(self, store: MemoryStore):
+        self.store = store
+        self.command_stack: List[tuple] = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.command_stack = []
+
+    def __getattr__(self, name: str):
+        command = getattr(self.store, name)
+
+        def queue(*args, **kwargs):
+            self.command_stack.append((command, args, kwargs))
+            return self
+        return queue
+
+    async def execute(self, raise_on_error: bool = True) -> list:
+        stack, self.command_stack = self.command_stack, []
+        return [command(*args, **kwargs) for command, args, kwargs in stack]
+
+
+class MemoryPubSub:
+    def __init__(self, store: MemoryStore):
+        self.store = store
+        self.channels: set = set()
+        self._messages: asyncio.Queue = asyncio.Queue()
+
+    async def subscribe(self, *channels: str):
+        for channel in channels:
+            self.channels.add(channel)
+            self.store._subscribers[channel].add(self._messages)
+            self._messages.put_nowait({"type": "subscribe", "channel": channel, "pattern": None, "data": len(self.channels)})
+
+    async def unsubscribe(self, *channels: str):
+        for channel in channels or tuple(self.channels):
+            self.channels.discard(channel)
+            self.store._subscribers[channel].discard(self._messages)
+
+    async def listen(self):
+        while self.channels:
+            yield await self._messages.get()
+
+    async def close(self):
+        await self.unsubscribe()
+
+    aclose = close
+
+
+class MemoryRedis:
+    """In-process stand-in for the redis.asyncio client (redis_url="memory://")
+
+    Every command of MemoryStore is available as a coroutine method, plus
+    blocking list moves, SCAN, pipelines, pub/sub and scripts with
+    registered Python equivalents. State is per process, so this only
+    suits a single-process (embedded) deployment.
+    """
+
+    def __init__(self, store: Optional[MemoryStore] = None):
+        self.store = store or MemoryStore()
+
+    def __getattr__(self, name: str):
+        command = getattr(self.store, name)
+
+        async def call(*args, **kwargs):
+            return command(*args, **kwargs)
+        call.__name__ = name
+        return call
+
+    async def blmove(self, first_list: str, second_list: str, timeout: float, src: str = "LEFT", dest: str = "RIGHT"):
+        deadline = time.monotonic() + timeout if timeout else None
+        while True:
+            value = self.store.lmove(first_list, second_list, src, dest)
+            if value is not None:
+                return value
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return None
+            event = self.store._list_events.setdefault(first_list, asyncio.Event())
+            event.clear()
+            try:
+                await asyncio.wait_for(event.wait(), remaining)
+            except asyncio.TimeoutError:
+                return None
+
+    async def scan_iter(self, match: Optional[str] = None, count: Optional[int] = None, _type: Optional[str] = None):
+        for key in self.store.keys(match or "*"):
+            yield key
+
+    def pipeline(self, transaction: bool = True, shard_hint=None) -> MemoryPipeline:
+        return MemoryPipeline(self.store)
+
+    def pubsub(self, **kwargs) -> MemoryPubSub:
+        return MemoryPubSub(self.store)
+
+    def register_script(self, source: str) -> MemoryScript:
+        if source not in SCRIPTS:
+            raise NotImplementedError("Script has no in-process implementation; register one with @memory_script")
+        return MemoryScript(self.store, SCRIPTS[source])
+
+    async def ping(self) -> bool:
+        return True
+
+    async def close(self):
+        pass
+
+    aclose = close
\ No newline at end of file
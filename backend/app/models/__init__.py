@@ -1,15 +1,21 @@
 # Models package
 from .user import User
-from .product import Product, Category, ProductImage
-from .order import Order, OrderItem, Cart, CartItem
+from .product import Product, Category, ProductImage, ProductVariant, ProductDocument
+from .order import Order, OrderItem, OrderArchive, OrderNumber, Cart, CartItem
+from .job import OutboxJob
 
 __all__ = [
     "User",
     "Product", 
     "Category",
     "ProductImage",
+    "ProductVariant",
+    "ProductDocument",
     "Order",
     "OrderItem", 
+    "OrderArchive",
+    "OrderNumber",
     "Cart",
-    "CartItem"
+    "CartItem",
+    "OutboxJob"
 ]
\ No newline at end of file
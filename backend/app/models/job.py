@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, String, JSON
+from sqlalchemy.sql import func
+from app.database import Base, TZDateTime
+
+class OutboxJob(Base):
+    """Job staged in the same transaction as the write that caused it"""
+    __tablename__ = "job_outbox"
+    
+    id = Column(Integer, primary_key=True)
+    queue = Column(String(50), nullable=False)
+    name = Column(String(100), nullable=False)
+    payload = Column(JSON, nullable=False)
+    idempotency_key = Column(String(255), nullable=True)
+    max_attempts = Column(Integer, nullable=False)
+    created_at = Column(TZDateTime, server_default=func.now())
+    
+    def __repr__(self):
+        return f"<OutboxJob(id={self.id}, queue='{self.queue}', name='{self.name}')>"
@@ -1,7 +1,7 @@
-from sqlalchemy import Column, Integer, String, Text, Numeric, Boolean, DateTime, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, Text, Numeric, Boolean, ForeignKey, ForeignKeyConstraint, Enum, Index, LargeBinary
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
-from app.database import Base
+from app.database import Base, TZDateTime
 import enum
 
 class OrderStatus(str, enum.Enum):
@@ -20,7 +20,20 @@ class PaymentStatus(str, enum.Enum):
     REFUNDED = "refunded"
 
 class Order(Base):
+    # Range partitioned by month on created_at (migration 0008); the
+    # database key is (id, created_at), ids stay unique through the sequence
     __tablename__ = "orders"
+    __table_args__ = (
+        # Order history per user and admin listing (migration 0002)
+        Index("ix_orders_user_id_created_at", "user_id", "created_at"),
+        Index("ix_orders_status_created_at", "status", "created_at"),
+        Index("ix_orders_created_at", "created_at"),
+        # Admin listing by payment status (migration 0007)
+        Index("ix_orders_payment_status_created_at", "payment_status", "created_at"),
+        # Target of the order_items foreign key; on Postgres the partitioned
+        # primary key (id, created_at) already is one
+        Index("uq_orders_id_created_at", "id", "created_at", unique=True).ddl_if(dialect="sqlite"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -54,10 +67,10 @@ class Order(Base):
     notes = Column(Text, nullable=True)
     
     # Timestamps
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
-    shipped_at = Column(DateTime(timezone=True), nullable=True)
-    delivered_at = Column(DateTime(timezone=True), nullable=True)
+    created_at = Column(TZDateTime, server_default=func.now(), nullable=False)
+    updated_at = Column(TZDateTime, onupdate=func.now())
+    shipped_at = Column(TZDateTime, nullable=True)
+    delivered_at = Column(TZDateTime, nullable=True)
     
     # Relationships
     user = relationship("User", back_populates="orders")
@@ -67,11 +80,16 @@ class Order(Base):
         return f"<Order(id={self.id}, order_number='{self.order_number}', total={self.total_amount})>"
 
 class OrderItem(Base):
+    # Partitioned alongside orders on the parent order's created_at
     __tablename__ = "order_items"
+    __table_args__ = (
+        ForeignKeyConstraint(["order_id", "order_created_at"], ["orders.id", "orders.created_at"]),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
-    order_id = Column(Integer, ForeignKey("orders.id"), nullable=False)
-    product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
+    order_id = Column(Integer, nullable=False, index=True)
+    order_created_at = Column(TZDateTime, nullable=False)
+    product_id = Column(Integer, ForeignKey("products.id"), nullable=False, index=True)
     quantity = Column(Integer, nullable=False)
     size = Column(String(10), nullable=False)
     color = Column(String(50), nullable=False)
@@ -85,13 +103,41 @@ class OrderItem(Base):
     def __repr__(self):
         return f"<OrderItem(id={self.id}, product_id={self.product_id}, quantity={self.quantity})>"
 
+class OrderArchive(Base):
+    """Order moved out of the live partitions, kept as a compressed document"""
+    __tablename__ = "order_archive"
+    
+    order_number = Column(String(50), primary_key=True)
+    order_id = Column(Integer, nullable=False, index=True)
+    user_id = Column(Integer, nullable=False, index=True)
+    created_at = Column(TZDateTime, nullable=False)
+    # zlib-compressed OrderResponse JSON
+    document = Column(LargeBinary, nullable=False)
+    archived_at = Column(TZDateTime, server_default=func.now())
+    
+    def __repr__(self):
+        return f"<OrderArchive(order_number='{self.order_number}', created_at={self.created_at})>"
+
+class OrderNumber(Base):
+    """Every order number ever issued, live or archived
+    
+    The partitioned orders table can only enforce uniqueness together with
+    created_at, so order numbers are claimed here first.
+    """
+    __tablename__ = "order_numbers"
+    
+    order_number = Column(String(50), primary_key=True)
+    
+    def __repr__(self):
+        return f"<OrderNumber(order_number='{self.order_number}')>"
+
 class Cart(Base):
     __tablename__ = "carts"
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False, unique=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    created_at = Column(TZDateTime, server_default=func.now())
+    updated_at = Column(TZDateTime, onupdate=func.now())
     
     # Relationships
     user = relationship("User", back_populates="cart")
@@ -112,6 +158,10 @@ class Cart(Base):
 
 class CartItem(Base):
     __tablename__ = "cart_items"
+    __table_args__ = (
+        # One line per variant; the conflict target for cart upserts (migration 0006)
+        Index("ix_cart_items_cart_product_variant", "cart_id", "product_id", "size", "color", unique=True),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     cart_id = Column(Integer, ForeignKey("carts.id"), nullable=False)
@@ -119,7 +169,7 @@ class CartItem(Base):
     quantity = Column(Integer, nullable=False, default=1)
     size = Column(String(10), nullable=False)
     color = Column(String(50), nullable=False)
-    added_at = Column(DateTime(timezone=True), server_default=func.now())
+    added_at = Column(TZDateTime, server_default=func.now())
     
     # Relationships
     cart = relationship("Cart", back_populates="items")
@@ -1,23 +1,7 @@
-from sqlalchemy import Column, Integer, String, Text, Numeric, Boolean, DateTime, ForeignKey, Table
+from sqlalchemy import Column, Integer, String, Text, Numeric, Boolean, ForeignKey, JSON, Index, text
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
-from app.database import Base
-
-# Association table for product sizes
-product_sizes = Table(
-    'product_sizes',
-    Base.metadata,
-    Column('product_id', Integer, ForeignKey('products.id'), primary_key=True),
-    Column('size', String(10), primary_key=True)
-)
-
-# Association table for product colors
-product_colors = Table(
-    'product_colors', 
-    Base.metadata,
-    Column('product_id', Integer, ForeignKey('products.id'), primary_key=True),
-    Column('color', String(50), primary_key=True)
-)
+from app.database import Base, TZDateTime
 
 class Category(Base):
     __tablename__ = "categories"
@@ -27,7 +11,7 @@ class Category(Base):
     description = Column(Text, nullable=True)
     slug = Column(String(100), unique=True, nullable=False)
     is_active = Column(Boolean, default=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(TZDateTime, server_default=func.now())
     
     # Relationships
     products = relationship("Product", back_populates="category")
@@ -37,6 +21,13 @@ class Category(Base):
 
 class Product(Base):
     __tablename__ = "products"
+    __table_args__ = (
+        # Partial indexes backing catalog listings (migration 0002)
+        Index("ix_products_active_created_at", "created_at", postgresql_where=text("is_active = true"), sqlite_where=text("is_active = 1")),
+        Index("ix_products_active_category_created_at", "category_id", "created_at", postgresql_where=text("is_active = true"), sqlite_where=text("is_active = 1")),
+        Index("ix_products_active_featured_created_at", "created_at", postgresql_where=text("is_active = true AND is_featured = true"), sqlite_where=text("is_active = 1 AND is_featured = 1")),
+        Index("ix_products_active_price", "price", postgresql_where=text("is_active = true"), sqlite_where=text("is_active = 1")),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(255), nullable=False, index=True)
@@ -44,24 +35,36 @@ class Product(Base):
     price = Column(Numeric(10, 2), nullable=False)
     original_price = Column(Numeric(10, 2), nullable=True)
     sku = Column(String(100), unique=True, nullable=False)
-    category_id = Column(Integer, ForeignKey("categories.id"), nullable=False)
+    category_id = Column(Integer, ForeignKey("categories.id"), nullable=False, index=True)
     brand = Column(String(100), default="Nike")
     is_featured = Column(Boolean, default=False)
     is_active = Column(Boolean, default=True)
     stock_quantity = Column(Integer, default=0)
     weight = Column(Numeric(5, 2), nullable=True)  # in kg
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    created_at = Column(TZDateTime, server_default=func.now())
+    updated_at = Column(TZDateTime, onupdate=func.now())
     
     # Relationships
     category = relationship("Category", back_populates="products")
     images = relationship("ProductImage", back_populates="product", cascade="all, delete-orphan")
     order_items = relationship("OrderItem", back_populates="product")
     cart_items = relationship("CartItem", back_populates="product")
+    variants = relationship(
+        "ProductVariant",
+        back_populates="product",
+        cascade="all, delete-orphan",
+        order_by="ProductVariant.id"
+    )
     
-    # Many-to-many relationships for sizes and colors
-    sizes = relationship("product_sizes", secondary=product_sizes)
-    colors = relationship("product_colors", secondary=product_colors)
+    @property
+    def sizes(self):
+        """Distinct sizes across variants, in variant order"""
+        return list(dict.fromkeys(variant.size for variant in self.variants))
+    
+    @property
+    def colors(self):
+        """Distinct colors across variants, in variant order"""
+        return list(dict.fromkeys(variant.color for variant in self.variants))
     
     @property
     def main_image(self):
@@ -88,15 +91,57 @@ class ProductImage(Base):
     __tablename__ = "product_images"
     
     id = Column(Integer, primary_key=True, index=True)
-    product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
+    product_id = Column(Integer, ForeignKey("products.id"), nullable=False, index=True)
     image_url = Column(String(500), nullable=False)
     alt_text = Column(String(255), nullable=True)
     is_main = Column(Boolean, default=False)
     sort_order = Column(Integer, default=0)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    # Uploaded images are stored content-addressed; variants maps
+    # variant name -> {format: url}
+    content_hash = Column(String(64), nullable=True, index=True)
+    variants = Column(JSON, nullable=True)
+    created_at = Column(TZDateTime, server_default=func.now())
     
     # Relationships
     product = relationship("Product", back_populates="images")
     
     def __repr__(self):
-        return f"<ProductImage(id={self.id}, product_id={self.product_id}, is_main={self.is_main})>"
\ No newline at end of file
+        return f"<ProductImage(id={self.id}, product_id={self.product_id}, is_main={self.is_main})>"
+
+class ProductVariant(Base):
+    """A purchasable size/color combination with its own stock"""
+    __tablename__ = "product_variants"
+    __table_args__ = (
+        # One row per combination; also the cart reservation lookup
+        Index("ix_product_variants_product_size_color", "product_id", "size", "color", unique=True),
+        # Listing filters by size and/or color
+        Index("ix_product_variants_size_color_product", "size", "color", "product_id"),
+        Index("ix_product_variants_color_product", "color", "product_id"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), nullable=False)
+    size = Column(String(10), nullable=False)
+    color = Column(String(50), nullable=False)
+    sku = Column(String(100), unique=True, nullable=False)
+    stock_quantity = Column(Integer, nullable=False, default=0)
+    created_at = Column(TZDateTime, server_default=func.now())
+    updated_at = Column(TZDateTime, onupdate=func.now())
+    
+    # Relationships
+    product = relationship("Product", back_populates="variants")
+    
+    def __repr__(self):
+        return f"<ProductVariant(id={self.id}, product_id={self.product_id}, size='{self.size}', color='{self.color}')>"
+
+class ProductDocument(Base):
+    """Precomputed product detail JSON, served as-is by GET /products/{id}"""
+    __tablename__ = "product_documents"
+    
+    product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), primary_key=True)
+    document = Column(Text, nullable=False)
+    updated_at = Column(TZDateTime, server_default=func.now(), onupdate=func.now())
+    
+    def __repr__(self):
+        return f"<ProductDocument(product_id={self.product_id})>"
\ No newline at end of file
@@ -1,7 +1,7 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text
+from sqlalchemy import Column, Integer, String, Boolean, Text
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
-from app.database import Base
+from app.database import Base, TZDateTime
 
 class User(Base):
     __tablename__ = "users"
@@ -20,8 +20,8 @@ class User(Base):
     state = Column(String(100), nullable=True)
     zip_code = Column(String(20), nullable=True)
     country = Column(String(100), default="United States")
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    created_at = Column(TZDateTime, server_default=func.now())
+    updated_at = Column(TZDateTime, onupdate=func.now())
     
     # Relationships
     orders = relationship("Order", back_populates="user")
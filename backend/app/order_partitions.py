@@ -0,0 +1,51 @@
+from typing import Optional
+import asyncio
+import logging
+
+from app.config import settings
+from app.database import IS_SQLITE, AsyncSessionLocal
+from app.services.order_archive_service import OrderArchiveService
+
+logger = logging.getLogger(__name__)
+
+
+class OrderPartitionMaintainer:
+    """Keeps monthly order partitions created ahead of time
+
+    Runs in every API process, so it does not depend on a job worker being
+    deployed; ensure_partitions lets one instance at a time do the work.
+    Archival stays a worker job, being slow and not urgent.
+    """
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self):
+        while True:
+            try:
+                async with AsyncSessionLocal() as db:
+                    await OrderArchiveService(db).ensure_partitions()
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.exception(f"Order partition maintenance failed: {exc}")
+            await asyncio.sleep(settings.order_partition_maintenance_seconds)
+
+    def start(self):
+        """Create missing partitions now and then once per period"""
+        # SQLite (embedded mode) has no partitions
+        if self._task is None and not IS_SQLITE:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the maintenance loop"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+order_partitions = OrderPartitionMaintainer()
\ No newline at end of file
@@ -0,0 +1,327 @@
+from collections import Counter
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs
+import html
+import json
+import logging
+import os
+import signal
+import sys
+import threading
+
+from fastapi import HTTPException, Request
+from fastapi.security import HTTPAuthorizationCredentials
+
+from app.config import settings
+from app.tracing import route_path
+
+logger = logging.getLogger(__name__)
+
+FORMATS = {"html": "text/html; charset=utf-8", "speedscope": "application/json"}
+Stack = Tuple[str, ...]
+
+
+def _label(code) -> str:
+    name = getattr(code, "co_qualname", code.co_name)
+    return f"{name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class Profile:
+    """Aggregated stack samples: root-to-leaf stack -> seconds on CPU"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.stacks: Counter = Counter()
+        self.samples = 0
+
+    def add(self, stack: Stack, seconds: float):
+        self.stacks[stack] += seconds
+        self.samples += 1
+
+    @property
+    def total(self) -> float:
+        return sum(self.stacks.values())
+
+    def render(self, fmt: str) -> bytes:
+        if fmt == "speedscope":
+            return json.dumps(self.to_speedscope()).encode()
+        return self.to_html().encode()
+
+    def to_speedscope(self) -> dict:
+        """Speedscope "sampled" profile with weights in milliseconds"""
+        frames: Dict[str, int] = {}
+        samples, weights = [], []
+        for stack, seconds in self.stacks.items():
+            samples.append([frames.setdefault(label, len(frames)) for label in stack])
+            weights.append(round(seconds * 1000, 3))
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "shared": {"frames": [{"name": label} for label in frames]},
+            "profiles": [{
+                "type": "sampled",
+                "name": self.name,
+                "unit": "milliseconds",
+                "startValue": 0,
+                "endValue": round(self.total * 1000, 3),
+                "samples": samples,
+                "weights": weights,
+            }],
+            "name": self.name,
+            "exporter": "nike-store-api",
+        }
+
+    def to_tree(self) -> dict:
+        root = {"name": self.name, "value": 0.0, "children": {}}
+        for stack, seconds in self.stacks.items():
+            node = root
+            node["value"] += seconds
+            for label in stack:
+                node = node["children"].setdefault(label, {"name": label, "value": 0.0, "children": {}})
+                node["value"] += seconds
+
+        def freeze(node):
+            return {
+                "name": node["name"],
+                "value": round(node["value"] * 1000, 3),
+                "children": sorted((freeze(child) for child in node["children"].values()), key=lambda c: -c["value"]),
+            }
+        return freeze(root)
+
+    def to_html(self) -> str:
+        """Self-contained flamegraph page"""
+        return FLAMEGRAPH_HTML.replace("{{title}}", html.escape(self.name)).replace(
+            "{{tree}}", json.dumps(self.to_tree()).replace("</", "<\\/")
+        )
+
+
+class _ActiveRequest:
+    __slots__ = ("frame", "profile", "continuous")
+
+    def __init__(self, frame, profile: Optional[Profile]):
+        self.frame = frame
+        self.profile = profile
+        # Continuous-mode samples, merged into the route's profile at the end
+        self.continuous = Profile("")
+
+
+class SamplingProfiler:
+    """CPU sampling profiler driven by SIGPROF on the event loop thread
+
+    An interval timer on process CPU time interrupts the loop thread and
+    the handler records the interrupted stack. A request is identified by
+    its middleware coroutine frame: a sample belongs to the request whose
+    frame is on the stack. Requests profiled on demand are sampled at a
+    high rate; in continuous mode all requests are sampled at a low rate
+    and aggregated per route. The timer only runs while there is something
+    to sample. Unix only; elsewhere profiling is unavailable.
+    """
+
+    def __init__(self):
+        self.continuous = settings.profile_continuous
+        self.route_profiles: Dict[str, Profile] = {}
+        self.available = False
+        self._requests: Dict[int, _ActiveRequest] = {}
+        self._on_demand = 0
+        self._interval = 0.0
+        self._previous_handler = None
+
+    def start(self):
+        """Install the SIGPROF handler; must run on the main (event loop) thread"""
+        if self.available:
+            return
+        if not hasattr(signal, "setitimer") or threading.current_thread() is not threading.main_thread():
+            logger.warning("CPU profiling unavailable: needs SIGPROF on the main thread")
+            return
+        self._previous_handler = signal.signal(signal.SIGPROF, self._handle)
+        self.available = True
+        self._update_timer()
+
+    def stop(self):
+        if not self.available:
+            return
+        signal.setitimer(signal.ITIMER_PROF, 0)
+        signal.signal(signal.SIGPROF, self._previous_handler or signal.SIG_DFL)
+        self.available = False
+        self._interval = 0.0
+
+    def set_continuous(self, enabled: bool):
+        self.continuous = enabled
+        self._update_timer()
+
+    def register(self, frame, profile: Optional[Profile]):
+        self._requests[id(frame)] = _ActiveRequest(frame, profile)
+        if profile is not None:
+            self._on_demand += 1
+            self._update_timer()
+
+    def unregister(self, frame, scope: dict):
+        entry = self._requests.pop(id(frame), None)
+        if entry is None:
+            return
+        if entry.profile is not None:
+            self._on_demand -= 1
+            self._update_timer()
+        if not entry.continuous.samples:
+            return
+        name = f"{scope['method']} {route_path(scope) or 'unmatched'}"
+        profile = self.route_profiles.get(name)
+        if profile is None:
+            profile = self.route_profiles[name] = Profile(name)
+        for stack, seconds in entry.continuous.stacks.items():
+            profile.stacks[stack] += seconds
+        profile.samples += entry.continuous.samples
+
+    def reset(self):
+        self.route_profiles = {}
+
+    def _update_timer(self):
+        if not self.available:
+            return
+        if self._on_demand:
+            interval = settings.profile_interval_ms / 1000
+        elif self.continuous:
+            interval = settings.profile_continuous_interval_ms / 1000
+        else:
+            interval = 0.0
+        if interval != self._interval:
+            self._interval = interval
+            signal.setitimer(signal.ITIMER_PROF, interval, interval)
+
+    def _handle(self, signum, frame):
+        # Runs on the loop thread between bytecodes, so no locking is needed
+        codes = []
+        while frame is not None:
+            entry = self._requests.get(id(frame))
+            if entry is not None and entry.frame is frame:
+                break
+            codes.append(frame.f_code)
+            frame = frame.f_back
+        if frame is None or not codes:
+            # The loop is idle or running something other than a request
+            return
+        stack = tuple(_label(code) for code in reversed(codes))
+        if entry.profile is not None:
+            entry.profile.add(stack, self._interval)
+        if self.continuous:
+            entry.continuous.add(stack, self._interval)
+
+
+profiler = SamplingProfiler()
+
+
+class ProfilingMiddleware:
+    """Profile a single request on demand, or every request continuously
+
+    An admin sends `X-Profile: html|speedscope` (or `?__profile=...`) and
+    gets the request's CPU profile back instead of its response body; the
+    original status is in X-Profiled-Status. The flag is ignored for
+    anyone who is not an active admin.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        fmt = self._requested_format(scope)
+        if fmt and not await self._is_admin(scope):
+            fmt = None
+        if fmt is None and not profiler.continuous:
+            await self.app(scope, receive, send)
+            return
+        await self._profiled(scope, receive, send, fmt)
+
+    async def _profiled(self, scope, receive, send, fmt: Optional[str]):
+        # This coroutine's frame marks the request's stacks for the sampler
+        marker = sys._getframe()
+        profile = Profile(f"{scope['method']} {scope['path']}") if fmt else None
+        original = {}
+
+        async def capture(message):
+            if message["type"] == "http.response.start":
+                original["status"] = message["status"]
+
+        profiler.register(marker, profile)
+        try:
+            await self.app(scope, receive, send if profile is None else capture)
+        finally:
+            profiler.unregister(marker, scope)
+        if profile is None:
+            return
+
+        body = profile.render(fmt)
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                (b"content-type", FORMATS[fmt].encode()),
+                (b"content-length", str(len(body)).encode()),
+                (b"x-profiled-status", str(original.get("status", "")).encode()),
+                (b"x-profile-samples", str(profile.samples).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    def _requested_format(self, scope) -> Optional[str]:
+        fmt = dict(scope["headers"]).get(b"x-profile", b"").decode("latin-1").strip().lower()
+        if not fmt and b"__profile" in scope.get("query_string", b""):
+            fmt = parse_qs(scope["query_string"].decode("latin-1")).get("__profile", [""])[0].lower()
+        return fmt if fmt in FORMATS else None
+
+    async def _is_admin(self, scope) -> bool:
+        from app.auth.dependencies import get_current_active_user, get_current_admin_user
+        from app.auth.security import get_current_user
+        from app.database import AsyncSessionLocal
+
+        authorization = dict(scope["headers"]).get(b"authorization", b"").decode("latin-1")
+        scheme, _, token = authorization.partition(" ")
+        if scheme.lower() != "bearer" or not token:
+            return False
+        async with AsyncSessionLocal() as db:
+            try:
+                credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+                user = await get_current_user(Request(scope), credentials, db)
+                await get_current_admin_user(await get_current_active_user(user))
+            except HTTPException:
+                return False
+        return True
+
+
+FLAMEGRAPH_HTML = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{{title}}</title>
+<style>
+body{font:12px sans-serif;margin:16px}#graph{position:relative}
+.f{position:absolute;height:17px;overflow:hidden;white-space:nowrap;box-sizing:border-box;
+border:1px solid #fff;padding:0 3px;line-height:15px;cursor:pointer;background:hsl(var(--h),80%,62%)}
+</style></head><body>
+<h3>{{title}}</h3><p id="info">Click a frame to zoom, click the root to reset.</p><div id="graph"></div>
+<script>
+const tree = {{tree}};
+const graph = document.getElementById("graph"), info = document.getElementById("info");
+function draw(focus) {
+  graph.innerHTML = "";
+  const width = graph.clientWidth || 1200;
+  let depth = 0;
+  function place(node, x, w, level) {
+    if (w < 1) return;
+    depth = Math.max(depth, level);
+    const el = document.createElement("div");
+    el.className = "f";
+    el.style.cssText = `left:${x}px;width:${w}px;top:${level * 17}px;--h:${(node.name.length * 37) % 60}`;
+    el.textContent = el.title = `${node.name} (${node.value.toFixed(1)}ms)`;
+    el.onclick = () => { draw(node === focus ? tree : node); info.textContent = el.title; };
+    graph.appendChild(el);
+    let cx = x;
+    for (const child of node.children) {
+      const cw = w * child.value / (node.value || 1);
+      place(child, cx, cw, level + 1);
+      cx += cw;
+    }
+  }
+  place(focus, 0, width, 0);
+  graph.style.height = `${(depth + 1) * 17}px`;
+}
+draw(tree);
+</script></body></html>"""
\ No newline at end of file
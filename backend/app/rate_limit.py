@@ -0,0 +1,197 @@
+from collections import OrderedDict
+from typing import Optional, Tuple
+from fastapi import HTTPException, Request, Response, status
+import logging
+import math
+import time
+
+from redis.exceptions import RedisError
+
+from app.config import settings
+from app.database import get_redis_client
+from app.memory_store import memory_script
+from app.auth.security import get_bearer_subject
+
+logger = logging.getLogger(__name__)
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+# Atomic token bucket. Uses the Redis server clock so all workers agree.
+# KEYS[1] = bucket key
+# ARGV[1] = capacity, ARGV[2] = refill rate (tokens/sec), ARGV[3] = cost
+# Returns {allowed (0/1), remaining tokens, retry after (ms)}
+TOKEN_BUCKET_LUA = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1])
+local ts = tonumber(state[2])
+if tokens == nil then
+    tokens = capacity
+    ts = now
+end
+
+tokens = math.min(capacity, tokens + (math.max(0, now - ts) / 1000.0) * rate)
+local allowed = 0
+local retry_after = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+else
+    retry_after = math.ceil((cost - tokens) / rate * 1000)
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000) + 1000)
+return {allowed, math.floor(tokens), retry_after}
+"""
+
+
+@memory_script(TOKEN_BUCKET_LUA)
+def _token_bucket(store, keys, args):
+    capacity, rate, cost = float(args[0]), float(args[1]), float(args[2])
+    seconds, microseconds = store.time()
+    now = seconds * 1000 + microseconds // 1000
+    tokens, ts = store.hmget(keys[0], "tokens", "ts")
+    if tokens is None:
+        tokens, ts = capacity, now
+    tokens = min(capacity, float(tokens) + max(0, now - float(ts)) / 1000.0 * rate)
+    allowed, retry_after = 0, 0
+    if tokens >= cost:
+        tokens -= cost
+        allowed = 1
+    else:
+        retry_after = math.ceil((cost - tokens) / rate * 1000)
+    store.hset(keys[0], mapping={"tokens": tokens, "ts": now})
+    store.pexpire(keys[0], math.ceil(capacity / rate * 1000) + 1000)
+    return [allowed, math.floor(tokens), retry_after]
+
+
+def parse_rate(rate: str) -> Tuple[int, int]:
+    """Parse a rate like "10/minute" into (count, period seconds)"""
+    count, _, period = rate.partition("/")
+    period = period.strip().rstrip("s")
+    if period not in PERIODS:
+        raise ValueError(f"Invalid rate limit period: {rate}")
+    return int(count), PERIODS[period]
+
+
+class LocalTokenBucket:
+    """In-process token buckets used while Redis is unavailable"""
+
+    def __init__(self, max_keys: int = 10000):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    def hit(self, key: str, capacity: int, rate: float, cost: int = 1) -> Tuple[bool, int, float]:
+        now = time.monotonic()
+        tokens, ts = self._buckets.pop(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - ts) * rate)
+        if tokens >= cost:
+            tokens -= cost
+            allowed, retry_after = True, 0.0
+        else:
+            allowed, retry_after = False, (cost - tokens) / rate
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return allowed, int(tokens), retry_after
+
+
+class RateLimiter:
+    """Token bucket limiter backed by Redis with a local fallback"""
+
+    def __init__(self, redis=None, prefix: str = "rl"):
+        self._redis = redis
+        self._script = None
+        self.prefix = prefix
+        self.local = LocalTokenBucket()
+        # While Redis is failing, skip it for a cooldown so limiter
+        # decisions do not wait on connection timeouts
+        self._redis_down_until = 0.0
+
+    @property
+    def redis(self):
+        if self._redis is None:
+            self._redis = get_redis_client()
+        return self._redis
+
+    @property
+    def script(self):
+        if self._script is None:
+            self._script = self.redis.register_script(TOKEN_BUCKET_LUA)
+        return self._script
+
+    async def hit(self, key: str, capacity: int, rate: float, cost: int = 1) -> Tuple[bool, int, float]:
+        """Consume tokens for key, returning (allowed, remaining, retry after seconds)"""
+        if time.monotonic() >= self._redis_down_until:
+            try:
+                allowed, remaining, retry_after_ms = await self.script(
+                    keys=[f"{self.prefix}:{key}"], args=[capacity, rate, cost]
+                )
+                return bool(allowed), int(remaining), int(retry_after_ms) / 1000
+            except (RedisError, OSError) as exc:
+                logger.warning(f"Rate limiter falling back to in-process buckets: {exc}")
+                self._redis_down_until = time.monotonic() + settings.rate_limit_redis_retry_seconds
+        return self.local.hit(key, capacity, rate, cost)
+
+
+limiter = RateLimiter()
+
+
+def get_client_ip(request: Request) -> str:
+    """Client IP, honouring proxy headers when configured to trust them"""
+    if settings.rate_limit_trust_proxy_headers:
+        fly_ip = request.headers.get("fly-client-ip")
+        if fly_ip:
+            return fly_ip
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+
+def rate_limit(name: str, rate: str, per: str = "ip", when_param: Optional[str] = None):
+    """Create a dependency enforcing a token bucket policy
+
+    ``per`` selects the identity a bucket belongs to: "ip", or "user" which
+    uses the authenticated username and falls back to the client IP. With
+    ``when_param`` the policy only applies to requests carrying that query
+    parameter (e.g. only searches on a listing endpoint).
+    """
+    capacity, period = parse_rate(rate)
+    refill_rate = capacity / period
+
+    async def dependency(request: Request, response: Response):
+        if not settings.rate_limit_enabled:
+            return
+        if when_param and not request.query_params.get(when_param):
+            return
+
+        identity = None
+        if per == "user":
+            subject = get_bearer_subject(request.headers.get("authorization"))
+            if subject:
+                identity = f"user:{subject}"
+        if identity is None:
+            identity = f"ip:{get_client_ip(request)}"
+
+        allowed, remaining, retry_after = await limiter.hit(f"{name}:{identity}", capacity, refill_rate)
+        headers = {
+            "X-RateLimit-Limit": str(capacity),
+            "X-RateLimit-Remaining": str(remaining),
+        }
+        if not allowed:
+            headers["Retry-After"] = str(max(1, math.ceil(retry_after)))
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many requests",
+                headers=headers
+            )
+        response.headers.update(headers)
+
+    return dependency
@@ -4,11 +4,15 @@ from .products import router as products_router
 from .orders import router as orders_router
 from .cart import router as cart_router
 from .admin import router as admin_router
+from .batch import router as batch_router
+from .storefront import router as storefront_router
 
 __all__ = [
     "auth_router",
     "products_router", 
     "orders_router",
     "cart_router",
-    "admin_router"
+    "admin_router",
+    "batch_router",
+    "storefront_router"
 ]
\ No newline at end of file
@@ -1,15 +1,25 @@
 from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File, Form, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 import math
 
-from app.database import get_db
-from app.schemas.product import ProductCreate, ProductUpdate, ProductResponse, CategoryCreate, CategoryResponse
-from app.schemas.order import OrderUpdate, OrderResponse, OrderListResponse
+from app.database import get_db, get_query_cache_stats
+from app.cache import catalog_cache
+from app.schemas.product import ProductCreate, ProductUpdate, ProductResponse, CategoryCreate, CategoryResponse, ProductImageResponse
+from app.schemas.order import OrderUpdate, OrderResponse, OrderSummaryListResponse
 from app.services.product_service import ProductService
 from app.services.order_service import OrderService
+from app.services.image_service import ImageService
+from app.jobs import get_job_backend
+from app.jobs.outbox import count_pending
+from app.config import settings
+from app.profiling import FORMATS, profiler
+from app.loop_monitor import loop_monitor
+from app.slow_queries import slow_query_log
 from app.auth.dependencies import get_current_admin_user
 from app.models.user import User
+from app.models.order import OrderStatus, PaymentStatus
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
@@ -74,21 +84,57 @@ async def delete_product(
     
     return {"message": "Product deleted successfully"}
 
+@router.post("/products/{product_id}/images", response_model=ProductImageResponse, status_code=status.HTTP_201_CREATED)
+async def upload_product_image(
+    product_id: int,
+    file: UploadFile = File(...),
+    alt_text: Optional[str] = Form(default=None, max_length=255),
+    is_main: bool = Form(default=False),
+    sort_order: int = Form(default=0),
+    current_user: User = Depends(get_current_admin_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Upload product image and generate resized variants (admin only)"""
+    image_service = ImageService(db)
+    image = await image_service.add_product_image(
+        product_id, file, alt_text=alt_text, is_main=is_main, sort_order=sort_order
+    )
+    
+    if not image:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Product not found"
+        )
+    
+    return image
+
 # Order Management
-@router.get("/orders", response_model=OrderListResponse)
+@router.get("/orders", response_model=OrderSummaryListResponse)
 async def get_all_orders(
     page: int = Query(default=1, ge=1),
     per_page: int = Query(default=20, ge=1, le=100),
-    status: Optional[str] = Query(default=None),
+    status: Optional[OrderStatus] = Query(default=None),
+    payment_status: Optional[PaymentStatus] = Query(default=None),
+    user_id: Optional[int] = Query(default=None),
+    customer_email: Optional[str] = Query(default=None),
+    created_from: Optional[datetime] = Query(default=None),
+    created_to: Optional[datetime] = Query(default=None),
     current_user: User = Depends(get_current_admin_user),
     db: AsyncSession = Depends(get_db)
 ):
-    """Get all orders (admin only)"""
+    """Get order summaries (admin only); full detail is on /admin/orders/{order_id}"""
     order_service = OrderService(db)
     
     skip = (page - 1) * per_page
-    orders, total = await order_service.get_all_orders(
-        skip=skip, limit=per_page, status=status
+    orders, total = await order_service.get_order_summaries(
+        skip=skip,
+        limit=per_page,
+        status=status,
+        payment_status=payment_status,
+        user_id=user_id,
+        customer_email=customer_email,
+        created_from=created_from,
+        created_to=created_to
     )
     
     pages = math.ceil(total / per_page)
@@ -136,4 +182,132 @@ async def get_order_admin(
             detail="Order not found"
         )
     
-    return order
\ No newline at end of file
+    return order
+
+# Background Jobs
+def _percentile(values: list, fraction: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+@router.get("/jobs/metrics")
+async def get_job_metrics(
+    current_user: User = Depends(get_current_admin_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Get job queue depth and latency (admin only)"""
+    backend = get_job_backend()
+    queues = {}
+    for queue in settings.job_queues:
+        stats = await backend.stats(queue)
+        latencies = stats.pop("latencies")
+        p50 = _percentile(latencies, 0.5)
+        p95 = _percentile(latencies, 0.95)
+        queues[queue] = {
+            **stats,
+            "latency_p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+            "latency_p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+        }
+    
+    return {
+        "outbox_pending": await count_pending(db),
+        "queues": queues
+    }
+
+@router.get("/db/cache-stats")
+async def get_db_cache_stats(
+    current_user: User = Depends(get_current_admin_user)
+):
+    """Get compiled SQL cache hit rate for this worker (admin only)"""
+    return get_query_cache_stats()
+
+@router.get("/cache/stats")
+async def get_catalog_cache_stats(
+    current_user: User = Depends(get_current_admin_user)
+):
+    """Get catalog cache hit ratios per tier for this worker (admin only)"""
+    return catalog_cache.stats()
+
+@router.get("/db/slow-queries")
+async def get_slow_queries(
+    limit: Optional[int] = Query(default=None, ge=1, le=1000),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """Get the slowest statement fingerprints on this worker by total time (admin only)"""
+    return {
+        "threshold_ms": settings.slow_query_ms,
+        "fingerprints": len(slow_query_log.queries),
+        "queries": slow_query_log.top(limit)
+    }
+
+@router.delete("/db/slow-queries")
+async def reset_slow_queries(
+    current_user: User = Depends(get_current_admin_user)
+):
+    """Clear the slow-query log on this worker (admin only)"""
+    slow_query_log.reset()
+    return {"message": "Slow-query log reset"}
+
+# Profiling
+@router.get("/profiles")
+async def list_profiles(
+    current_user: User = Depends(get_current_admin_user)
+):
+    """List continuous per-route CPU profiles for this worker (admin only)"""
+    profiles = sorted(profiler.route_profiles.values(), key=lambda profile: -profile.total)
+    return {
+        "continuous": profiler.continuous,
+        "routes": [
+            {"route": profile.name, "samples": profile.samples, "cpu_ms": round(profile.total * 1000, 1)}
+            for profile in profiles
+        ]
+    }
+
+@router.get("/profiles/download")
+async def download_profile(
+    route: str = Query(..., description='e.g. "GET /api/v1/products/"'),
+    format: str = Query(default="speedscope", pattern="^(speedscope|html)$"),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """Download a route's aggregated profile as speedscope JSON or flamegraph HTML (admin only)"""
+    profile = profiler.route_profiles.get(route)
+    if profile is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No profile for this route"
+        )
+    return Response(content=profile.render(format), media_type=FORMATS[format])
+
+@router.put("/profiles/continuous")
+async def set_continuous_profiling(
+    enabled: bool = Query(...),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """Turn continuous profiling on or off for this worker (admin only)"""
+    profiler.set_continuous(enabled)
+    return {"continuous": profiler.continuous}
+
+@router.delete("/profiles")
+async def reset_profiles(
+    current_user: User = Depends(get_current_admin_user)
+):
+    """Discard the aggregated per-route profiles (admin only)"""
+    profiler.reset()
+    return {"message": "Profiles reset"}
+
+# Event loop
+@router.get("/loop-lag")
+async def get_loop_lag(
+    current_user: User = Depends(get_current_admin_user)
+):
+    """Get the event loop lag histogram and recent stalls for this worker (admin only)"""
+    return loop_monitor.report()
+
+@router.delete("/loop-lag")
+async def reset_loop_lag(
+    current_user: User = Depends(get_current_admin_user)
+):
+    """Clear the lag histogram and stall history on this worker (admin only)"""
+    loop_monitor.reset()
+    return {"message": "Loop lag monitor reset"}
\ No newline at end of file
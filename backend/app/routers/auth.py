@@ -1,18 +1,29 @@
 from datetime import timedelta
+from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.security import OAuth2PasswordRequestForm
+from fastapi.security import OAuth2PasswordRequestForm, HTTPBearer, HTTPAuthorizationCredentials
+from jose import JWTError, jwt
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import get_db
-from app.schemas.user import UserCreate, UserResponse, UserLogin, Token
+from app.schemas.user import UserCreate, UserResponse, UserLogin, Token, RefreshRequest, RefreshResponse
 from app.services.user_service import UserService
 from app.auth.security import authenticate_user, create_access_token
 from app.auth.dependencies import get_current_active_user
+from app.auth.refresh_tokens import refresh_token_store, RefreshTokenError
+from app.auth.revocation import revocation_list
 from app.config import settings
+from app.rate_limit import rate_limit
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
 
-@router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
+# Login and registration each cost a bcrypt computation
+login_rate_limit = rate_limit("login", settings.rate_limit_login)
+register_rate_limit = rate_limit("register", settings.rate_limit_register)
+
+optional_bearer = HTTPBearer(auto_error=False)
+
+@router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED, dependencies=[Depends(register_rate_limit)])
 async def register(
     user_data: UserCreate,
     db: AsyncSession = Depends(get_db)
@@ -22,7 +33,7 @@ async def register(
     user = await user_service.create_user(user_data)
     return user
 
-@router.post("/login", response_model=Token)
+@router.post("/login", response_model=Token, dependencies=[Depends(login_rate_limit)])
 async def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
     db: AsyncSession = Depends(get_db)
@@ -46,14 +57,16 @@ async def login(
     access_token = create_access_token(
         data={"sub": user.username}, expires_delta=access_token_expires
     )
+    refresh_token = await refresh_token_store.issue(user.username)
     
     return {
         "access_token": access_token,
+        "refresh_token": refresh_token,
         "token_type": "bearer",
         "user": user
     }
 
-@router.post("/login-json", response_model=Token)
+@router.post("/login-json", response_model=Token, dependencies=[Depends(login_rate_limit)])
 async def login_json(
     login_data: UserLogin,
     db: AsyncSession = Depends(get_db)
@@ -76,9 +89,11 @@ async def login_json(
     access_token = create_access_token(
         data={"sub": user.username}, expires_delta=access_token_expires
     )
+    refresh_token = await refresh_token_store.issue(user.username)
     
     return {
         "access_token": access_token,
+        "refresh_token": refresh_token,
         "token_type": "bearer",
         "user": user
     }
@@ -90,7 +105,48 @@ async def get_current_user_info(
     """Get current user information"""
     return current_user
 
+@router.post("/refresh", response_model=RefreshResponse)
+async def refresh(refresh_data: RefreshRequest):
+    """Exchange a refresh token for a new access token and refresh token"""
+    try:
+        username, refresh_token = await refresh_token_store.rotate(refresh_data.refresh_token)
+    except RefreshTokenError as exc:
+        detail = "Refresh token reuse detected" if exc.reason == "reused" else "Invalid refresh token"
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail=detail,
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
+    access_token_expires = timedelta(minutes=settings.access_token_expire_minutes)
+    access_token = create_access_token(
+        data={"sub": username}, expires_delta=access_token_expires
+    )
+    
+    return {
+        "access_token": access_token,
+        "refresh_token": refresh_token,
+        "token_type": "bearer"
+    }
+
 @router.post("/logout")
-async def logout():
-    """Logout user (client should remove token)"""
+async def logout(
+    refresh_data: Optional[RefreshRequest] = None,
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_bearer)
+):
+    """Logout user, revoking the access token and refresh token if sent"""
+    if credentials:
+        try:
+            payload = jwt.decode(
+                credentials.credentials,
+                settings.secret_key,
+                algorithms=[settings.algorithm]
+            )
+        except JWTError:
+            payload = {}
+        if payload.get("jti") and payload.get("exp"):
+            await revocation_list.revoke(payload["jti"], payload["exp"])
+    
+    if refresh_data:
+        await refresh_token_store.revoke(refresh_data.refresh_token)
     return {"message": "Successfully logged out"}
\ No newline at end of file
@@ -0,0 +1,40 @@
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+
+from app.batch import run_batch
+from app.database import AsyncSessionLocal
+from app.schemas.batch import BatchRequest, BatchResponse
+from app.auth.security import get_current_user
+from app.config import settings
+
+router = APIRouter(prefix="/batch", tags=["batch"])
+
+optional_bearer = HTTPBearer(auto_error=False)
+
+@router.post("", response_model=BatchResponse)
+async def batch(
+    batch_request: BatchRequest,
+    request: Request,
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_bearer)
+):
+    """Run several GET requests in one round-trip; responses come back in order with their own status"""
+    if len(batch_request.requests) > settings.batch_max_requests:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.batch_max_requests} requests per batch"
+        )
+    
+    # Resolved once here; sub-requests that need a user get this one. The
+    # session is closed before they run so it does not hold a connection.
+    user = None
+    if credentials is not None:
+        async with AsyncSessionLocal() as db:
+            try:
+                user = await get_current_user(request, credentials, db)
+            except HTTPException:
+                # Sub-requests that need a user report the 401 themselves
+                pass
+    
+    content = await run_batch(request, batch_request.requests, user)
+    return Response(content=content, media_type="application/json")
\ No newline at end of file
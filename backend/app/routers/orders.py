@@ -26,6 +26,7 @@ async def create_order(
 async def get_user_orders(
     page: int = Query(default=1, ge=1),
     per_page: int = Query(default=10, ge=1, le=50),
+    older: bool = Query(default=False, description="Include orders older than the recent window"),
     current_user: User = Depends(get_current_active_user),
     db: AsyncSession = Depends(get_db)
 ):
@@ -34,7 +35,7 @@ async def get_user_orders(
     
     skip = (page - 1) * per_page
     orders, total = await order_service.get_user_orders(
-        current_user.id, skip=skip, limit=per_page
+        current_user.id, skip=skip, limit=per_page, include_older=older
     )
     
     pages = math.ceil(total / per_page)
@@ -1,32 +1,80 @@
 from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from fastapi.responses import JSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import get_db
-from app.schemas.product import ProductResponse, ProductListResponse, CategoryResponse
-from app.services.product_service import ProductService
+from app.schemas.product import (
+    ProductResponse, ProductListResponse, CategoryResponse, ProductVariantStock,
+    product_fields_list_adapter, product_list_fields_model
+)
+from app.services.product_service import (
+    MAX_BATCH_PRODUCTS, ProductService, get_cached_categories, get_cached_featured_products, get_cached_product,
+    parse_product_fields
+)
+from app.config import settings
+from app.rate_limit import rate_limit
 import math
 
 router = APIRouter(prefix="/products", tags=["products"])
 
+# Text search is an unindexed ILIKE scan, so it gets its own budget
+search_rate_limit = rate_limit("product_search", settings.rate_limit_search, per="user", when_param="search")
+
 @router.get("/categories", response_model=list[CategoryResponse])
-async def get_categories(db: AsyncSession = Depends(get_db)):
+async def get_categories():
     """Get all categories"""
-    product_service = ProductService(db)
-    categories = await product_service.get_categories()
+    categories = await get_cached_categories()
     return categories
 
+FIELDS_DESCRIPTION = "Comma-separated product fields to return; all fields if omitted"
+
+def parse_product_ids(ids: str) -> list[int]:
+    try:
+        product_ids = [int(value) for value in ids.split(",") if value.strip()]
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="ids must be comma-separated integers"
+        )
+    if not product_ids or len(product_ids) > MAX_BATCH_PRODUCTS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Between 1 and {MAX_BATCH_PRODUCTS} ids are required"
+        )
+    return product_ids
+
 @router.get("/featured", response_model=list[ProductResponse])
 async def get_featured_products(
     limit: int = Query(default=8, ge=1, le=20),
-    db: AsyncSession = Depends(get_db)
+    fields: Optional[str] = Query(default=None, description=FIELDS_DESCRIPTION)
 ):
     """Get featured products"""
+    field_set = parse_product_fields(fields)
+    products = await get_cached_featured_products(limit=limit)
+    if field_set is None:
+        return products
+    # Cached as full documents, so only the payload is trimmed
+    return JSONResponse([{name: value for name, value in product.items() if name in field_set} for product in products])
+
+@router.get("/batch", response_model=list[ProductResponse])
+async def get_products_batch(
+    ids: str = Query(..., description=f"Comma-separated product IDs, at most {MAX_BATCH_PRODUCTS}"),
+    fields: Optional[str] = Query(default=None, description=FIELDS_DESCRIPTION),
+    db: AsyncSession = Depends(get_db)
+):
+    """Get many products by ID in one query, in request order; unknown IDs are left out"""
+    product_ids = parse_product_ids(ids)
+    field_set = parse_product_fields(fields)
     product_service = ProductService(db)
-    products = await product_service.get_featured_products(limit=limit)
-    return products
+    products = await product_service.get_products_by_ids(product_ids, field_set)
+    if field_set is None:
+        return products
+    
+    adapter = product_fields_list_adapter(field_set)
+    return Response(content=adapter.dump_json(adapter.validate_python(products)), media_type="application/json")
 
-@router.get("/", response_model=ProductListResponse)
+@router.get("/", response_model=ProductListResponse, dependencies=[Depends(search_rate_limit)])
 async def get_products(
     page: int = Query(default=1, ge=1),
     per_page: int = Query(default=20, ge=1, le=100),
@@ -35,9 +83,13 @@ async def get_products(
     is_featured: Optional[bool] = Query(default=None),
     min_price: Optional[float] = Query(default=None, ge=0),
     max_price: Optional[float] = Query(default=None, ge=0),
+    size: Optional[str] = Query(default=None, max_length=10),
+    color: Optional[str] = Query(default=None, max_length=50),
+    fields: Optional[str] = Query(default=None, description=FIELDS_DESCRIPTION),
     db: AsyncSession = Depends(get_db)
 ):
     """Get products with filtering and pagination"""
+    field_set = parse_product_fields(fields)
     product_service = ProductService(db)
     
     skip = (page - 1) * per_page
@@ -48,32 +100,49 @@ async def get_products(
         search=search,
         is_featured=is_featured,
         min_price=min_price,
-        max_price=max_price
+        max_price=max_price,
+        size=size,
+        color=color,
+        fields=field_set
     )
     
     pages = math.ceil(total / per_page)
     
-    return {
+    body = {
         "products": products,
         "total": total,
         "page": page,
         "per_page": per_page,
         "pages": pages
     }
+    if field_set is None:
+        return body
+    
+    response = product_list_fields_model(field_set).model_validate(body)
+    return Response(content=response.model_dump_json(), media_type="application/json")
 
 @router.get("/{product_id}", response_model=ProductResponse)
 async def get_product(
-    product_id: int,
-    db: AsyncSession = Depends(get_db)
+    product_id: int
 ):
     """Get product by ID"""
-    product_service = ProductService(db)
-    product = await product_service.get_product_by_id(product_id)
+    document = await get_cached_product(product_id)
     
-    if not product:
+    if not document:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Product not found"
         )
     
-    return product
\ No newline at end of file
+    # Prebuilt ProductResponse JSON; skip re-validation and re-serialization
+    return Response(content=document, media_type="application/json")
+
+@router.get("/{product_id}/availability", response_model=list[ProductVariantStock])
+async def get_product_availability(
+    product_id: int,
+    db: AsyncSession = Depends(get_db)
+):
+    """Get live stock per size and color"""
+    product_service = ProductService(db)
+    variants = await product_service.get_variant_stock(product_id)
+    return variants
\ No newline at end of file
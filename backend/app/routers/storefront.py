@@ -0,0 +1,23 @@
+from fastapi import APIRouter, Request, Response
+
+from app.schemas.storefront import StorefrontHomeResponse
+from app.static_files import REVALIDATE_CACHE_CONTROL
+from app.storefront import storefront_home
+
+router = APIRouter(prefix="/storefront", tags=["storefront"])
+
+@router.get("/home", response_model=StorefrontHomeResponse)
+async def get_home(request: Request):
+    """Get categories and featured, on-sale and newest products for the home page"""
+    payload = await storefront_home.get()
+    headers = {"ETag": payload.etag, "Cache-Control": REVALIDATE_CACHE_CONTROL, "Vary": "Accept-Encoding"}
+    
+    if_none_match = request.headers.get("if-none-match", "")
+    if payload.etag in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*":
+        return Response(status_code=304, headers=headers)
+    
+    # Compressed once per catalog version, not per request
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        headers["Content-Encoding"] = "gzip"
+        return Response(content=payload.gzipped, media_type="application/json", headers=headers)
+    return Response(content=payload.body, media_type="application/json", headers=headers)
\ No newline at end of file
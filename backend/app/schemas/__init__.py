@@ -1,22 +1,29 @@
 # Schemas package
-from .user import UserCreate, UserUpdate, UserResponse, UserLogin, Token
+from .user import UserCreate, UserUpdate, UserResponse, UserLogin, Token, RefreshRequest, RefreshResponse
 from .product import (
     ProductCreate, ProductUpdate, ProductResponse, 
     CategoryCreate, CategoryResponse,
-    ProductImageCreate, ProductImageResponse
+    ProductImageCreate, ProductImageResponse,
+    ProductVariantCreate, ProductVariantResponse, ProductVariantStock
 )
 from .order import (
     OrderCreate, OrderUpdate, OrderResponse,
     OrderItemResponse, CartItemCreate, CartItemUpdate, CartItemResponse,
     CartResponse
 )
+from .batch import BatchRequestItem, BatchRequest, BatchResponseItem, BatchResponse
+from .storefront import StorefrontHomeResponse
 
 __all__ = [
     "UserCreate", "UserUpdate", "UserResponse", "UserLogin", "Token",
+    "RefreshRequest", "RefreshResponse",
     "ProductCreate", "ProductUpdate", "ProductResponse",
     "CategoryCreate", "CategoryResponse", 
     "ProductImageCreate", "ProductImageResponse",
+    "ProductVariantCreate", "ProductVariantResponse", "ProductVariantStock",
     "OrderCreate", "OrderUpdate", "OrderResponse",
     "OrderItemResponse", "CartItemCreate", "CartItemUpdate", 
-    "CartItemResponse", "CartResponse"
+    "CartItemResponse", "CartResponse",
+    "BatchRequestItem", "BatchRequest", "BatchResponseItem", "BatchResponse",
+    "StorefrontHomeResponse"
 ]
\ No newline at end of file
@@ -0,0 +1,19 @@
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Literal
+
+class BatchRequestItem(BaseModel):
+    # Reads only: writes in a batch would bypass Idempotency-Key handling
+    method: Literal["GET"] = "GET"
+    path: str = Field(..., pattern=r"^/api/v1/", max_length=2000, examples=["/api/v1/products/featured?limit=8"])
+    headers: Dict[str, str] = Field(default_factory=dict)
+
+class BatchRequest(BaseModel):
+    requests: List[BatchRequestItem] = Field(..., min_length=1)
+
+class BatchResponseItem(BaseModel):
+    status: int
+    headers: Dict[str, str]
+    body: Any = None
+
+class BatchResponse(BaseModel):
+    responses: List[BatchResponseItem]
\ No newline at end of file
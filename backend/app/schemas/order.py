@@ -98,4 +98,27 @@ class OrderListResponse(BaseModel):
     total: int
     page: int
     per_page: int
+    pages: int
+
+class OrderSummary(BaseModel):
+    id: int
+    order_number: str
+    user_id: int
+    customer_name: str
+    customer_email: str
+    status: OrderStatus
+    payment_status: PaymentStatus
+    subtotal: Decimal
+    total_amount: Decimal
+    item_count: int
+    created_at: datetime
+    
+    class Config:
+        from_attributes = True
+
+class OrderSummaryListResponse(BaseModel):
+    orders: List[OrderSummary]
+    total: int
+    page: int
+    per_page: int
     pages: int
\ No newline at end of file
@@ -1,5 +1,6 @@
-from pydantic import BaseModel, Field
-from typing import Optional, List
+from functools import lru_cache
+from pydantic import BaseModel, Field, TypeAdapter, create_model
+from typing import Optional, List, Dict, FrozenSet, Type
 from datetime import datetime
 from decimal import Decimal
 
@@ -31,11 +32,41 @@ class ProductImageCreate(ProductImageBase):
 class ProductImageResponse(ProductImageBase):
     id: int
     product_id: int
+    content_hash: Optional[str] = None
+    variants: Optional[Dict[str, Dict[str, str]]] = None
     created_at: datetime
     
     class Config:
         from_attributes = True
 
+class ProductVariantBase(BaseModel):
+    size: str = Field(..., min_length=1, max_length=10)
+    color: str = Field(..., min_length=1, max_length=50)
+    sku: Optional[str] = Field(None, min_length=1, max_length=100)
+    stock_quantity: int = Field(default=0, ge=0)
+
+class ProductVariantCreate(ProductVariantBase):
+    pass
+
+class ProductVariantResponse(BaseModel):
+    # No stock here: product responses are cached, stock is read live
+    id: int
+    size: str
+    color: str
+    sku: str
+    
+    class Config:
+        from_attributes = True
+
+class ProductVariantStock(BaseModel):
+    id: int
+    size: str
+    color: str
+    stock_quantity: int
+    
+    class Config:
+        from_attributes = True
+
 class ProductBase(BaseModel):
     name: str = Field(..., min_length=1, max_length=255)
     description: str = Field(..., min_length=1)
@@ -52,6 +83,8 @@ class ProductBase(BaseModel):
 
 class ProductCreate(ProductBase):
     images: List[ProductImageCreate] = Field(default_factory=list)
+    # Without explicit variants, sizes x colors become zero-stock variants
+    variants: List[ProductVariantCreate] = Field(default_factory=list)
 
 class ProductUpdate(BaseModel):
     name: Optional[str] = Field(None, min_length=1, max_length=255)
@@ -65,6 +98,8 @@ class ProductUpdate(BaseModel):
     weight: Optional[Decimal] = Field(None, gt=0, decimal_places=2)
     sizes: Optional[List[str]] = None
     colors: Optional[List[str]] = None
+    # Replaces the variant set; combinations left out are removed
+    variants: Optional[List[ProductVariantCreate]] = None
 
 class ProductResponse(ProductBase):
     id: int
@@ -73,6 +108,7 @@ class ProductResponse(ProductBase):
     updated_at: Optional[datetime] = None
     category: CategoryResponse
     images: List[ProductImageResponse] = Field(default_factory=list)
+    variants: List[ProductVariantResponse] = Field(default_factory=list)
     main_image: Optional[str] = None
     is_on_sale: bool
     discount_percentage: int
@@ -85,4 +121,26 @@ class ProductListResponse(BaseModel):
     total: int
     page: int
     per_page: int
-    pages: int
\ No newline at end of file
+    pages: int
+
+@lru_cache(maxsize=256)
+def product_fields_model(fields: FrozenSet[str]) -> Type[BaseModel]:
+    """ProductResponse restricted to a sparse fieldset"""
+    return create_model(
+        "ProductFields",
+        __config__={"from_attributes": True},
+        **{name: (field.annotation, field) for name, field in ProductResponse.model_fields.items() if name in fields}
+    )
+
+@lru_cache(maxsize=256)
+def product_list_fields_model(fields: FrozenSet[str]) -> Type[BaseModel]:
+    """ProductListResponse whose products carry only a sparse fieldset"""
+    return create_model(
+        "ProductListFields",
+        __base__=ProductListResponse,
+        products=(List[product_fields_model(fields)], ...)
+    )
+
+@lru_cache(maxsize=256)
+def product_fields_list_adapter(fields: FrozenSet[str]) -> TypeAdapter:
+    return TypeAdapter(List[product_fields_model(fields)])
\ No newline at end of file
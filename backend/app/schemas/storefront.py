@@ -0,0 +1,11 @@
+from pydantic import BaseModel
+from typing import List
+
+from app.schemas.product import CategoryResponse, ProductResponse
+
+class StorefrontHomeResponse(BaseModel):
+    catalog_version: int
+    categories: List[CategoryResponse]
+    featured: List[ProductResponse]
+    on_sale: List[ProductResponse]
+    new_arrivals: List[ProductResponse]
\ No newline at end of file
@@ -3,10 +3,16 @@ from .user_service import UserService
 from .product_service import ProductService
 from .order_service import OrderService
 from .cart_service import CartService
+from .image_service import ImageService
+from .product_document_service import ProductDocumentService
+from .order_archive_service import OrderArchiveService
 
 __all__ = [
     "UserService",
     "ProductService", 
     "OrderService",
-    "CartService"
+    "CartService",
+    "ImageService",
+    "ProductDocumentService",
+    "OrderArchiveService"
 ]
\ No newline at end of file
@@ -1,130 +1,206 @@
-from typing import List, Optional
+from typing import Optional
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_
+from sqlalchemy import select, update, delete, and_, or_, func, bindparam
 from sqlalchemy.orm import selectinload
+from sqlalchemy.orm.attributes import set_committed_value
 from fastapi import HTTPException, status
 
+from app.database import upsert
 from app.models.order import Cart, CartItem
-from app.models.product import Product
+from app.models.product import Product, ProductVariant
 from app.schemas.order import CartItemCreate, CartItemUpdate
+from app.tracing import trace_methods
 
+# Hot statements are built once; parameters are bound per call
+CART_BY_USER = select(Cart).options(
+    selectinload(Cart.items).selectinload(CartItem.product)
+).where(Cart.user_id == bindparam("user_id"))
+
+@trace_methods
 class CartService:
     def __init__(self, db: AsyncSession):
         self.db = db
     
     async def get_or_create_cart(self, user_id: int) -> Cart:
         """Get or create cart for user"""
-        result = await self.db.execute(
-            select(Cart).options(
-                selectinload(Cart.items).selectinload(CartItem.product)
-            ).where(Cart.user_id == user_id)
-        )
+        result = await self.db.execute(CART_BY_USER, {"user_id": user_id})
         cart = result.scalar_one_or_none()
         
         if not cart:
-            cart = Cart(user_id=user_id)
-            self.db.add(cart)
+            # A concurrent request may create it first; then read theirs
+            result = await self.db.execute(
+                upsert(Cart).values(user_id=user_id).on_conflict_do_nothing().returning(Cart)
+            )
+            cart = result.scalar_one_or_none()
+            if cart is None:
+                return await self.get_or_create_cart(user_id)
+            set_committed_value(cart, "items", [])
             await self.db.commit()
-            await self.db.refresh(cart)
         
         return cart
     
-    async def add_item_to_cart(self, user_id: int, item_data: CartItemCreate) -> CartItem:
-        """Add item to cart"""
-        cart = await self.get_or_create_cart(user_id)
-        
-        # Verify product exists and is active
-        product_result = await self.db.execute(
-            select(Product).where(
-                and_(Product.id == item_data.product_id, Product.is_active == True)
-            )
+    async def _cart_id(self, user_id: int) -> int:
+        """ID of the user's cart, creating it if needed, in one statement"""
+        stmt = upsert(Cart).values(user_id=user_id)
+        result = await self.db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[Cart.user_id],
+                set_={"updated_at": func.now()}
+            ).returning(Cart.id)
         )
-        product = product_result.scalar_one_or_none()
-        if not product:
+        return result.scalar_one()
+    
+    def _stock_subquery(self, product_id, size, color):
+        """Stock of a variant of an active product, as a scalar subquery"""
+        return select(ProductVariant.stock_quantity).join(Product).where(
+            and_(
+                ProductVariant.product_id == product_id,
+                ProductVariant.size == size,
+                ProductVariant.color == color,
+                Product.is_active == True
+            )
+        ).scalar_subquery()
+    
+    async def _variant_stock(self, product_id: int, size: str, color: str) -> Optional[int]:
+        """Stock of a variant of an active product; None if there is no such variant"""
+        return await self.db.scalar(select(self._stock_subquery(product_id, size, color)))
+    
+    def _raise_unavailable(self, available: Optional[int]):
+        if available is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
-                detail="Product not found"
+                detail="Product not available in this size and color"
             )
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Only {available} left in stock"
+        )
+    
+    async def check_stock(self, product_id: int, size: str, color: str, quantity: int):
+        """Fail with 404/400 unless the variant has the quantity in stock
         
-        # Check if item already exists in cart
-        existing_item_result = await self.db.execute(
-            select(CartItem).where(
-                and_(
-                    CartItem.cart_id == cart.id,
-                    CartItem.product_id == item_data.product_id,
-                    CartItem.size == item_data.size,
-                    CartItem.color == item_data.color
-                )
+        Carts hold no stock, so an abandoned cart locks nothing; checkout
+        reserves it with reserve_stock.
+        """
+        available = await self._variant_stock(product_id, size, color)
+        if available is None or available < quantity:
+            self._raise_unavailable(available)
+    
+    async def reserve_stock(self, product_id: int, size: str, color: str, quantity: int):
+        """Take stock from a variant of an active product, or fail with 404/400
+        
+        Validation and reservation are one conditional UPDATE on the
+        (product_id, size, color) index, so concurrent checkouts cannot oversell.
+        """
+        result = await self.db.execute(
+            update(ProductVariant)
+            .where(
+                ProductVariant.product_id == product_id,
+                ProductVariant.size == size,
+                ProductVariant.color == color,
+                ProductVariant.stock_quantity >= quantity,
+                ProductVariant.product_id == Product.id,
+                Product.is_active == True
             )
+            .values(stock_quantity=ProductVariant.stock_quantity - quantity)
+            .returning(ProductVariant.id)
+            .execution_options(synchronize_session=False)
         )
-        existing_item = existing_item_result.scalar_one_or_none()
+        if result.scalar_one_or_none() is not None:
+            return
         
-        if existing_item:
-            # Update quantity
-            existing_item.quantity += item_data.quantity
-            await self.db.commit()
-            await self.db.refresh(existing_item)
-            return existing_item
-        else:
-            # Create new cart item
-            cart_item = CartItem(
-                cart_id=cart.id,
-                **item_data.model_dump()
+        # Slow path, only to explain the failure
+        self._raise_unavailable(await self._variant_stock(product_id, size, color))
+    
+    async def add_item_to_cart(self, user_id: int, item_data: CartItemCreate) -> CartItem:
+        """Add item to cart"""
+        cart_id = await self._cart_id(user_id)
+        
+        # Validate the variant; stock is reserved at checkout
+        await self.check_stock(item_data.product_id, item_data.size, item_data.color, item_data.quantity)
+        
+        # New line or added to the existing one, keyed on the unique line
+        # index; the merged quantity must still be in stock
+        stmt = upsert(CartItem).values(cart_id=cart_id, **item_data.model_dump())
+        stock = self._stock_subquery(item_data.product_id, item_data.size, item_data.color)
+        result = await self.db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[CartItem.cart_id, CartItem.product_id, CartItem.size, CartItem.color],
+                set_={"quantity": CartItem.quantity + stmt.excluded.quantity},
+                where=CartItem.quantity + stmt.excluded.quantity <= stock
             )
-            self.db.add(cart_item)
-            await self.db.commit()
-            await self.db.refresh(cart_item)
-            return cart_item
+            .returning(CartItem)
+            .execution_options(populate_existing=True)
+        )
+        cart_item = result.scalar_one_or_none()
+        if cart_item is None:
+            self._raise_unavailable(await self._variant_stock(item_data.product_id, item_data.size, item_data.color))
+        
+        # unit_price reads the product; attach it without a lazy load (the
+        # identity map alone holds it only weakly)
+        set_committed_value(cart_item, "product", await self.db.get(Product, item_data.product_id))
+        await self.db.commit()
+        return cart_item
+    
+    def _user_cart_ids(self, user_id: int):
+        return select(Cart.id).where(Cart.user_id == user_id)
     
     async def update_cart_item(self, user_id: int, item_id: int, item_data: CartItemUpdate) -> Optional[CartItem]:
-        """Update cart item quantity"""
-        cart = await self.get_or_create_cart(user_id)
+        """Update cart item quantity
         
+        One UPDATE...RETURNING; an increase must still be in stock.
+        """
+        stock = self._stock_subquery(CartItem.product_id, CartItem.size, CartItem.color)
         result = await self.db.execute(
-            select(CartItem).where(
-                and_(CartItem.id == item_id, CartItem.cart_id == cart.id)
+            update(CartItem)
+            .where(
+                CartItem.id == item_id,
+                CartItem.cart_id.in_(self._user_cart_ids(user_id)),
+                or_(CartItem.quantity >= item_data.quantity, stock >= item_data.quantity)
             )
+            .values(quantity=item_data.quantity)
+            .returning(CartItem)
+            .execution_options(populate_existing=True, synchronize_session=False)
         )
         cart_item = result.scalar_one_or_none()
         
-        if not cart_item:
-            return None
+        if cart_item is None:
+            # Slow path, only to tell a missing line from a stock shortfall
+            result = await self.db.execute(
+                select(CartItem.product_id, CartItem.size, CartItem.color).where(
+                    and_(CartItem.id == item_id, CartItem.cart_id.in_(self._user_cart_ids(user_id)))
+                )
+            )
+            line = result.one_or_none()
+            if line is None:
+                return None
+            self._raise_unavailable(await self._variant_stock(*line))
         
-        cart_item.quantity = item_data.quantity
+        set_committed_value(cart_item, "product", await self.db.get(Product, cart_item.product_id))
         await self.db.commit()
-        await self.db.refresh(cart_item)
         return cart_item
     
     async def remove_cart_item(self, user_id: int, item_id: int) -> bool:
         """Remove item from cart"""
-        cart = await self.get_or_create_cart(user_id)
-        
         result = await self.db.execute(
-            select(CartItem).where(
-                and_(CartItem.id == item_id, CartItem.cart_id == cart.id)
-            )
+            delete(CartItem)
+            .where(and_(CartItem.id == item_id, CartItem.cart_id.in_(self._user_cart_ids(user_id))))
+            .returning(CartItem.id)
+            .execution_options(synchronize_session=False)
         )
-        cart_item = result.scalar_one_or_none()
-        
-        if not cart_item:
+        if result.scalar_one_or_none() is None:
             return False
         
-        await self.db.delete(cart_item)
         await self.db.commit()
         return True
     
     async def clear_cart(self, user_id: int) -> bool:
         """Clear all items from cart"""
-        cart = await self.get_or_create_cart(user_id)
-        
-        # Delete all cart items
         await self.db.execute(
-            select(CartItem).where(CartItem.cart_id == cart.id)
+            delete(CartItem)
+            .where(CartItem.cart_id.in_(self._user_cart_ids(user_id)))
+            .execution_options(synchronize_session=False)
         )
-        
-        for item in cart.items:
-            await self.db.delete(item)
-        
         await self.db.commit()
         return True
     
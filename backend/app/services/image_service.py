@@ -0,0 +1,245 @@
+from typing import Dict, Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from fastapi import HTTPException, UploadFile, status
+import anyio
+import asyncio
+import hashlib
+import os
+import tempfile
+
+from app.config import settings
+from app.models.product import Product, ProductImage
+from app.cache import bump_catalog_version, catalog_cache
+from app.services.product_service import FEATURED_CACHE_KEY, product_cache_key
+from app.services.product_document_service import ProductDocumentService
+
+ALLOWED_CONTENT_TYPES = {"image/jpeg", "image/png", "image/webp"}
+# Pillow format name -> extension of the stored original
+ALLOWED_FORMATS = {"jpeg": "jpg", "png": "png", "webp": "webp"}
+
+# Process pool for Pillow work, created lazily so importing this module is cheap
+_image_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_image_pool() -> ProcessPoolExecutor:
+    """Get the shared image processing pool"""
+    global _image_pool
+    if _image_pool is None:
+        _image_pool = ProcessPoolExecutor(max_workers=settings.image_workers)
+    return _image_pool
+
+
+def shutdown_image_pool():
+    """Shut down the image processing pool"""
+    global _image_pool
+    if _image_pool is not None:
+        _image_pool.shutdown(wait=True, cancel_futures=True)
+        _image_pool = None
+
+
+def _image_dir(digest: str) -> str:
+    """Directory holding the original and variants for a content hash"""
+    return os.path.join(settings.upload_dir, "images", digest[:2])
+
+
+def _image_url(digest: str, filename: str) -> str:
+    """Public URL for a stored image file"""
+    return f"{settings.upload_url_prefix}/images/{digest[:2]}/{filename}"
+
+
+def render_variants(
+    source_path: str,
+    digest: str,
+    target_dir: str,
+    sizes: Dict[str, int],
+    quality: int
+) -> Dict[str, Dict[str, str]]:
+    """Resize an original into variants and encode them (runs in a worker process)
+
+    Returns variant name -> {format: filename}. Files that already exist are
+    reused, so re-uploading the same content does no image work.
+    """
+    from PIL import Image
+
+    # WebP only: Pillow < 11 has no AVIF encoder
+    formats = ["webp"]
+
+    variants: Dict[str, Dict[str, str]] = {}
+    pending = []
+    for name, max_side in sizes.items():
+        variants[name] = {}
+        for fmt in formats:
+            filename = f"{digest}_{name}.{fmt}"
+            variants[name][fmt] = filename
+            if not os.path.exists(os.path.join(target_dir, filename)):
+                pending.append((name, max_side, fmt, filename))
+
+    if not pending:
+        return variants
+
+    with Image.open(source_path) as img:
+        img.load()
+        if img.mode not in ("RGB", "RGBA"):
+            img = img.convert("RGBA" if "transparency" in img.info else "RGB")
+
+        for name, max_side, fmt, filename in pending:
+            variant = img.copy()
+            variant.thumbnail((max_side, max_side), Image.LANCZOS)
+            # Write to a temp name and rename so readers never see partial files
+            tmp_path = os.path.join(target_dir, f".{filename}.tmp")
+            save_options = {"quality": quality}
+            if fmt == "webp":
+                save_options["method"] = 4
+            variant.save(tmp_path, format=fmt.upper(), **save_options)
+            os.replace(tmp_path, os.path.join(target_dir, filename))
+
+    return variants
+
+
+def verify_image(path: str) -> Optional[str]:
+    """Verify an uploaded file is a decodable image and return its extension
+
+    Returns None for formats outside ALLOWED_FORMATS, whatever the client
+    claimed as the content type.
+    """
+    from PIL import Image
+
+    with Image.open(path) as img:
+        img.verify()
+        fmt = (img.format or "").lower()
+    return ALLOWED_FORMATS.get(fmt)
+
+
+def save_upload(source) -> Tuple[str, str]:
+    """Copy a spooled upload body to a temp file in chunks (runs in a thread)
+
+    Returns (sha256 digest, temp path); the temp file is removed if the
+    copy fails or passes max_file_size.
+    """
+    os.makedirs(settings.upload_dir, exist_ok=True)
+    hasher = hashlib.sha256()
+    size = 0
+    fd, tmp_path = tempfile.mkstemp(dir=settings.upload_dir, prefix=".upload-")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while chunk := source.read(settings.upload_chunk_size):
+                size += len(chunk)
+                if size > settings.max_file_size:
+                    raise HTTPException(
+                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                        detail="File too large"
+                    )
+                hasher.update(chunk)
+                out.write(chunk)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return hasher.hexdigest(), tmp_path
+
+
+class ImageService:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def store_upload(self, file: UploadFile) -> tuple[str, str]:
+        """Copy an upload into the upload dir, returning (digest, temp path)
+
+        Starlette has already spooled the request body (in memory, or on disk
+        when large); the copy and hash run in one worker thread so neither
+        the reads nor the writes block the event loop.
+        """
+        if file.content_type not in ALLOWED_CONTENT_TYPES:
+            raise HTTPException(
+                status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                detail="Unsupported image type"
+            )
+
+        return await anyio.to_thread.run_sync(save_upload, file.file)
+
+    async def process_image(self, digest: str, tmp_path: str) -> Dict[str, Dict[str, str]]:
+        """Move an upload to its content-addressed path and build its variants"""
+        loop = asyncio.get_running_loop()
+        pool = get_image_pool()
+
+        try:
+            ext = await loop.run_in_executor(pool, verify_image, tmp_path)
+        except Exception:
+            os.unlink(tmp_path)
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid image file"
+            )
+        if ext is None:
+            os.unlink(tmp_path)
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Unsupported image format"
+            )
+
+        target_dir = _image_dir(digest)
+        os.makedirs(target_dir, exist_ok=True)
+        original_path = os.path.join(target_dir, f"{digest}.{ext}")
+        if os.path.exists(original_path):
+            # Same content already stored - deduplicate
+            os.unlink(tmp_path)
+        else:
+            os.replace(tmp_path, original_path)
+
+        filenames = await loop.run_in_executor(
+            pool,
+            render_variants,
+            original_path,
+            digest,
+            target_dir,
+            dict(settings.image_variant_sizes),
+            settings.image_quality
+        )
+
+        variants = {
+            name: {fmt: _image_url(digest, filename) for fmt, filename in formats.items()}
+            for name, formats in filenames.items()
+        }
+        variants["original"] = {ext: _image_url(digest, os.path.basename(original_path))}
+        return variants
+
+    async def add_product_image(
+        self,
+        product_id: int,
+        file: UploadFile,
+        alt_text: Optional[str] = None,
+        is_main: bool = False,
+        sort_order: int = 0
+    ) -> Optional[ProductImage]:
+        """Upload an image and attach it to a product"""
+        result = await self.db.execute(
+            select(Product.id).where(Product.id == product_id)
+        )
+        if result.scalar_one_or_none() is None:
+            return None
+
+        digest, tmp_path = await self.store_upload(file)
+        variants = await self.process_image(digest, tmp_path)
+
+        detail = variants.get("detail", {})
+        image_url = detail.get("webp") or next(iter(variants["original"].values()))
+
+        db_image = ProductImage(
+            product_id=product_id,
+            image_url=image_url,
+            alt_text=alt_text,
+            is_main=is_main,
+            sort_order=sort_order,
+            content_hash=digest,
+            variants=variants
+        )
+        self.db.add(db_image)
+        await self.db.commit()
+        await self.db.refresh(db_image)
+        await ProductDocumentService(self.db).refresh(product_id)
+        await catalog_cache.invalidate(FEATURED_CACHE_KEY)
+        # The detail was just rewritten; serving the old one stale would undo the edit
+        await catalog_cache.delete(product_cache_key(product_id))
+        await bump_catalog_version()
+        return db_image
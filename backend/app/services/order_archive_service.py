@@ -0,0 +1,215 @@
+from typing import List, Optional, Tuple
+from datetime import date, datetime, timedelta, timezone
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import delete, func, select, text
+from sqlalchemy.orm import selectinload
+import logging
+import re
+import zlib
+
+from app.config import settings
+from app.database import IS_SQLITE, upsert
+from app.models.order import Order, OrderArchive, OrderItem
+from app.schemas.order import OrderResponse
+
+logger = logging.getLogger(__name__)
+
+# Children first, so items are detached before the orders they reference
+PARTITIONED_TABLES = ("order_items", "orders")
+MONTHLY_PARTITION = re.compile(r"^orders_p(\d{4})(\d{2})$")
+# Catch-all partitions created by migration 0008, and the partition keys
+DEFAULT_PARTITION = {"order_items": "order_items_default", "orders": "orders_default"}
+PARTITION_COLUMN = {"orders": "created_at", "order_items": "order_created_at"}
+# pg_advisory_xact_lock key held while creating partitions
+PARTITION_LOCK_ID = 720_311_041
+
+ORDER_PARTITIONS = text("""
+    SELECT c.relname
+    FROM pg_inherits i
+    JOIN pg_class c ON c.oid = i.inhrelid
+    WHERE i.inhparent = 'orders'::regclass
+""")
+
+
+def next_month(month: date) -> date:
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def month_bounds(month: date) -> Tuple[datetime, datetime]:
+    """UTC range covered by a monthly partition"""
+    end = next_month(month)
+    return (
+        datetime(month.year, month.month, 1, tzinfo=timezone.utc),
+        datetime(end.year, end.month, 1, tzinfo=timezone.utc)
+    )
+
+
+class OrderArchiveService:
+    """Monthly order partitions and archival of cold order history
+
+    orders and order_items are range partitioned by month on the order's
+    created_at. Partitions are created ahead of time; once a month lies
+    entirely past the archive horizon its orders are copied into
+    order_archive as compressed OrderResponse documents and both
+    partitions are dropped. SQLite (embedded mode) has no partitioning;
+    there a month is archived by deleting its rows instead.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def partition_months(self) -> List[date]:
+        """Months that currently have a live orders partition"""
+        if IS_SQLITE:
+            result = await self.db.execute(select(func.strftime("%Y-%m", Order.created_at)).distinct())
+            return sorted(date(int(month[:4]), int(month[5:7]), 1) for month in result.scalars())
+        result = await self.db.execute(ORDER_PARTITIONS)
+        months = []
+        for name in result.scalars():
+            match = MONTHLY_PARTITION.match(name)
+            if match:
+                months.append(date(int(match.group(1)), int(match.group(2)), 1))
+        return sorted(months)
+
+    async def ensure_partitions(self, months_ahead: Optional[int] = None) -> List[date]:
+        """Create missing partitions from this month through months_ahead
+
+        Any instance may call this; one at a time does the work, the others
+        return at once. Rows that already fell into the DEFAULT partition for
+        a missing month are moved into the new partition.
+        """
+        if IS_SQLITE:
+            return []
+        if months_ahead is None:
+            months_ahead = settings.order_partitions_ahead_months
+        locked = await self.db.scalar(text(f"SELECT pg_try_advisory_xact_lock({PARTITION_LOCK_ID})"))
+        if not locked:
+            await self.db.rollback()
+            return []
+        existing = set(await self.partition_months())
+        today = datetime.now(timezone.utc).date()
+        month = date(today.year, today.month, 1)
+        created = []
+        for _ in range(months_ahead + 1):
+            if month not in existing:
+                await self._create_partition(month)
+                created.append(month)
+            month = next_month(month)
+        await self.db.commit()
+        if created:
+            logger.info(f"Created order partitions for {', '.join(f'{m:%Y-%m}' for m in created)}")
+        return created
+
+    async def _create_partition(self, month: date):
+        start, end = month_bounds(month)
+        bounds = f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+        suffix = f"p{month:%Y%m}"
+        await self.db.execute(text(f"LOCK TABLE {', '.join(DEFAULT_PARTITION.values())} IN EXCLUSIVE MODE"))
+        stranded = await self.db.scalar(
+            text("SELECT EXISTS (SELECT 1 FROM orders_default WHERE created_at >= :start AND created_at < :end)"),
+            {"start": start, "end": end}
+        )
+        if not stranded:
+            for table in PARTITIONED_TABLES:
+                await self.db.execute(text(f"CREATE TABLE IF NOT EXISTS {table}_{suffix} PARTITION OF {table} {bounds}"))
+            return
+
+        # A partition cannot be added while DEFAULT holds rows in its range:
+        # fill a standalone table with those rows, delete them from DEFAULT
+        # (items first, for the foreign key) and attach the table, orders first
+        for table in PARTITIONED_TABLES:
+            column = PARTITION_COLUMN[table]
+            await self.db.execute(text(f"CREATE TABLE {table}_{suffix} (LIKE {table} INCLUDING DEFAULTS)"))
+            await self.db.execute(
+                text(f"INSERT INTO {table}_{suffix} SELECT * FROM {DEFAULT_PARTITION[table]} WHERE {column} >= :start AND {column} < :end"),
+                {"start": start, "end": end}
+            )
+            moved = await self.db.execute(
+                text(f"DELETE FROM {DEFAULT_PARTITION[table]} WHERE {column} >= :start AND {column} < :end"),
+                {"start": start, "end": end}
+            )
+            logger.warning(f"Moved {moved.rowcount} {table} rows for {month:%Y-%m} out of the default partition")
+        for table in reversed(PARTITIONED_TABLES):
+            await self.db.execute(text(f"ALTER TABLE {table} ATTACH PARTITION {table}_{suffix} {bounds}"))
+
+    async def archive(self, after_days: Optional[int] = None) -> int:
+        """Archive every monthly partition entirely older than the horizon"""
+        if after_days is None:
+            after_days = settings.order_archive_after_days
+        cutoff = datetime.now(timezone.utc) - timedelta(days=after_days)
+        archived = 0
+        for month in await self.partition_months():
+            if month_bounds(month)[1] <= cutoff:
+                archived += await self.archive_partition(month)
+        return archived
+
+    async def archive_partition(self, month: date) -> int:
+        """Move one month's orders into order_archive and drop its partitions
+
+        Runs as one transaction; the partition is locked against writes so
+        no update can land between copying an order and dropping it.
+        """
+        start, end = month_bounds(month)
+        suffix = f"p{month:%Y%m}"
+        if not IS_SQLITE:
+            await self.db.execute(text(f"LOCK TABLE orders_{suffix}, order_items_{suffix} IN EXCLUSIVE MODE"))
+
+        archived = 0
+        last_id = 0
+        while True:
+            result = await self.db.execute(
+                select(Order).options(selectinload(Order.items))
+                .where(Order.created_at >= start, Order.created_at < end, Order.id > last_id)
+                .order_by(Order.id)
+                .limit(settings.order_archive_batch_size)
+            )
+            orders = result.scalars().all()
+            if not orders:
+                break
+            stmt = upsert(OrderArchive).values([
+                {
+                    "order_number": order.order_number,
+                    "order_id": order.id,
+                    "user_id": order.user_id,
+                    "created_at": order.created_at,
+                    "document": zlib.compress(OrderResponse.model_validate(order).model_dump_json().encode(), 9)
+                }
+                for order in orders
+            ])
+            await self.db.execute(stmt.on_conflict_do_nothing(index_elements=[OrderArchive.order_number]))
+            archived += len(orders)
+            last_id = orders[-1].id
+            self.db.expunge_all()
+
+        if IS_SQLITE:
+            await self.db.execute(delete(OrderItem).where(OrderItem.order_created_at >= start, OrderItem.order_created_at < end))
+            await self.db.execute(delete(Order).where(Order.created_at >= start, Order.created_at < end))
+        else:
+            for table in PARTITIONED_TABLES:
+                await self.db.execute(text(f"ALTER TABLE {table} DETACH PARTITION {table}_{suffix}"))
+                await self.db.execute(text(f"DROP TABLE {table}_{suffix}"))
+        await self.db.commit()
+        logger.info(f"Archived {archived} orders from {month:%Y-%m}")
+        return archived
+
+    async def get_archived_order(self, order_number: str, user_id: Optional[int] = None) -> Optional[OrderResponse]:
+        """Archived order by number, optionally restricted to its owner"""
+        query = select(OrderArchive.document).where(OrderArchive.order_number == order_number)
+        if user_id:
+            query = query.where(OrderArchive.user_id == user_id)
+        result = await self.db.execute(query)
+        document = result.scalar_one_or_none()
+        if document is None:
+            return None
+        return OrderResponse.model_validate_json(zlib.decompress(document))
+
+    async def get_archived_order_by_id(self, order_id: int, user_id: Optional[int] = None) -> Optional[OrderResponse]:
+        """Archived order by ID, optionally restricted to its owner"""
+        query = select(OrderArchive.document).where(OrderArchive.order_id == order_id)
+        if user_id:
+            query = query.where(OrderArchive.user_id == user_id)
+        result = await self.db.execute(query)
+        document = result.scalar_one_or_none()
+        if document is None:
+            return None
+        return OrderResponse.model_validate_json(zlib.decompress(document))
\ No newline at end of file
@@ -1,15 +1,44 @@
-from typing import List, Optional, Tuple
+from typing import List, Optional, Tuple, Union
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, and_
+from sqlalchemy import select, insert, update, delete, func, and_, bindparam, lambda_stmt
 from sqlalchemy.orm import selectinload
+from sqlalchemy.orm.attributes import set_committed_value
 from fastapi import HTTPException, status
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+import re
 import uuid
 
-from app.models.order import Order, OrderItem, Cart, CartItem
+from app.config import settings
+from app.database import upsert
+from app.models.order import Order, OrderItem, OrderNumber, OrderStatus, PaymentStatus, Cart, CartItem
+from app.models.product import Product
 from app.models.user import User
-from app.schemas.order import OrderCreate, OrderUpdate
+from app.schemas.order import OrderCreate, OrderUpdate, OrderResponse
+from app.services.cart_service import CartService
+from app.services.order_archive_service import OrderArchiveService
+from app.jobs import enqueue_job
+from app.tracing import trace_methods
 
+# Hot statements are built once; parameters are bound per call. The
+# created_at bound lets Postgres skip partitions older than "since"
+USER_ORDER_COUNT = select(func.count()).select_from(Order).where(
+    Order.user_id == bindparam("user_id"), Order.created_at >= bindparam("since")
+)
+USER_ORDERS = (
+    select(Order).options(selectinload(Order.items).selectinload(OrderItem.product))
+    .where(Order.user_id == bindparam("user_id"), Order.created_at >= bindparam("since"))
+    .order_by(Order.created_at.desc())
+    .offset(bindparam("skip"))
+    .limit(bindparam("limit"))
+)
+
+# Order numbers embed the date they were placed: NK20261019AB12CD34
+ORDER_NUMBER_DATE = re.compile(r"^NK(\d{8})")
+# "since" for listings that include every live partition
+ALL_ORDERS_SINCE = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+@trace_methods
 class OrderService:
     def __init__(self, db: AsyncSession):
         self.db = db
@@ -20,160 +49,279 @@ class OrderService:
         unique_id = str(uuid.uuid4())[:8].upper()
         return f"NK{timestamp}{unique_id}"
     
+    async def _claim_order_number(self) -> str:
+        """Generate an order number and record it in order_numbers
+        
+        orders is partitioned on created_at, so its unique index cannot cover
+        order_number alone; the registry keeps numbers unique across
+        partitions and the archive. A taken number is simply regenerated.
+        """
+        while True:
+            order_number = self._generate_order_number()
+            result = await self.db.execute(
+                upsert(OrderNumber).values(order_number=order_number)
+                .on_conflict_do_nothing()
+                .returning(OrderNumber.order_number)
+            )
+            if result.scalar_one_or_none() is not None:
+                return order_number
+    
+    def _recent_since(self) -> datetime:
+        """Start of the window most order lookups fall in, for partition pruning"""
+        return datetime.now(timezone.utc) - timedelta(days=settings.order_recent_days)
+    
+    def _order_number_window(self, order_number: str) -> Optional[Tuple[datetime, datetime]]:
+        """created_at range an order number can fall in, so lookups prune partitions"""
+        match = ORDER_NUMBER_DATE.match(order_number)
+        if not match:
+            return None
+        try:
+            day = datetime.strptime(match.group(1), "%Y%m%d").replace(tzinfo=timezone.utc)
+        except ValueError:
+            return None
+        # The number uses the app server's local date; allow a day either side
+        return day - timedelta(days=1), day + timedelta(days=2)
+    
     async def create_order_from_cart(self, user_id: int, order_data: OrderCreate) -> Order:
         """Create order from user's cart"""
-        # Get user's cart
-        cart_result = await self.db.execute(
-            select(Cart).options(
-                selectinload(Cart.items).selectinload(CartItem.product)
-            ).where(Cart.user_id == user_id)
+        # Take the lines out of the cart; concurrent adds land in a fresh line
+        # and are not swept into this order unpriced
+        result = await self.db.execute(
+            delete(CartItem)
+            .where(CartItem.cart_id.in_(select(Cart.id).where(Cart.user_id == user_id)))
+            .returning(CartItem.product_id, CartItem.quantity, CartItem.size, CartItem.color)
+            .execution_options(synchronize_session=False)
         )
-        cart = cart_result.scalar_one_or_none()
+        lines = result.all()
         
-        if not cart or not cart.items:
+        if not lines:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Cart is empty"
             )
         
+        # Stock is taken now, not when added to the cart. Variant order keeps
+        # concurrent checkouts from locking the same rows in opposite orders;
+        # a shortfall rolls the cart lines back with everything else
+        cart_service = CartService(self.db)
+        for line in sorted(lines, key=lambda line: (line.product_id, line.size, line.color)):
+            await cart_service.reserve_stock(line.product_id, line.size, line.color, line.quantity)
+        
+        price_result = await self.db.execute(
+            select(Product.id, Product.price).where(Product.id.in_({line.product_id for line in lines}))
+        )
+        prices = dict(price_result.all())
+        
         # Calculate totals
-        subtotal = sum(item.total_price for item in cart.items)
-        tax_amount = subtotal * 0.08  # 8% tax
-        shipping_amount = 10.00 if subtotal < 100 else 0  # Free shipping over $100
+        subtotal = sum(prices[line.product_id] * line.quantity for line in lines)
+        tax_amount = (subtotal * Decimal("0.08")).quantize(Decimal("0.01"))  # 8% tax
+        shipping_amount = Decimal("10.00") if subtotal < 100 else Decimal("0")  # Free shipping over $100
         total_amount = subtotal + tax_amount + shipping_amount
         
         # Create order
-        order = Order(
-            user_id=user_id,
-            order_number=self._generate_order_number(),
-            subtotal=subtotal,
-            tax_amount=tax_amount,
-            shipping_amount=shipping_amount,
-            total_amount=total_amount,
-            **order_data.model_dump()
+        result = await self.db.execute(
+            insert(Order)
+            .values(
+                user_id=user_id,
+                order_number=await self._claim_order_number(),
+                subtotal=subtotal,
+                tax_amount=tax_amount,
+                shipping_amount=shipping_amount,
+                total_amount=total_amount,
+                **order_data.model_dump()
+            )
+            .returning(Order)
         )
+        order = result.scalar_one()
         
-        self.db.add(order)
-        await self.db.flush()  # Get order ID
-        
-        # Create order items from cart items
-        for cart_item in cart.items:
-            order_item = OrderItem(
-                order_id=order.id,
-                product_id=cart_item.product_id,
-                quantity=cart_item.quantity,
-                size=cart_item.size,
-                color=cart_item.color,
-                unit_price=cart_item.unit_price,
-                total_price=cart_item.total_price
-            )
-            self.db.add(order_item)
+        # Create order items from cart lines in one multi-row INSERT
+        items = await self.db.scalars(
+            insert(OrderItem).returning(OrderItem),
+            [
+                {
+                    "order_id": order.id,
+                    "order_created_at": order.created_at,
+                    "product_id": line.product_id,
+                    "quantity": line.quantity,
+                    "size": line.size,
+                    "color": line.color,
+                    "unit_price": prices[line.product_id],
+                    "total_price": prices[line.product_id] * line.quantity
+                }
+                for line in lines
+            ]
+        )
+        set_committed_value(order, "items", items.all())
         
-        # Clear cart
-        for cart_item in cart.items:
-            await self.db.delete(cart_item)
+        # Side effects run in the background once the order commits
+        enqueue_job(self.db, "send_order_confirmation", {"order_id": order.id})
         
         await self.db.commit()
-        await self.db.refresh(order)
         return order
     
-    async def get_order_by_id(self, order_id: int, user_id: Optional[int] = None) -> Optional[Order]:
-        """Get order by ID"""
-        query = select(Order).options(
-            selectinload(Order.items).selectinload(OrderItem.product),
-            selectinload(Order.user)
-        ).where(Order.id == order_id)
-        
-        if user_id:
-            query = query.where(Order.user_id == user_id)
-        
-        result = await self.db.execute(query)
-        return result.scalar_one_or_none()
+    async def get_order_by_id(
+        self, order_id: int, user_id: Optional[int] = None
+    ) -> Optional[Union[Order, OrderResponse]]:
+        """Get order by ID: recent partitions first, then older ones, then the archive"""
+        for since in (self._recent_since(), None):
+            query = lambda_stmt(lambda: select(Order).options(
+                selectinload(Order.items).selectinload(OrderItem.product),
+                selectinload(Order.user)
+            ).where(Order.id == order_id))
+            
+            if user_id:
+                query += lambda q: q.where(Order.user_id == user_id)
+            if since is not None:
+                query += lambda q: q.where(Order.created_at >= since)
+            
+            result = await self.db.execute(query)
+            order = result.scalar_one_or_none()
+            if order is not None:
+                return order
+        return await OrderArchiveService(self.db).get_archived_order_by_id(order_id, user_id)
     
-    async def get_order_by_number(self, order_number: str, user_id: Optional[int] = None) -> Optional[Order]:
-        """Get order by order number"""
-        query = select(Order).options(
+    async def get_order_by_number(
+        self, order_number: str, user_id: Optional[int] = None
+    ) -> Optional[Union[Order, OrderResponse]]:
+        """Get order by order number, falling back to the order archive"""
+        query = lambda_stmt(lambda: select(Order).options(
             selectinload(Order.items).selectinload(OrderItem.product),
             selectinload(Order.user)
-        ).where(Order.order_number == order_number)
+        ).where(Order.order_number == order_number))
         
         if user_id:
-            query = query.where(Order.user_id == user_id)
+            query += lambda q: q.where(Order.user_id == user_id)
+        
+        window = self._order_number_window(order_number)
+        if window:
+            start, end = window
+            query += lambda q: q.where(Order.created_at >= start, Order.created_at < end)
         
         result = await self.db.execute(query)
-        return result.scalar_one_or_none()
+        order = result.scalar_one_or_none()
+        if order is None:
+            return await OrderArchiveService(self.db).get_archived_order(order_number, user_id)
+        return order
     
     async def get_user_orders(
         self, 
         user_id: int, 
         skip: int = 0, 
-        limit: int = 20
+        limit: int = 20,
+        include_older: bool = False
     ) -> Tuple[List[Order], int]:
-        """Get user's orders with pagination"""
+        """Get user's orders with pagination, by default only the last order_recent_days"""
+        since = ALL_ORDERS_SINCE if include_older else self._recent_since()
+        
         # Get total count
-        count_result = await self.db.execute(
-            select(func.count()).select_from(Order).where(Order.user_id == user_id)
-        )
+        count_result = await self.db.execute(USER_ORDER_COUNT, {"user_id": user_id, "since": since})
         total = count_result.scalar()
         
         # Get orders
         result = await self.db.execute(
-            select(Order).options(
-                selectinload(Order.items).selectinload(OrderItem.product)
-            ).where(Order.user_id == user_id)
-            .order_by(Order.created_at.desc())
-            .offset(skip)
-            .limit(limit)
+            USER_ORDERS, {"user_id": user_id, "since": since, "skip": skip, "limit": limit}
         )
         orders = result.scalars().all()
         
         return orders, total
     
-    async def get_all_orders(
+    async def get_order_summaries(
         self, 
         skip: int = 0, 
         limit: int = 20,
-        status: Optional[str] = None
-    ) -> Tuple[List[Order], int]:
-        """Get all orders (admin only)"""
-        query = select(Order).options(
-            selectinload(Order.items).selectinload(OrderItem.product),
-            selectinload(Order.user)
-        )
-        
+        status: Optional[OrderStatus] = None,
+        payment_status: Optional[PaymentStatus] = None,
+        user_id: Optional[int] = None,
+        customer_email: Optional[str] = None,
+        created_from: Optional[datetime] = None,
+        created_to: Optional[datetime] = None
+    ) -> Tuple[List[dict], int]:
+        """Get order summary rows for the admin listing"""
+        filters = []
         if status:
-            query = query.where(Order.status == status)
+            filters.append(Order.status == status)
+        if payment_status:
+            filters.append(Order.payment_status == payment_status)
+        if user_id:
+            filters.append(Order.user_id == user_id)
+        if customer_email:
+            filters.append(Order.user_id == select(User.id).where(User.email == customer_email).scalar_subquery())
+        if created_from:
+            filters.append(Order.created_at >= created_from)
+        if created_to:
+            filters.append(Order.created_at < created_to)
         
-        # Get total count
-        count_query = select(func.count()).select_from(query.subquery())
-        count_result = await self.db.execute(count_query)
+        count_result = await self.db.execute(select(func.count()).select_from(Order).where(*filters))
         total = count_result.scalar()
         
-        # Get orders with pagination
-        query = query.order_by(Order.created_at.desc()).offset(skip).limit(limit)
+        # Correlated so only the page's orders are aggregated, via ix_order_items_order_id
+        item_count = (
+            select(func.coalesce(func.sum(OrderItem.quantity), 0))
+            .where(OrderItem.order_id == Order.id, OrderItem.order_created_at == Order.created_at)
+            .scalar_subquery()
+        )
+        query = (
+            select(
+                Order.id,
+                Order.order_number,
+                Order.user_id,
+                (User.first_name + " " + User.last_name).label("customer_name"),
+                User.email.label("customer_email"),
+                Order.status,
+                Order.payment_status,
+                Order.subtotal,
+                Order.total_amount,
+                item_count.label("item_count"),
+                Order.created_at
+            )
+            .join(User, User.id == Order.user_id)
+            .where(*filters)
+            .order_by(Order.created_at.desc())
+            .offset(skip)
+            .limit(limit)
+        )
         result = await self.db.execute(query)
-        orders = result.scalars().all()
-        
-        return orders, total
+        return result.mappings().all(), total
     
     async def update_order(self, order_id: int, order_data: OrderUpdate) -> Optional[Order]:
         """Update order (admin only)"""
-        order = await self.get_order_by_id(order_id)
-        if not order:
+        update_data = order_data.model_dump(exclude_unset=True)
+        
+        # Set timestamps based on status changes, keeping the first one
+        if order_data.status == OrderStatus.SHIPPED:
+            update_data["shipped_at"] = func.coalesce(Order.shipped_at, func.now())
+        elif order_data.status == OrderStatus.DELIVERED:
+            update_data["delivered_at"] = func.coalesce(Order.delivered_at, func.now())
+        
+        # Recent partitions first; older orders are rarely updated
+        for window in ([Order.created_at >= self._recent_since()], []):
+            if update_data:
+                result = await self.db.execute(
+                    update(Order)
+                    .where(Order.id == order_id, *window)
+                    .values(**update_data)
+                    .returning(Order)
+                    .execution_options(populate_existing=True, synchronize_session=False)
+                )
+            else:
+                result = await self.db.execute(select(Order).where(Order.id == order_id, *window))
+            order = result.scalar_one_or_none()
+            if order is not None:
+                break
+        else:
             return None
         
-        # Update fields
-        update_data = order_data.model_dump(exclude_unset=True)
-        for field, value in update_data.items():
-            setattr(order, field, value)
+        items = await self.db.scalars(
+            select(OrderItem).where(OrderItem.order_id == order_id, OrderItem.order_created_at == order.created_at)
+        )
+        set_committed_value(order, "items", items.all())
         
-        # Set timestamps based on status changes
         if order_data.status:
-            if order_data.status == "shipped" and not order.shipped_at:
-                order.shipped_at = datetime.utcnow()
-            elif order_data.status == "delivered" and not order.delivered_at:
-                order.delivered_at = datetime.utcnow()
+            enqueue_job(
+                self.db,
+                "order_status_changed",
+                {"order_id": order.id, "status": order_data.status.value}
+            )
         
         await self.db.commit()
-        await self.db.refresh(order)
         return order
\ No newline at end of file
@@ -0,0 +1,115 @@
+from typing import Dict, Iterable, List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func, bindparam
+from sqlalchemy.orm import joinedload, selectinload
+import json
+
+from app.database import upsert
+from app.models.product import Product, ProductDocument
+from app.schemas.product import ProductResponse
+
+DOCUMENT_BY_PRODUCT = select(ProductDocument.document).where(
+    ProductDocument.product_id == bindparam("product_id")
+)
+
+class ProductDocumentService:
+    """Materialized product detail documents
+    
+    Each product's full detail response (category, ordered images, variants
+    and the derived sale fields) is rendered once on write and stored as JSON text,
+    so reads are a primary-key lookup returning bytes.
+    """
+    
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    def render(self, product: Product) -> str:
+        """Render the detail document for a fully loaded product"""
+        response = ProductResponse.model_validate(product)
+        response.images.sort(key=lambda image: (image.sort_order, image.id))
+        return response.model_dump_json()
+    
+    async def _load_products(self, product_ids: Iterable[int]) -> List[Product]:
+        result = await self.db.execute(
+            select(Product).options(
+                joinedload(Product.category),
+                selectinload(Product.images),
+                selectinload(Product.variants)
+            ).where(Product.id.in_(list(product_ids)))
+            # Objects may already be in the session with stale relationships
+            .execution_options(populate_existing=True)
+        )
+        return result.scalars().all()
+    
+    async def refresh(self, *product_ids: int) -> Dict[int, str]:
+        """Re-render and store documents for the given products and commit"""
+        products = await self._load_products(product_ids)
+        documents = {product.id: self.render(product) for product in products}
+        if documents:
+            stmt = upsert(ProductDocument).values([
+                {"product_id": product_id, "document": document}
+                for product_id, document in documents.items()
+            ])
+            await self.db.execute(stmt.on_conflict_do_update(
+                index_elements=[ProductDocument.product_id],
+                set_={"document": stmt.excluded.document, "updated_at": func.now()}
+            ))
+        await self.db.commit()
+        return documents
+    
+    async def get_document(self, product_id: int) -> Optional[str]:
+        """Stored document for a product, built on first read if missing"""
+        result = await self.db.execute(DOCUMENT_BY_PRODUCT, {"product_id": product_id})
+        document = result.scalar_one_or_none()
+        if document is None:
+            document = (await self.refresh(product_id)).get(product_id)
+        return document
+    
+    async def rebuild_all(self, batch_size: int = 500) -> int:
+        """Re-render every product's document; used after bulk imports"""
+        rebuilt = 0
+        last_id = 0
+        while True:
+            result = await self.db.execute(
+                select(Product.id).where(Product.id > last_id).order_by(Product.id).limit(batch_size)
+            )
+            product_ids = result.scalars().all()
+            if not product_ids:
+                return rebuilt
+            await self.refresh(*product_ids)
+            rebuilt += len(product_ids)
+            last_id = product_ids[-1]
+            self.db.expunge_all()
+    
+    async def check(self, batch_size: int = 500) -> Dict[str, List[int]]:
+        """Compare stored documents against freshly rendered ones"""
+        report = {"missing": [], "stale": [], "orphaned": []}
+        last_id = 0
+        while True:
+            result = await self.db.execute(
+                select(Product.id).where(Product.id > last_id).order_by(Product.id).limit(batch_size)
+            )
+            product_ids = result.scalars().all()
+            if not product_ids:
+                break
+            products = await self._load_products(product_ids)
+            result = await self.db.execute(
+                select(ProductDocument.product_id, ProductDocument.document)
+                .where(ProductDocument.product_id.in_(product_ids))
+            )
+            stored = dict(result.all())
+            for product in products:
+                if product.id not in stored:
+                    report["missing"].append(product.id)
+                elif json.loads(stored[product.id]) != json.loads(self.render(product)):
+                    report["stale"].append(product.id)
+            last_id = product_ids[-1]
+            self.db.expunge_all()
+        
+        result = await self.db.execute(
+            select(ProductDocument.product_id).where(
+                ProductDocument.product_id.not_in(select(Product.id))
+            )
+        )
+        report["orphaned"] = result.scalars().all()
+        return report
\ No newline at end of file
@@ -1,37 +1,246 @@
-from typing import List, Optional, Tuple
+from typing import FrozenSet, List, NamedTuple, Optional, Sequence, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, and_, or_
-from sqlalchemy.orm import selectinload
+from sqlalchemy import select, insert, update, func, and_, or_, tuple_, bindparam, lambda_stmt
+from sqlalchemy.sql.lambdas import StatementLambdaElement
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import load_only, selectinload
 from fastapi import HTTPException, status
 
-from app.models.product import Product, Category, ProductImage
-from app.schemas.product import ProductCreate, ProductUpdate, CategoryCreate
+from app.cache import bump_catalog_version, catalog_cache
+from app.config import settings
+from app.database import AsyncSessionLocal, upsert
+from app.models.product import Product, Category, ProductImage, ProductVariant
+from app.schemas.product import ProductCreate, ProductUpdate, ProductResponse, CategoryCreate, CategoryResponse
+from app.services.product_document_service import ProductDocumentService
+from app.tracing import trace_methods
 
+# The featured list is cached once at its largest size and sliced per request
+FEATURED_CACHE_KEY = "featured"
+FEATURED_CACHE_SIZE = 20
+CATEGORIES_CACHE_KEY = "categories"
+
+# Hot statements are built once; parameters are bound per call
+PRODUCT_DETAIL_OPTIONS = (
+    selectinload(Product.category),
+    selectinload(Product.images),
+    selectinload(Product.variants)
+)
+PRODUCT_BY_ID = select(Product).options(*PRODUCT_DETAIL_OPTIONS).where(Product.id == bindparam("product_id"))
+FEATURED_PRODUCTS = (
+    select(Product).options(*PRODUCT_DETAIL_OPTIONS)
+    .where(and_(Product.is_active == True, Product.is_featured == True))
+    .order_by(Product.created_at.desc())
+    .limit(bindparam("limit"))
+)
+ON_SALE_PRODUCTS = (
+    select(Product).options(*PRODUCT_DETAIL_OPTIONS)
+    .where(and_(Product.is_active == True, Product.original_price > Product.price))
+    .order_by(Product.created_at.desc())
+    .limit(bindparam("limit"))
+)
+NEW_ARRIVALS = (
+    select(Product).options(*PRODUCT_DETAIL_OPTIONS)
+    .where(Product.is_active == True)
+    .order_by(Product.created_at.desc())
+    .limit(bindparam("limit"))
+)
+ACTIVE_CATEGORIES = select(Category).where(Category.is_active == True).order_by(Category.name)
+VARIANT_STOCK = (
+    select(ProductVariant).join(Product)
+    .where(and_(ProductVariant.product_id == bindparam("product_id"), Product.is_active == True))
+    .order_by(ProductVariant.id)
+)
+
+# Sparse fieldsets: what each response field needs loaded besides itself
+PRODUCT_FIELD_DEPENDENCIES = {
+    "category": {"category_id"},
+    "sizes": {"variants"},
+    "colors": {"variants"},
+    "main_image": {"images"},
+    "is_on_sale": {"price", "original_price"},
+    "discount_percentage": {"price", "original_price"},
+}
+PRODUCT_RELATIONSHIPS = {"category": Product.category, "images": Product.images, "variants": Product.variants}
+PRODUCT_COLUMNS = {column.key: getattr(Product, column.key) for column in Product.__table__.columns}
+PRODUCTS_BY_IDS = select(Product).where(Product.id.in_(bindparam("product_ids", expanding=True)))
+MAX_BATCH_PRODUCTS = 200
+
+def parse_product_fields(fields: Optional[str]) -> Optional[FrozenSet[str]]:
+    """Validate a comma-separated ?fields= value; None means every field"""
+    if not fields:
+        return None
+    requested = frozenset(name.strip() for name in fields.split(",") if name.strip())
+    unknown = requested - ProductResponse.model_fields.keys()
+    if unknown or not requested:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown product fields: {', '.join(sorted(unknown))}" if unknown else "No product fields requested"
+        )
+    return requested
+
+def product_load_options(fields: Optional[FrozenSet[str]]) -> tuple:
+    """Loader options selecting only the columns and relationships the fields need"""
+    if fields is None:
+        return PRODUCT_DETAIL_OPTIONS
+    needed = set(fields)
+    for name in fields:
+        needed |= PRODUCT_FIELD_DEPENDENCIES.get(name, set())
+    columns = [column for name, column in PRODUCT_COLUMNS.items() if name in needed]
+    relationships = [selectinload(relationship) for name, relationship in PRODUCT_RELATIONSHIPS.items() if name in needed]
+    return (load_only(Product.id, *columns), *relationships)
+
+def product_list_statements(
+    skip: int = 0,
+    limit: int = 20,
+    category_id: Optional[int] = None,
+    search: Optional[str] = None,
+    is_featured: Optional[bool] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    size: Optional[str] = None,
+    color: Optional[str] = None,
+    fields: Optional[FrozenSet[str]] = None
+) -> Tuple[StatementLambdaElement, StatementLambdaElement]:
+    """Listing and count statements for a filter combination
+    
+    Lambda statements cache one compiled form per combination of filters
+    present (and per fieldset); the filter values themselves become bound
+    parameters.
+    """
+    options = product_load_options(fields)
+    query = lambda_stmt(lambda: select(Product).where(Product.is_active == True))
+    # Loader options are not SQL elements, so the fieldset keys the cache instead
+    query = query.add_criteria(
+        lambda q: q.options(*options),
+        track_closure_variables=False,
+        track_on=[",".join(sorted(fields)) if fields is not None else None]
+    )
+    count_query = lambda_stmt(lambda: select(func.count(Product.id)).where(Product.is_active == True))
+    
+    criteria = []
+    if category_id:
+        criteria.append(lambda q: q.where(Product.category_id == category_id))
+    if search:
+        search_term = f"%{search}%"
+        criteria.append(lambda q: q.where(or_(
+            Product.name.ilike(search_term),
+            Product.description.ilike(search_term),
+            Product.brand.ilike(search_term)
+        )))
+    if is_featured is not None:
+        criteria.append(lambda q: q.where(Product.is_featured == is_featured))
+    if min_price is not None:
+        criteria.append(lambda q: q.where(Product.price >= min_price))
+    if max_price is not None:
+        criteria.append(lambda q: q.where(Product.price <= max_price))
+    # In-stock variants, served by the size/color variant indexes
+    if size and color:
+        criteria.append(lambda q: q.where(Product.id.in_(
+            select(ProductVariant.product_id).where(
+                ProductVariant.stock_quantity > 0, ProductVariant.size == size, ProductVariant.color == color
+            )
+        )))
+    elif size:
+        criteria.append(lambda q: q.where(Product.id.in_(
+            select(ProductVariant.product_id).where(ProductVariant.stock_quantity > 0, ProductVariant.size == size)
+        )))
+    elif color:
+        criteria.append(lambda q: q.where(Product.id.in_(
+            select(ProductVariant.product_id).where(ProductVariant.stock_quantity > 0, ProductVariant.color == color)
+        )))
+    
+    for criterion in criteria:
+        query += criterion
+        count_query += criterion
+    query += lambda q: q.order_by(Product.created_at.desc()).offset(skip).limit(limit)
+    return query, count_query
+
+def variant_sku(product_sku: str, size: str, color: str) -> str:
+    """Default variant SKU, e.g. AIR-90-10-BLACK"""
+    return "-".join([product_sku, size, color]).upper().replace(" ", "-")
+
+def product_cache_key(product_id: int) -> str:
+    return f"product:{product_id}"
+
+async def get_cached_featured_products(limit: int = 8) -> List[dict]:
+    """Featured products through the single-flight catalog cache"""
+    async def load():
+        async with AsyncSessionLocal() as db:
+            products = await ProductService(db).get_featured_products(limit=FEATURED_CACHE_SIZE)
+            return [ProductResponse.model_validate(product).model_dump(mode="json") for product in products]
+    
+    products = await catalog_cache.get_or_load(FEATURED_CACHE_KEY, load)
+    return products[:limit]
+
+async def get_cached_categories() -> List[dict]:
+    """Active categories through the catalog cache"""
+    async def load():
+        async with AsyncSessionLocal() as db:
+            categories = await ProductService(db).get_categories()
+            return [CategoryResponse.model_validate(category).model_dump(mode="json") for category in categories]
+    
+    return await catalog_cache.get_or_load(CATEGORIES_CACHE_KEY, load, ttl=settings.cache_categories_ttl_seconds)
+
+async def get_cached_product(product_id: int) -> Optional[str]:
+    """Product detail document (JSON text) through the single-flight catalog cache"""
+    async def load():
+        async with AsyncSessionLocal() as db:
+            return await ProductDocumentService(db).get_document(product_id)
+    
+    return await catalog_cache.get_or_load(product_cache_key(product_id), load)
+
+class ConstraintError(NamedTuple):
+    # Postgres constraint name, SQLite error message, API error detail
+    constraint: str
+    sqlite_message: str
+    detail: str
+
+# SQLite does not name foreign keys; a product row has only the category one
+CATEGORY_NOT_FOUND = ConstraintError("products_category_id_fkey", "FOREIGN KEY constraint failed", "Category not found")
+VARIANT_SKU_EXISTS = ConstraintError(
+    "product_variants_sku_key", "UNIQUE constraint failed: product_variants.sku", "Variant SKU already exists"
+)
+
+def constraint_error(exc: IntegrityError, *expected: ConstraintError) -> HTTPException:
+    """400 for a violation of one of the expected constraints; anything else is re-raised"""
+    # asyncpg's exception, chained under the DBAPI adapter, names the constraint
+    constraint = getattr(exc.orig.__cause__, "constraint_name", None)
+    message = str(exc.orig)
+    for error in expected:
+        if constraint == error.constraint or error.sqlite_message in message:
+            return HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=error.detail)
+    raise exc
+
+@trace_methods
 class ProductService:
     def __init__(self, db: AsyncSession):
         self.db = db
     
     async def create_category(self, category_data: CategoryCreate) -> Category:
         """Create a new category"""
-        # Check if category already exists
-        existing = await self.get_category_by_slug(category_data.slug)
-        if existing:
+        result = await self.db.execute(
+            upsert(Category)
+            .values(**category_data.model_dump())
+            .on_conflict_do_nothing()
+            .returning(Category)
+        )
+        db_category = result.scalar_one_or_none()
+        
+        if db_category is None:
+            existing = await self.get_category_by_slug(category_data.slug)
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Category with this slug already exists"
+                detail="Category with this slug already exists" if existing else "Category with this name already exists"
             )
         
-        db_category = Category(**category_data.model_dump())
-        self.db.add(db_category)
         await self.db.commit()
-        await self.db.refresh(db_category)
+        await catalog_cache.invalidate(CATEGORIES_CACHE_KEY)
+        await bump_catalog_version()
         return db_category
     
     async def get_categories(self) -> List[Category]:
         """Get all active categories"""
-        result = await self.db.execute(
-            select(Category).where(Category.is_active == True).order_by(Category.name)
-        )
+        result = await self.db.execute(ACTIVE_CATEGORIES)
         return result.scalars().all()
     
     async def get_category_by_id(self, category_id: int) -> Optional[Category]:
@@ -50,40 +259,129 @@ class ProductService:
     
     async def create_product(self, product_data: ProductCreate) -> Product:
         """Create a new product"""
-        # Check if SKU already exists
-        existing = await self.get_product_by_sku(product_data.sku)
-        if existing:
+        product_dict = product_data.model_dump(exclude={'images', 'sizes', 'colors', 'variants'})
+        try:
+            result = await self.db.execute(
+                upsert(Product)
+                .values(**product_dict)
+                .on_conflict_do_nothing(index_elements=[Product.sku])
+                .returning(Product.id)
+            )
+        except IntegrityError as exc:
+            # SKU conflicts are absorbed above
+            await self.db.rollback()
+            raise constraint_error(exc, CATEGORY_NOT_FOUND)
+        
+        product_id = result.scalar_one_or_none()
+        if product_id is None:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Product with this SKU already exists"
             )
         
-        # Verify category exists
-        category = await self.get_category_by_id(product_data.category_id)
-        if not category:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Category not found"
+        # Images and variants each go in as one multi-row INSERT
+        if product_data.images:
+            await self.db.execute(
+                insert(ProductImage),
+                [{"product_id": product_id, **img_data.model_dump()} for img_data in product_data.images]
             )
+        variants = self._desired_variants(
+            # ProductCreate defaults to no explicit variants, i.e. sizes x colors
+            product_data.sku, [], product_data.variants or None, product_data.sizes, product_data.colors
+        )
+        if variants:
+            try:
+                await self.db.execute(
+                    insert(ProductVariant),
+                    [{"product_id": product_id, **variant} for variant in variants]
+                )
+            except IntegrityError as exc:
+                await self.db.rollback()
+                raise constraint_error(exc, VARIANT_SKU_EXISTS)
         
-        # Create product
-        product_dict = product_data.model_dump(exclude={'images', 'sizes', 'colors'})
-        db_product = Product(**product_dict)
+        await self.db.commit()
+        await ProductDocumentService(self.db).refresh(product_id)
+        await catalog_cache.invalidate(FEATURED_CACHE_KEY)
+        # Drop any cached "not found" for the new ID
+        await catalog_cache.delete(product_cache_key(product_id))
+        await bump_catalog_version()
+        return await self._reload(product_id)
+    
+    async def _reload(self, product_id: int) -> Optional[Product]:
+        """Product with its relationships, loaded afresh for the response
         
-        self.db.add(db_product)
-        await self.db.flush()  # Get the product ID
+        The identity map holds objects weakly, so whatever refresh() loaded may
+        already be gone, and a bare get() would leave relationships to lazy-load.
+        """
+        result = await self.db.execute(
+            PRODUCT_BY_ID.execution_options(populate_existing=True), {"product_id": product_id}
+        )
+        return result.scalar_one_or_none()
+    
+    def _desired_variants(
+        self,
+        product_sku: str,
+        existing: List[ProductVariant],
+        variants: Optional[list],
+        sizes: Optional[List[str]],
+        colors: Optional[List[str]]
+    ) -> List[dict]:
+        """Variant rows for explicit variants (an empty list means none), or for every size/color pair"""
+        current = {(variant.size, variant.color): variant for variant in existing}
+        if variants is not None:
+            pairs = [(variant.size, variant.color, variant.sku, variant.stock_quantity) for variant in variants]
+        else:
+            sizes = sizes if sizes is not None else list(dict.fromkeys(v.size for v in existing))
+            colors = colors if colors is not None else list(dict.fromkeys(v.color for v in existing))
+            # Keep the stock of combinations that already exist
+            pairs = [
+                (size, color, None, current[(size, color)].stock_quantity if (size, color) in current else 0)
+                for size in sizes for color in colors
+            ]
         
-        # Add images
-        for img_data in product_data.images:
-            db_image = ProductImage(
-                product_id=db_product.id,
-                **img_data.model_dump()
+        desired = {}
+        for size, color, sku, stock_quantity in pairs:
+            desired[(size, color)] = {
+                "size": size,
+                "color": color,
+                "sku": sku or (current[(size, color)].sku if (size, color) in current else variant_sku(product_sku, size, color)),
+                "stock_quantity": stock_quantity
+            }
+        return list(desired.values())
+    
+    async def _sync_variants(self, product_id: int, product_sku: str, product_data: ProductUpdate):
+        """Upsert the requested variants and delete combinations left out"""
+        result = await self.db.execute(
+            select(ProductVariant).where(ProductVariant.product_id == product_id)
+        )
+        desired = self._desired_variants(
+            product_sku, result.scalars().all(), product_data.variants, product_data.sizes, product_data.colors
+        )
+        
+        if desired:
+            stmt = upsert(ProductVariant)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[ProductVariant.product_id, ProductVariant.size, ProductVariant.color],
+                set_={
+                    "sku": stmt.excluded.sku,
+                    "stock_quantity": stmt.excluded.stock_quantity,
+                    "updated_at": func.now()
+                }
             )
-            self.db.add(db_image)
+            try:
+                await self.db.execute(stmt, [{"product_id": product_id, **variant} for variant in desired])
+            except IntegrityError as exc:
+                await self.db.rollback()
+                raise constraint_error(exc, VARIANT_SKU_EXISTS)
         
-        await self.db.commit()
-        await self.db.refresh(db_product)
-        return db_product
+        stale = ProductVariant.__table__.delete().where(ProductVariant.product_id == product_id)
+        if desired:
+            stale = stale.where(
+                tuple_(ProductVariant.size, ProductVariant.color).not_in(
+                    [(variant["size"], variant["color"]) for variant in desired]
+                )
+            )
+        await self.db.execute(stale)
     
     async def get_products(
         self, 
@@ -93,45 +391,19 @@ class ProductService:
         search: Optional[str] = None,
         is_featured: Optional[bool] = None,
         min_price: Optional[float] = None,
-        max_price: Optional[float] = None
+        max_price: Optional[float] = None,
+        size: Optional[str] = None,
+        color: Optional[str] = None,
+        fields: Optional[FrozenSet[str]] = None
     ) -> Tuple[List[Product], int]:
         """Get products with filtering and pagination"""
-        query = select(Product).options(
-            selectinload(Product.category),
-            selectinload(Product.images)
-        ).where(Product.is_active == True)
-        
-        # Apply filters
-        if category_id:
-            query = query.where(Product.category_id == category_id)
-        
-        if search:
-            search_term = f"%{search}%"
-            query = query.where(
-                or_(
-                    Product.name.ilike(search_term),
-                    Product.description.ilike(search_term),
-                    Product.brand.ilike(search_term)
-                )
-            )
-        
-        if is_featured is not None:
-            query = query.where(Product.is_featured == is_featured)
-        
-        if min_price is not None:
-            query = query.where(Product.price >= min_price)
-        
-        if max_price is not None:
-            query = query.where(Product.price <= max_price)
+        query, count_query = product_list_statements(
+            skip, limit, category_id, search, is_featured, min_price, max_price, size, color, fields
+        )
         
-        # Get total count
-        count_query = select(func.count()).select_from(query.subquery())
         total_result = await self.db.execute(count_query)
         total = total_result.scalar()
         
-        # Apply pagination and ordering
-        query = query.order_by(Product.created_at.desc()).offset(skip).limit(limit)
-        
         result = await self.db.execute(query)
         products = result.scalars().all()
         
@@ -139,13 +411,27 @@ class ProductService:
     
     async def get_product_by_id(self, product_id: int) -> Optional[Product]:
         """Get product by ID with related data"""
+        result = await self.db.execute(PRODUCT_BY_ID, {"product_id": product_id})
+        return result.scalar_one_or_none()
+    
+    async def get_products_by_ids(
+        self, product_ids: Sequence[int], fields: Optional[FrozenSet[str]] = None
+    ) -> List[Product]:
+        """Products for a list of IDs in one query, in request order; unknown IDs are skipped"""
+        product_ids = list(dict.fromkeys(product_ids))
+        if not product_ids:
+            return []
         result = await self.db.execute(
-            select(Product).options(
-                selectinload(Product.category),
-                selectinload(Product.images)
-            ).where(Product.id == product_id)
+            PRODUCTS_BY_IDS.options(*product_load_options(fields)),
+            {"product_ids": product_ids}
         )
-        return result.scalar_one_or_none()
+        by_id = {product.id: product for product in result.scalars().all()}
+        return [by_id[product_id] for product_id in product_ids if product_id in by_id]
+    
+    async def get_variant_stock(self, product_id: int) -> List[ProductVariant]:
+        """Live stock per variant of an active product"""
+        result = await self.db.execute(VARIANT_STOCK, {"product_id": product_id})
+        return result.scalars().all()
     
     async def get_product_by_sku(self, sku: str) -> Optional[Product]:
         """Get product by SKU"""
@@ -156,37 +442,66 @@ class ProductService:
     
     async def update_product(self, product_id: int, product_data: ProductUpdate) -> Optional[Product]:
         """Update product"""
-        product = await self.get_product_by_id(product_id)
-        if not product:
+        update_data = product_data.model_dump(exclude_unset=True, exclude={'sizes', 'colors', 'variants'})
+        if update_data:
+            try:
+                result = await self.db.execute(
+                    update(Product)
+                    .where(Product.id == product_id)
+                    .values(**update_data)
+                    .returning(Product.sku)
+                )
+            except IntegrityError as exc:
+                await self.db.rollback()
+                raise constraint_error(exc, CATEGORY_NOT_FOUND)
+        else:
+            result = await self.db.execute(
+                select(Product.sku).where(Product.id == product_id)
+            )
+        product_sku = result.scalar_one_or_none()
+        if product_sku is None:
             return None
         
-        # Update fields
-        update_data = product_data.model_dump(exclude_unset=True, exclude={'sizes', 'colors'})
-        for field, value in update_data.items():
-            setattr(product, field, value)
+        if product_data.variants is not None or product_data.sizes is not None or product_data.colors is not None:
+            await self._sync_variants(product_id, product_sku, product_data)
         
         await self.db.commit()
-        await self.db.refresh(product)
-        return product
+        await ProductDocumentService(self.db).refresh(product_id)
+        await catalog_cache.invalidate(FEATURED_CACHE_KEY)
+        # The detail was just rewritten; serving the old one stale would undo the edit
+        await catalog_cache.delete(product_cache_key(product_id))
+        await bump_catalog_version()
+        return await self._reload(product_id)
     
     async def delete_product(self, product_id: int) -> bool:
         """Delete product (soft delete)"""
-        product = await self.get_product_by_id(product_id)
-        if not product:
+        result = await self.db.execute(
+            update(Product)
+            .where(Product.id == product_id)
+            .values(is_active=False)
+            .returning(Product.id)
+        )
+        if result.scalar_one_or_none() is None:
             return False
         
-        product.is_active = False
         await self.db.commit()
+        await ProductDocumentService(self.db).refresh(product_id)
+        # A deleted product must not be served stale
+        await catalog_cache.delete(FEATURED_CACHE_KEY, product_cache_key(product_id))
+        await bump_catalog_version()
         return True
     
     async def get_featured_products(self, limit: int = 8) -> List[Product]:
         """Get featured products"""
-        result = await self.db.execute(
-            select(Product).options(
-                selectinload(Product.category),
-                selectinload(Product.images)
-            ).where(
-                and_(Product.is_active == True, Product.is_featured == True)
-            ).order_by(Product.created_at.desc()).limit(limit)
-        )
+        result = await self.db.execute(FEATURED_PRODUCTS, {"limit": limit})
+        return result.scalars().all()
+    
+    async def get_on_sale_products(self, limit: int = 8) -> List[Product]:
+        """Newest active products priced below their original price"""
+        result = await self.db.execute(ON_SALE_PRODUCTS, {"limit": limit})
+        return result.scalars().all()
+    
+    async def get_new_arrivals(self, limit: int = 8) -> List[Product]:
+        """Newest active products"""
+        result = await self.db.execute(NEW_ARRIVALS, {"limit": limit})
         return result.scalars().all()
\ No newline at end of file
@@ -1,11 +1,13 @@
 from typing import Optional
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, update
 from fastapi import HTTPException, status
 
+from app.database import upsert
 from app.models.user import User
 from app.schemas.user import UserCreate, UserUpdate
 from app.auth.security import get_password_hash
+from app.auth.refresh_tokens import refresh_token_store
 
 class UserService:
     def __init__(self, db: AsyncSession):
@@ -13,40 +15,43 @@ class UserService:
     
     async def create_user(self, user_data: UserCreate) -> User:
         """Create a new user"""
-        # Check if user already exists
-        existing_user = await self.get_user_by_email(user_data.email)
-        if existing_user:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Email already registered"
+        hashed_password = get_password_hash(user_data.password)
+        result = await self.db.execute(
+            upsert(User)
+            .values(
+                email=user_data.email,
+                username=user_data.username,
+                first_name=user_data.first_name,
+                last_name=user_data.last_name,
+                hashed_password=hashed_password,
+                phone=user_data.phone,
+                address=user_data.address,
+                city=user_data.city,
+                state=user_data.state,
+                zip_code=user_data.zip_code,
+                country=user_data.country
             )
+            .on_conflict_do_nothing()
+            .returning(User)
+        )
+        db_user = result.scalar_one_or_none()
         
-        existing_username = await self.get_user_by_username(user_data.username)
-        if existing_username:
+        if db_user is None:
+            # Conflict path only: find out which unique field clashed
+            existing = await self.db.execute(
+                select(User.email).where(User.email == user_data.email)
+            )
+            if existing.scalar_one_or_none() is not None:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Email already registered"
+                )
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Username already taken"
             )
         
-        # Create new user
-        hashed_password = get_password_hash(user_data.password)
-        db_user = User(
-            email=user_data.email,
-            username=user_data.username,
-            first_name=user_data.first_name,
-            last_name=user_data.last_name,
-            hashed_password=hashed_password,
-            phone=user_data.phone,
-            address=user_data.address,
-            city=user_data.city,
-            state=user_data.state,
-            zip_code=user_data.zip_code,
-            country=user_data.country
-        )
-        
-        self.db.add(db_user)
         await self.db.commit()
-        await self.db.refresh(db_user)
         return db_user
     
     async def get_user_by_id(self, user_id: int) -> Optional[User]:
@@ -72,25 +77,38 @@ class UserService:
     
     async def update_user(self, user_id: int, user_data: UserUpdate) -> Optional[User]:
         """Update user information"""
-        user = await self.get_user_by_id(user_id)
-        if not user:
-            return None
-        
-        # Update fields
         update_data = user_data.model_dump(exclude_unset=True)
-        for field, value in update_data.items():
-            setattr(user, field, value)
+        if not update_data:
+            return await self.get_user_by_id(user_id)
+        
+        result = await self.db.execute(
+            update(User)
+            .where(User.id == user_id)
+            .values(**update_data)
+            .returning(User)
+            .execution_options(populate_existing=True)
+        )
+        user = result.scalar_one_or_none()
+        if user is None:
+            return None
         
         await self.db.commit()
-        await self.db.refresh(user)
         return user
     
     async def delete_user(self, user_id: int) -> bool:
         """Delete user (soft delete by setting is_active to False)"""
-        user = await self.get_user_by_id(user_id)
-        if not user:
+        result = await self.db.execute(
+            update(User)
+            .where(User.id == user_id)
+            .values(is_active=False)
+            .returning(User.username)
+        )
+        username = result.scalar_one_or_none()
+        if username is None:
             return False
         
-        user.is_active = False
         await self.db.commit()
+        
+        # Refresh does not consult the users table, so revoke explicitly
+        await refresh_token_store.revoke_all(username)
         return True
\ No newline at end of file
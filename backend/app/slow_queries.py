@@ -0,0 +1,196 @@
+from collections import Counter
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+import asyncio
+import hashlib
+import logging
+import re
+import time
+
+from sqlalchemy import event
+
+from app.config import settings
+from app.tracing import current_route, current_trace_id
+
+logger = logging.getLogger(__name__)
+
+# Literals and placeholders collapse to "?" so one query shape is one fingerprint
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"\$\d+|%\(\w+\)s|(?<![:\w]):\w+|\?")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+# Set while running EXPLAIN so the explain itself is not recorded
+_explaining: ContextVar[bool] = ContextVar("explaining_slow_query", default=False)
+
+
+def normalize(statement: str) -> str:
+    text = _WHITESPACE.sub(" ", statement).strip()
+    text = _STRING.sub("?", text)
+    text = _PLACEHOLDER.sub("?", text)
+    text = _NUMBER.sub("?", text)
+    return _IN_LIST.sub("(...)", text)
+
+
+def fingerprint(normalized: str) -> str:
+    return hashlib.sha1(normalized.encode()).hexdigest()[:16]
+
+
+def parameter_shape(parameters: Any, executemany: bool) -> Any:
+    """Types of the bound parameters, without their values"""
+    if executemany:
+        rows = list(parameters or [])
+        return {"rows": len(rows), "row": parameter_shape(rows[0], False) if rows else None}
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [type(value).__name__ for value in parameters]
+    return None
+
+
+class SlowQuery:
+    """Aggregate for one statement fingerprint"""
+
+    __slots__ = (
+        "fingerprint", "statement", "parameter_shape", "count", "total_ms", "max_ms",
+        "last_ms", "last_seen", "routes", "trace_id", "explain"
+    )
+
+    def __init__(self, key: str, statement: str, shape: Any):
+        self.fingerprint = key
+        self.statement = statement
+        self.parameter_shape = shape
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.last_ms = 0.0
+        self.last_seen = 0.0
+        self.routes: Counter = Counter()
+        self.trace_id: Optional[str] = None
+        self.explain: Optional[str] = None
+
+    def to_dict(self) -> dict:
+        return {
+            "fingerprint": self.fingerprint,
+            "statement": self.statement,
+            "parameter_shape": self.parameter_shape,
+            "count": self.count,
+            "total_ms": round(self.total_ms, 1),
+            "mean_ms": round(self.total_ms / self.count, 1),
+            "max_ms": round(self.max_ms, 1),
+            "last_ms": round(self.last_ms, 1),
+            "last_seen": self.last_seen,
+            "routes": dict(self.routes.most_common(5)),
+            "trace_id": self.trace_id,
+            "explain": self.explain,
+        }
+
+
+class SlowQueryLog:
+    """Records statements slower than slow_query_ms, grouped by fingerprint
+
+    Timing comes from the engine's cursor events, so only slow statements
+    pay for more than two perf_counter calls. With slow_query_explain on,
+    the first occurrence of each new SELECT fingerprint is re-run under
+    EXPLAIN (ANALYZE, BUFFERS) on a separate connection in the background,
+    inside a transaction that is rolled back.
+    """
+
+    def __init__(self):
+        self.queries: Dict[str, SlowQuery] = {}
+        self._engine = None
+        self._explain_slots: Optional[asyncio.Semaphore] = None
+
+    def instrument(self, engine):
+        """Hook an AsyncEngine's cursor events"""
+        self._engine = engine
+        sync_engine = engine.sync_engine
+
+        @event.listens_for(sync_engine, "before_cursor_execute")
+        def _start(conn, cursor, statement, parameters, context, executemany):
+            if context is not None:
+                context._slow_query_start = time.perf_counter()
+
+        @event.listens_for(sync_engine, "after_cursor_execute")
+        def _end(conn, cursor, statement, parameters, context, executemany):
+            start = getattr(context, "_slow_query_start", None)
+            if start is None:
+                return
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            if elapsed_ms >= settings.slow_query_ms and not _explaining.get():
+                self.record(statement, parameters, executemany, elapsed_ms)
+
+        return engine
+
+    def record(self, statement: str, parameters: Any, executemany: bool, elapsed_ms: float):
+        normalized = normalize(statement)
+        key = fingerprint(normalized)
+        route = current_route()
+        entry = self.queries.get(key)
+        if entry is None:
+            self._evict()
+            entry = self.queries[key] = SlowQuery(key, normalized, parameter_shape(parameters, executemany))
+            if self._should_explain(statement, executemany):
+                self._schedule_explain(entry, statement, parameters)
+        entry.count += 1
+        entry.total_ms += elapsed_ms
+        entry.max_ms = max(entry.max_ms, elapsed_ms)
+        entry.last_ms = elapsed_ms
+        entry.last_seen = time.time()
+        entry.routes[route or "(no request)"] += 1
+        entry.trace_id = current_trace_id() or entry.trace_id
+        logger.warning(f"Slow query {key} took {elapsed_ms:.1f}ms on {route or 'no request'}: {normalized[:200]}")
+
+    def top(self, limit: Optional[int] = None) -> List[dict]:
+        """Fingerprints ordered by total time spent"""
+        limit = limit or settings.slow_query_top_n
+        entries = sorted(self.queries.values(), key=lambda entry: -entry.total_ms)
+        return [entry.to_dict() for entry in entries[:limit]]
+
+    def reset(self):
+        self.queries = {}
+
+    def _evict(self):
+        if len(self.queries) < settings.slow_query_max_fingerprints:
+            return
+        smallest = min(self.queries.values(), key=lambda entry: entry.total_ms)
+        del self.queries[smallest.fingerprint]
+
+    def _should_explain(self, statement: str, executemany: bool) -> bool:
+        return (
+            settings.slow_query_explain
+            and not executemany
+            and self._engine.dialect.name == "postgresql"
+            # ANALYZE executes the statement; never re-run writes
+            and statement.lstrip()[:6].upper() == "SELECT"
+        )
+
+    def _schedule_explain(self, entry: SlowQuery, statement: str, parameters: Any):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        entry.explain = "pending"
+        loop.create_task(self._explain(entry, statement, parameters))
+
+    async def _explain(self, entry: SlowQuery, statement: str, parameters: Any):
+        if self._explain_slots is None:
+            self._explain_slots = asyncio.Semaphore(1)
+        _explaining.set(True)
+        async with self._explain_slots:
+            try:
+                async with self._engine.connect() as conn:
+                    await conn.exec_driver_sql(
+                        f"SET LOCAL statement_timeout = {int(settings.slow_query_explain_timeout_ms)}"
+                    )
+                    result = await conn.exec_driver_sql(
+                        "EXPLAIN (ANALYZE, BUFFERS) " + statement, parameters
+                    )
+                    entry.explain = "\n".join(row[0] for row in result)
+                    await conn.rollback()
+            except Exception as exc:
+                entry.explain = f"EXPLAIN failed: {exc}"
+
+
+slow_query_log = SlowQueryLog()
\ No newline at end of file
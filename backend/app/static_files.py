@@ -0,0 +1,293 @@
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Optional, Tuple
+import mimetypes
+import os
+import re
+import stat as stat_module
+
+import anyio
+
+from app.config import settings
+
+# File names that embed a content hash can be cached forever: Vite's build
+# output (assets/index-DiwrgTda.js; base64url hashes since Vite 5, hex before)
+# and our content-addressed uploads (<sha256>_<variant>.webp)
+VITE_ASSET_RE = re.compile(r"^assets/(.+/)?[^/]+-[A-Za-z0-9_-]{8,}\.[a-z0-9]+$")
+CONTENT_HASH_NAME_RE = re.compile(r"^[0-9a-f]{64}(_[a-z]+)?\.[a-z0-9]+$")
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "public, max-age=0, must-revalidate"
+
+# Precompressed siblings, in order of preference
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+CHUNK_SIZE = 64 * 1024
+
+
+class MemoryFileCache:
+    """LRU cache of small file bodies bounded by total size in bytes"""
+
+    def __init__(self, max_bytes: int, max_file_bytes: int):
+        self.max_bytes = max_bytes
+        self.max_file_bytes = max_file_bytes
+        self.current_bytes = 0
+        self._entries: "OrderedDict[str, Tuple[tuple, bytes]]" = OrderedDict()
+
+    def get(self, path: str, version: tuple) -> Optional[bytes]:
+        entry = self._entries.get(path)
+        if entry is None:
+            return None
+        if entry[0] != version:
+            # File changed on disk since it was cached
+            self._remove(path)
+            return None
+        self._entries.move_to_end(path)
+        return entry[1]
+
+    def put(self, path: str, version: tuple, body: bytes):
+        if len(body) > self.max_file_bytes or len(body) > self.max_bytes:
+            return
+        if path in self._entries:
+            self._remove(path)
+        self._entries[path] = (version, body)
+        self.current_bytes += len(body)
+        while self.current_bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+
+    def _remove(self, path: str):
+        _, body = self._entries.pop(path)
+        self.current_bytes -= len(body)
+
+
+def _parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """Parse a single byte range into inclusive (start, end); None if unsatisfiable"""
+    match = RANGE_RE.match(header.strip())
+    if not match:
+        return None
+    start, end = match.groups()
+    if start == "":
+        if end == "":
+            return None
+        length = int(end)
+        if length == 0:
+            return None
+        return max(size - length, 0), size - 1
+    first = int(start)
+    last = int(end) if end else size - 1
+    if first >= size or last < first:
+        return None
+    return first, min(last, size - 1)
+
+
+class CachedStaticFiles:
+    """ASGI app serving files from a directory with HTTP caching semantics
+
+    Supports ETag / Last-Modified revalidation, single byte ranges,
+    precompressed .br/.gz siblings and an in-memory LRU for small hot files.
+    Larger files are read in chunks in a worker thread; a server offering the
+    ``http.response.zerocopysend`` extension gets the file descriptor instead,
+    but uvicorn does not, so there is no zero-copy send under uvicorn.
+    Extensionless paths fall back to ``spa_fallback`` unless they are under
+    one of ``spa_exclude`` (e.g. "/api", which should 404).
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        spa_fallback: Optional[str] = None,
+        memory_cache: Optional[MemoryFileCache] = None,
+        spa_exclude: Tuple[str, ...] = ()
+    ):
+        self.directory = os.path.realpath(directory)
+        self.spa_fallback = spa_fallback
+        self.spa_exclude = tuple(prefix.rstrip("/") + "/" for prefix in spa_exclude)
+        self.memory_cache = memory_cache or MemoryFileCache(
+            settings.static_memory_cache_bytes,
+            settings.static_memory_cache_max_file
+        )
+
+    async def __call__(self, scope, receive, send):
+        assert scope["type"] == "http"
+        if scope["method"] not in ("GET", "HEAD"):
+            await self._send_empty(send, 405, [(b"allow", b"GET, HEAD")])
+            return
+
+        headers = {k.decode("latin-1"): v.decode("latin-1") for k, v in scope["headers"]}
+        resolved = self._lookup(self._route_path(scope))
+        if resolved is None:
+            await self._send_empty(send, 404)
+            return
+
+        full_path, st = resolved
+        await self._serve(scope, send, headers, full_path, st)
+
+    def _route_path(self, scope) -> str:
+        path = scope["path"]
+        root_path = scope.get("root_path", "")
+        if root_path and path.startswith(root_path):
+            path = path[len(root_path):]
+        return path
+
+    def _lookup(self, route_path: str) -> Optional[Tuple[str, os.stat_result]]:
+        relative = os.path.normpath(route_path.lstrip("/")) if route_path.strip("/") else ""
+        candidates = [relative or "index.html"]
+        if relative and not os.path.splitext(relative)[1] and self._falls_back(route_path):
+            candidates.append(self.spa_fallback)
+        for candidate in candidates:
+            full_path = os.path.realpath(os.path.join(self.directory, candidate))
+            if os.path.commonpath([full_path, self.directory]) != self.directory:
+                return None
+            try:
+                st = os.stat(full_path)
+            except OSError:
+                continue
+            if stat_module.S_ISDIR(st.st_mode):
+                full_path = os.path.join(full_path, "index.html")
+                try:
+                    st = os.stat(full_path)
+                except OSError:
+                    continue
+            if stat_module.S_ISREG(st.st_mode):
+                return full_path, st
+        return None
+
+    def _falls_back(self, route_path: str) -> bool:
+        return bool(self.spa_fallback) and not (route_path.rstrip("/") + "/").startswith(self.spa_exclude)
+
+    def _is_immutable(self, full_path: str) -> bool:
+        relative = os.path.relpath(full_path, self.directory).replace(os.sep, "/")
+        return bool(
+            VITE_ASSET_RE.match(relative)
+            or CONTENT_HASH_NAME_RE.match(os.path.basename(full_path))
+        )
+
+    def _pick_encoding(self, full_path: str, accept_encoding: str) -> Tuple[str, Optional[str], Optional[os.stat_result]]:
+        """Return (path, content-encoding, stat) for the best precompressed sibling"""
+        accepted = {part.split(";")[0].strip() for part in accept_encoding.split(",")}
+        for encoding, suffix in ENCODINGS:
+            if encoding not in accepted:
+                continue
+            try:
+                st = os.stat(full_path + suffix)
+            except OSError:
+                continue
+            return full_path + suffix, encoding, st
+        return full_path, None, None
+
+    async def _serve(self, scope, send, headers, full_path, st):
+        content_type = mimetypes.guess_type(full_path)[0] or "application/octet-stream"
+        body_path, encoding, encoded_st = self._pick_encoding(full_path, headers.get("accept-encoding", ""))
+        if encoded_st is not None:
+            st = encoded_st
+
+        etag = f'"{st.st_size:x}-{st.st_mtime_ns:x}{"-" + encoding if encoding else ""}"'
+        last_modified = formatdate(st.st_mtime, usegmt=True)
+        cache_control = IMMUTABLE_CACHE_CONTROL if self._is_immutable(full_path) else REVALIDATE_CACHE_CONTROL
+
+        response_headers = [
+            (b"content-type", content_type.encode("latin-1")),
+            (b"etag", etag.encode("latin-1")),
+            (b"last-modified", last_modified.encode("latin-1")),
+            (b"cache-control", cache_control.encode("latin-1")),
+            (b"accept-ranges", b"bytes"),
+            (b"vary", b"Accept-Encoding"),
+        ]
+        if encoding:
+            response_headers.append((b"content-encoding", encoding.encode("latin-1")))
+
+        if self._not_modified(headers, etag, st):
+            await self._send_empty(send, 304, response_headers)
+            return
+
+        size = st.st_size
+        start, end, status = 0, size - 1, 200
+        range_header = headers.get("range")
+        if range_header and size and self._range_applies(headers, etag, last_modified):
+            byte_range = _parse_range(range_header, size)
+            if byte_range is None:
+                response_headers.append((b"content-range", f"bytes */{size}".encode("latin-1")))
+                await self._send_empty(send, 416, response_headers)
+                return
+            start, end = byte_range
+            status = 206
+            response_headers.append((b"content-range", f"bytes {start}-{end}/{size}".encode("latin-1")))
+
+        length = end - start + 1 if size else 0
+        response_headers.append((b"content-length", str(length).encode("latin-1")))
+        await send({"type": "http.response.start", "status": status, "headers": response_headers})
+        if scope["method"] == "HEAD" or length == 0:
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        version = (st.st_size, st.st_mtime_ns)
+        body = self.memory_cache.get(body_path, version)
+        if body is None and size <= self.memory_cache.max_file_bytes:
+            body = await anyio.to_thread.run_sync(_read_file, body_path)
+            self.memory_cache.put(body_path, version, body)
+        if body is not None:
+            await send({"type": "http.response.body", "body": body[start:end + 1]})
+            return
+
+        await self._send_file(scope, send, body_path, start, length)
+
+    def _not_modified(self, headers, etag: str, st: os.stat_result) -> bool:
+        if_none_match = headers.get("if-none-match")
+        if if_none_match is not None:
+            tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+            return "*" in tags or etag in tags
+        if_modified_since = headers.get("if-modified-since")
+        if if_modified_since:
+            try:
+                since = parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+            return int(st.st_mtime) <= since
+        return False
+
+    def _range_applies(self, headers, etag: str, last_modified: str) -> bool:
+        if_range = headers.get("if-range")
+        return if_range is None or if_range in (etag, last_modified)
+
+    async def _send_file(self, scope, send, path: str, offset: int, count: int):
+        extensions = scope.get("extensions") or {}
+        f = await anyio.to_thread.run_sync(open, path, "rb")
+        try:
+            if "http.response.zerocopysend" in extensions:
+                await send({
+                    "type": "http.response.zerocopysend",
+                    "file": f.fileno(),
+                    "offset": offset,
+                    "count": count,
+                })
+                return
+
+            await anyio.to_thread.run_sync(f.seek, offset)
+            remaining = count
+            while remaining > 0:
+                chunk = await anyio.to_thread.run_sync(f.read, min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    # Content-Length is already sent; ending the body here would
+                    # pass off a truncated file as complete. Raising makes the
+                    # server drop the connection instead
+                    raise OSError(f"{path} shrank while being sent ({remaining} bytes short)")
+                remaining -= len(chunk)
+                await send({
+                    "type": "http.response.body",
+                    "body": chunk,
+                    "more_body": remaining > 0,
+                })
+        finally:
+            f.close()
+
+    async def _send_empty(self, send, status: int, headers=None):
+        headers = [h for h in (headers or []) if h[0] != b"content-length"]
+        headers.append((b"content-length", b"0"))
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": b""})
+
+
+def _read_file(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
@@ -0,0 +1,146 @@
+from typing import NamedTuple, Optional
+import asyncio
+import gzip
+import hashlib
+import logging
+
+from redis.exceptions import RedisError
+
+from app.cache import CATALOG_VERSION_CHANNEL, CATALOG_VERSION_KEY
+from app.config import settings
+from app.database import AsyncSessionLocal, get_redis_client
+from app.schemas.storefront import StorefrontHomeResponse
+from app.services.product_service import ProductService
+
+logger = logging.getLogger(__name__)
+
+
+class HomePayload(NamedTuple):
+    version: int
+    body: bytes
+    gzipped: bytes
+    etag: str
+
+
+class StorefrontHome:
+    """Storefront home payload, precomputed per catalog version
+
+    Categories and the featured, on-sale and newest products are serialized
+    and gzipped once, so serving the home page does no database work. Each
+    worker follows the catalog version over pub/sub and rebuilds in the
+    background while the previous payload keeps being served. warm() builds
+    the first payload before the worker takes traffic.
+    """
+
+    def __init__(self, redis=None):
+        self._redis = redis
+        self.payload: Optional[HomePayload] = None
+        # Newest catalog version this worker has heard of
+        self._version = 0
+        self._build_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._rebuild_task: Optional[asyncio.Task] = None
+
+    @property
+    def redis(self):
+        if self._redis is None:
+            self._redis = get_redis_client()
+        return self._redis
+
+    async def get(self) -> HomePayload:
+        """Current payload; built on the spot only if warming did not happen"""
+        if self.payload is None:
+            async with self._build_lock:
+                if self.payload is None:
+                    self._version = await self._current_version()
+                    await self._build(self._version)
+        return self.payload
+
+    async def warm(self):
+        """Build the payload for the current catalog version"""
+        try:
+            self._version = await self._current_version()
+            async with self._build_lock:
+                await self._build(self._version)
+        except Exception as exc:
+            logger.warning(f"Storefront home warm-up failed, building on first request: {exc}")
+
+    async def _current_version(self) -> int:
+        try:
+            return int(await self.redis.get(CATALOG_VERSION_KEY) or 0)
+        except (RedisError, OSError) as exc:
+            logger.warning(f"Catalog version unavailable: {exc}")
+            return self._version
+
+    async def _build(self, version: int):
+        limit = settings.storefront_home_limit
+        async with AsyncSessionLocal() as db:
+            product_service = ProductService(db)
+            home = StorefrontHomeResponse(
+                catalog_version=version,
+                categories=await product_service.get_categories(),
+                featured=await product_service.get_featured_products(limit=limit),
+                on_sale=await product_service.get_on_sale_products(limit=limit),
+                new_arrivals=await product_service.get_new_arrivals(limit=limit),
+            )
+        body = home.model_dump_json().encode()
+        gzipped = await asyncio.to_thread(gzip.compress, body, 9)
+        etag = f'"home-{version}-{hashlib.sha256(body).hexdigest()[:16]}"'
+        self.payload = HomePayload(version, body, gzipped, etag)
+
+    def _on_version(self, version: int):
+        # Compared for equality, not order: the counter restarts if Redis loses it
+        if version == self._version:
+            return
+        self._version = version
+        if self._rebuild_task is None or self._rebuild_task.done():
+            self._rebuild_task = asyncio.create_task(self._rebuild())
+
+    async def _rebuild(self):
+        # One rebuild for a burst of writes, e.g. a bulk import
+        await asyncio.sleep(settings.storefront_rebuild_delay_seconds)
+        while self.payload is None or self.payload.version != self._version:
+            try:
+                async with self._build_lock:
+                    await self._build(self._version)
+            except Exception as exc:
+                logger.warning(f"Storefront home rebuild failed, serving version {self.payload and self.payload.version}: {exc}")
+                await asyncio.sleep(settings.storefront_retry_seconds)
+
+    async def _listen(self):
+        while True:
+            pubsub = self.redis.pubsub()
+            try:
+                await pubsub.subscribe(CATALOG_VERSION_CHANNEL)
+                # Catch up on versions published while we were not subscribed
+                self._on_version(await self._current_version())
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        self._on_version(int(message["data"]))
+            except asyncio.CancelledError:
+                raise
+            except (RedisError, OSError, ValueError) as exc:
+                logger.warning(f"Catalog version listener error, resubscribing: {exc}")
+                await asyncio.sleep(settings.storefront_retry_seconds)
+            finally:
+                await pubsub.close()
+
+    def start(self):
+        """Start following catalog versions"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        """Stop the listener and any pending rebuild"""
+        for task in (self._task, self._rebuild_task):
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._task = None
+        self._rebuild_task = None
+
+
+storefront_home = StorefrontHome()
\ No newline at end of file
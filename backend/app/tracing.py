@@ -0,0 +1,426 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+import asyncio
+import functools
+import inspect
+import json
+import logging
+import os
+import random
+import time
+import weakref
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# OTLP span kinds and status codes
+KIND_INTERNAL, KIND_SERVER, KIND_CLIENT = 1, 2, 3
+STATUS_ERROR = 2
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+# ASGI scope of the request being handled, sampled or not
+_current_scope: ContextVar[Optional[dict]] = ContextVar("current_scope", default=None)
+# The same per task, for readers on other threads that cannot see a task's context
+_task_scopes: "weakref.WeakKeyDictionary[asyncio.Task, dict]" = weakref.WeakKeyDictionary()
+
+
+class Span:
+    """One timed operation in a trace, serialized in OTLP JSON form"""
+
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "kind", "start_ns", "end_ns", "attributes", "error")
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str] = None, kind: int = KIND_INTERNAL):
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.attributes: Dict[str, Any] = {}
+        self.error: Optional[str] = None
+
+    def child(self, name: str, kind: int = KIND_INTERNAL) -> "Span":
+        return Span(name, self.trace_id, self.span_id, kind)
+
+    def end(self, error: Optional[BaseException] = None):
+        if error is not None:
+            self.error = repr(error)
+        self.end_ns = time.time_ns()
+        tracer.export(self)
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def to_otlp(self) -> dict:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [{"key": key, "value": _otlp_value(value)} for key, value in self.attributes.items()],
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        if self.error:
+            span["status"] = {"code": STATUS_ERROR, "message": self.error}
+        return span
+
+
+def _otlp_value(value: Any) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def parse_traceparent(header: str) -> Optional[tuple]:
+    """(trace_id, parent_span_id, sampled) from a W3C traceparent header"""
+    parts = header.strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    try:
+        sampled = bool(int(parts[3], 16) & 1)
+    except ValueError:
+        return None
+    return parts[1], parts[2], sampled
+
+
+class Tracer:
+    """Head-sampled request tracer exporting OTLP JSON
+
+    Only sampled requests create spans; everywhere else the cost is one
+    context variable lookup. Finished spans are buffered and written in
+    batches to a JSON lines file (one OTLP export request per line) or
+    POSTed to an OTLP/HTTP collector. When the buffer is full new spans
+    are dropped rather than slowing requests down.
+    """
+
+    def __init__(self):
+        self._buffer: List[Span] = []
+        self._task: Optional[asyncio.Task] = None
+        self._client = None
+        self.dropped = 0
+
+    @property
+    def enabled(self) -> bool:
+        return settings.tracing_enabled and settings.trace_exporter != "none"
+
+    def current(self) -> Optional[Span]:
+        return _current_span.get()
+
+    def start_trace(self, name: str, traceparent: Optional[str] = None) -> Optional[Span]:
+        """Root span for a request, or None if the request is not sampled"""
+        if not self.enabled:
+            return None
+        parent = parse_traceparent(traceparent) if traceparent else None
+        if parent:
+            trace_id, parent_id, sampled = parent
+        else:
+            trace_id, parent_id = None, None
+            sampled = random.random() < settings.trace_sample_rate
+        if not sampled:
+            return None
+        return Span(name, trace_id or os.urandom(16).hex(), parent_id, KIND_SERVER)
+
+    @contextmanager
+    def span(self, name: str, kind: int = KIND_INTERNAL, **attributes):
+        """Child of the current span; does nothing outside a sampled trace"""
+        parent = _current_span.get()
+        if parent is None:
+            yield None
+            return
+        span = parent.child(name, kind)
+        span.attributes.update(attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as exc:
+            span.end(exc)
+            raise
+        else:
+            span.end()
+        finally:
+            _current_span.reset(token)
+
+    @contextmanager
+    def activate(self, span: Span):
+        token = _current_span.set(span)
+        try:
+            yield span
+        finally:
+            _current_span.reset(token)
+
+    def export(self, span: Span):
+        if len(self._buffer) >= settings.trace_max_queue:
+            self.dropped += 1
+            return
+        self._buffer.append(span)
+
+    def start(self):
+        """Start the background exporter on the running loop"""
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the exporter and flush buffered spans"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(settings.trace_flush_seconds)
+            try:
+                await self.flush()
+            except Exception as exc:
+                logger.warning(f"Trace export failed: {exc}")
+
+    async def flush(self):
+        while self._buffer:
+            batch = self._buffer[:settings.trace_batch_size]
+            del self._buffer[:settings.trace_batch_size]
+            payload = json.dumps(self._export_request(batch), separators=(",", ":"))
+            if settings.trace_exporter == "otlp":
+                await self._post(payload)
+            else:
+                await asyncio.to_thread(self._append, payload)
+
+    def _export_request(self, spans: List[Span]) -> dict:
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": [
+                    {"key": "service.name", "value": {"stringValue": settings.trace_service_name}},
+                    {"key": "process.pid", "value": {"intValue": str(os.getpid())}},
+                ]},
+                "scopeSpans": [{"scope": {"name": __name__}, "spans": [span.to_otlp() for span in spans]}]
+            }]
+        }
+
+    def _append(self, payload: str):
+        with open(settings.trace_file, "a", encoding="utf-8") as file:
+            file.write(payload + "\n")
+
+    async def _post(self, payload: str):
+        if self._client is None:
+            import httpx
+            self._client = httpx.AsyncClient(timeout=5.0)
+        response = await self._client.post(
+            settings.trace_otlp_endpoint, content=payload, headers={"Content-Type": "application/json"}
+        )
+        response.raise_for_status()
+
+
+tracer = Tracer()
+
+
+def trace_methods(cls):
+    """Give every public coroutine method of a class a "Class.method" span"""
+    for name, method in list(vars(cls).items()):
+        if name.startswith("_") or not inspect.iscoroutinefunction(method):
+            continue
+        setattr(cls, name, _traced(method, f"{cls.__name__}.{name}"))
+    return cls
+
+
+def _traced(method, span_name: str):
+    @functools.wraps(method)
+    async def wrapper(*args, **kwargs):
+        if _current_span.get() is None:
+            return await method(*args, **kwargs)
+        with tracer.span(span_name):
+            return await method(*args, **kwargs)
+    return wrapper
+
+
+def route_path(scope) -> Optional[str]:
+    """Route template that served a request, e.g. /api/v1/products/{product_id}"""
+    route = scope.get("route")
+    if route is None:
+        from starlette.routing import Match
+        for candidate in getattr(scope.get("router"), "routes", ()):
+            if candidate.matches(scope)[0] == Match.FULL:
+                route = candidate
+                break
+    return getattr(route, "path", None)
+
+
+def current_route() -> Optional[str]:
+    """"METHOD /route/{template}" of the request being handled, if any"""
+    return route_name(_current_scope.get())
+
+
+def route_in_context(context) -> Optional[str]:
+    """Route of the request a contextvars.Context (e.g. a task's) belongs to"""
+    return route_name(context.get(_current_scope)) if context is not None else None
+
+
+def route_of_task(task: Optional[asyncio.Task]) -> Optional[str]:
+    """Route of the request a task is handling; safe to call from any thread"""
+    return route_name(_task_scopes.get(task)) if task is not None else None
+
+
+def route_name(scope: Optional[dict]) -> Optional[str]:
+    """"METHOD /route/{template}" for an ASGI scope"""
+    if scope is None:
+        return None
+    return f"{scope['method']} {route_path(scope) or scope['path']}"
+
+
+def current_trace_id() -> Optional[str]:
+    span = _current_span.get()
+    return span.trace_id if span else None
+
+
+class TracingMiddleware:
+    """Root span per HTTP request
+
+    Honors an incoming W3C traceparent header, otherwise samples
+    trace_sample_rate of requests. Sampled responses carry the trace id in
+    an X-Trace-Id header. Every request, sampled or not, is available to
+    current_route() while it runs.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = _current_scope.set(scope)
+        task = asyncio.current_task()
+        _task_scopes[task] = scope
+        try:
+            await self._traced(scope, receive, send)
+        finally:
+            _task_scopes.pop(task, None)
+            _current_scope.reset(token)
+
+    async def _traced(self, scope, receive, send):
+        headers = dict(scope["headers"])
+        traceparent = headers.get(b"traceparent", b"").decode("latin-1")
+        span = tracer.start_trace(f"{scope['method']} {scope['path']}", traceparent or None)
+        if span is None:
+            await self.app(scope, receive, send)
+            return
+
+        span.attributes.update({"http.method": scope["method"], "http.target": scope["path"]})
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                span.attributes["http.status_code"] = message["status"]
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [(b"x-trace-id", span.trace_id.encode())]
+            await send(message)
+
+        error = None
+        with tracer.activate(span):
+            try:
+                await self.app(scope, receive, send_wrapper)
+            except BaseException as exc:
+                error = exc
+                raise
+            finally:
+                path = route_path(scope)
+                if path:
+                    span.name = f"{scope['method']} {path}"
+                    span.attributes["http.route"] = path
+                span.end(error)
+
+
+def instrument_engine(engine):
+    """Span per SQL statement on a (sync) engine, under the current span"""
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _start(conn, cursor, statement, parameters, context, executemany):
+        parent = _current_span.get()
+        if parent is None or context is None:
+            return
+        span = parent.child(f"SQL {statement.lstrip().split(' ', 1)[0].upper()}", KIND_CLIENT)
+        span.attributes["db.system"] = engine.dialect.name
+        span.attributes["db.statement"] = statement[:settings.trace_sql_statement_chars]
+        if executemany:
+            span.attributes["db.executemany"] = True
+        context._trace_span = span
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _end(conn, cursor, statement, parameters, context, executemany):
+        span = getattr(context, "_trace_span", None)
+        if span is not None:
+            context._trace_span = None
+            span.end()
+
+    @event.listens_for(engine, "handle_error")
+    def _error(exception_context):
+        context = exception_context.execution_context
+        span = getattr(context, "_trace_span", None)
+        if span is not None:
+            context._trace_span = None
+            span.end(exception_context.original_exception)
+
+    return engine
+
+
+def instrument_redis(client):
+    """Span per Redis command and per pipeline execution on a client"""
+    execute_command = client.execute_command
+    pipeline = client.pipeline
+
+    @functools.wraps(execute_command)
+    async def traced_command(*args, **options):
+        if _current_span.get() is None:
+            return await execute_command(*args, **options)
+        with tracer.span(f"redis {args[0]}", KIND_CLIENT, **{"db.system": "redis"}):
+            return await execute_command(*args, **options)
+
+    @functools.wraps(pipeline)
+    def traced_pipeline(*args, **kwargs):
+        pipe = pipeline(*args, **kwargs)
+        execute = pipe.execute
+
+        @functools.wraps(execute)
+        async def traced_execute(*execute_args, **execute_kwargs):
+            if _current_span.get() is None:
+                return await execute(*execute_args, **execute_kwargs)
+            commands = len(pipe.command_stack)
+            with tracer.span("redis PIPELINE", KIND_CLIENT, **{"db.system": "redis", "db.redis.commands": commands}):
+                return await execute(*execute_args, **execute_kwargs)
+
+        pipe.execute = traced_execute
+        return pipe
+
+    client.execute_command = traced_command
+    client.pipeline = traced_pipeline
+    return client
+
+
+def install_log_correlation():
+    """Add trace_id and span_id to every log record ("-" outside a trace)"""
+    factory = logging.getLogRecordFactory()
+
+    def record_factory(*args, **kwargs):
+        record = factory(*args, **kwargs)
+        span = _current_span.get()
+        record.trace_id = span.trace_id if span else "-"
+        record.span_id = span.span_id if span else "-"
+        return record
+
+    logging.setLogRecordFactory(record_factory)
\ No newline at end of file
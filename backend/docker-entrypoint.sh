@@ -0,0 +1,23 @@
+#!/bin/sh
+# Bring the database to the Alembic head before the API starts; workers only
+# verify the revision (DB_STARTUP_MODE=migrations). Set RUN_MIGRATIONS=false
+# when `alembic upgrade head` runs as a separate release step instead.
+#
+# A database whose tables were created by create_all (DB_STARTUP_MODE=create_all,
+# the old default) has no alembic_version table. Its tables match the initial
+# revision, so record that once and migrate from there:
+#     alembic stamp 0001 && alembic upgrade head
+set -e
+
+case "$DATABASE_URL" in
+    sqlite*)
+        # Embedded mode creates its schema from the models at startup
+        ;;
+    *)
+        if [ "${RUN_MIGRATIONS:-true}" = "true" ]; then
+            alembic upgrade head
+        fi
+        ;;
+esac
+
+exec "$@"
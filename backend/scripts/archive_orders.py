@@ -0,0 +1,44 @@
+"""Maintain the monthly order partitions and archive cold order history.
+
+Creates partitions for the coming months, then moves every month that lies
+entirely past the archive horizon into order_archive and drops its
+partitions. Safe to re-run; schedule it daily (cron) or enqueue the
+maintain_order_partitions job.
+
+Usage (from backend/):
+    python -m scripts.archive_orders
+    python -m scripts.archive_orders --after-days 365 --dry-run
+"""
+from datetime import datetime, timedelta, timezone
+import argparse
+import asyncio
+
+from app.config import settings
+from app.database import AsyncSessionLocal, close_db
+from app.services.order_archive_service import OrderArchiveService, month_bounds
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--months-ahead", type=int, default=settings.order_partitions_ahead_months)
+    parser.add_argument("--after-days", type=int, default=settings.order_archive_after_days)
+    parser.add_argument("--dry-run", action="store_true", help="only list the months that would be archived")
+    args = parser.parse_args()
+
+    async with AsyncSessionLocal() as db:
+        service = OrderArchiveService(db)
+        if args.dry_run:
+            cutoff = datetime.now(timezone.utc) - timedelta(days=args.after_days)
+            for month in await service.partition_months():
+                action = "archive" if month_bounds(month)[1] <= cutoff else "keep"
+                print(f"{month:%Y-%m} {action}")
+        else:
+            created = await service.ensure_partitions(args.months_ahead)
+            print(f"created partitions: {', '.join(f'{month:%Y-%m}' for month in created) or 'none'}")
+            archived = await service.archive(args.after_days)
+            print(f"archived {archived} orders")
+    await close_db()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,224 @@
+"""Compare API throughput in embedded mode against Postgres and Redis.
+
+Embedded mode uses a SQLite file and the in-process store. Each mode runs
+in its own subprocess, because the engine and the cache client are
+configured from Settings at import time. The child seeds a category,
+products with variants and a few users. It then drives a fixed mix of
+requests through httpx's ASGI transport:
+  - catalog listing
+  - product detail
+  - add to cart
+  - view cart
+  - checkout
+  - order history
+  - order status update by an admin
+It reports requests/second and latency per endpoint.
+
+The postgres mode takes DATABASE_URL and REDIS_URL from the environment.
+That database must already be migrated to head. Seeded rows are left
+behind and carry a random tag.
+
+Usage (from backend/):
+    python -m scripts.bench_embedded --requests 3000 --concurrency 32
+    python -m scripts.bench_embedded --modes embedded
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from collections import defaultdict
+from decimal import Decimal
+
+MIX = (
+    ("GET /products/", 38),
+    ("GET /products/{id}", 28),
+    ("POST /cart/items", 14),
+    ("GET /cart/", 9),
+    ("POST /orders/", 4),
+    ("GET /orders/", 5),
+    ("PUT /admin/orders/{order_id}", 2),
+)
+
+SHIPPING = {
+    "shipping_first_name": "Bench", "shipping_last_name": "User", "shipping_address": "1 Bench St",
+    "shipping_city": "Springfield", "shipping_state": "IL", "shipping_zip_code": "62701",
+    "shipping_country": "US", "payment_method": "card",
+}
+ORDER_STATUSES = ("confirmed", "processing", "shipped", "delivered")
+
+# Same app settings in both modes; only the backends differ
+COMMON_ENV = {
+    "DEBUG": "false",
+    "RATE_LIMIT_ENABLED": "false",
+    "TRACING_ENABLED": "false",
+    "LOOP_MONITOR_ENABLED": "false",
+    "DB_STARTUP_MODE": "migrations",
+}
+
+
+def mode_env(mode: str, directory: str) -> dict:
+    if mode == "embedded":
+        return {"DATABASE_URL": f"sqlite+aiosqlite:///{directory}/bench.db", "REDIS_URL": "memory://"}
+    return {}
+
+
+async def seed(users: int, products: int):
+    from app.auth.security import create_access_token, get_password_hash
+    from app.database import AsyncSessionLocal
+    from app.models import Category, Product, ProductVariant, User
+
+    tag = uuid.uuid4().hex[:8]
+    async with AsyncSessionLocal() as db:
+        category = Category(name=f"Bench {tag}", slug=f"bench-{tag}")
+        db.add(category)
+        await db.flush()
+        items = [
+            Product(
+                name=f"Bench shoe {i}", description="Benchmark product", price=Decimal("99.99"),
+                sku=f"BENCH-{tag}-{i}", category_id=category.id, stock_quantity=10 ** 9
+            )
+            for i in range(products)
+        ]
+        db.add_all(items)
+        await db.flush()
+        db.add_all(
+            ProductVariant(product_id=item.id, size="10", color="Black", sku=f"{item.sku}-10-BLK", stock_quantity=10 ** 9)
+            for item in items
+        )
+        password = get_password_hash("bench-password")
+        accounts = [
+            User(
+                email=f"bench-{tag}-{i}@example.com", username=f"bench_{tag}_{i}",
+                first_name="Bench", last_name="User", hashed_password=password,
+                # The first account also drives the admin endpoints
+                is_admin=i == 0
+            )
+            for i in range(users)
+        ]
+        db.add_all(accounts)
+        await db.commit()
+        return [create_access_token({"sub": user.username}) for user in accounts], [item.id for item in items]
+
+
+async def drive(client, tokens: list, product_ids: list, total: int, concurrency: int):
+    plan = random.Random(42).choices([name for name, _ in MIX], weights=[weight for _, weight in MIX], k=total)
+    timings = defaultdict(list)
+    semaphore = asyncio.Semaphore(concurrency)
+    # Checkout empties the cart, so a user's checkouts take turns
+    checkout_locks = defaultdict(asyncio.Lock)
+    order_ids = []
+
+    def cart_line(product_id: int) -> dict:
+        return {"product_id": product_id, "quantity": 1, "size": "10", "color": "Black"}
+
+    async def request(method: str, path: str, token: str, body=None):
+        response = await client.request(method, "/api/v1" + path, headers={"Authorization": f"Bearer {token}"}, json=body)
+        assert response.status_code < 400, (method, path, response.status_code, response.text[:200])
+        return response
+
+    async def one(i: int, name: str):
+        method, path = name.split(" ")
+        product_id = product_ids[i % len(product_ids)]
+        token = tokens[i % len(tokens)]
+        async with semaphore:
+            if name == "POST /orders/":
+                async with checkout_locks[token]:
+                    # Untimed: checkout needs something in the cart
+                    await request("POST", "/cart/items", token, cart_line(product_id))
+                    start = time.perf_counter()
+                    response = await request(method, path, token, SHIPPING)
+                    timings[name].append(time.perf_counter() - start)
+                order_ids.append(response.json()["id"])
+                return
+            if name.startswith("PUT /admin/"):
+                token = tokens[0]
+                if not order_ids:
+                    async with checkout_locks[token]:
+                        await request("POST", "/cart/items", token, cart_line(product_id))
+                        order_ids.append((await request("POST", "/orders/", token, SHIPPING)).json()["id"])
+                path = path.replace("{order_id}", str(order_ids[i % len(order_ids)]))
+                body = {"status": ORDER_STATUSES[i % len(ORDER_STATUSES)], "tracking_number": f"BENCH{i}"}
+            else:
+                path = path.replace("{id}", str(product_id))
+                body = cart_line(product_id) if method == "POST" else None
+            start = time.perf_counter()
+            await request(method, path, token, body)
+            timings[name].append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i, name) for i, name in enumerate(plan)))
+    return timings, time.perf_counter() - start
+
+
+def percentile(samples: list, q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000
+
+
+async def child(requests: int, concurrency: int):
+    import httpx
+    from app.main import app
+
+    async with app.router.lifespan_context(app):
+        tokens, product_ids = await seed(users=8, products=200)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            await drive(client, tokens, product_ids, max(requests // 10, concurrency), concurrency)  # warm up
+            timings, elapsed = await drive(client, tokens, product_ids, requests, concurrency)
+    print(json.dumps({
+        "rps": requests / elapsed,
+        "endpoints": {
+            name: {"count": len(samples), "p50_ms": percentile(samples, 0.5), "p99_ms": percentile(samples, 0.99)}
+            for name, samples in timings.items()
+        },
+    }))
+
+
+def run_mode(mode: str, args) -> dict:
+    with tempfile.TemporaryDirectory() as directory:
+        env = {**os.environ, **COMMON_ENV, **mode_env(mode, directory)}
+        result = subprocess.run(
+            [sys.executable, "-m", "scripts.bench_embedded", "--child",
+             "--requests", str(args.requests), "--concurrency", str(args.concurrency)],
+            env=env, capture_output=True, text=True
+        )
+    if result.returncode != 0:
+        return {"error": (result.stderr.strip().splitlines() or ["failed"])[-1]}
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--modes", default="embedded,postgres")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        asyncio.run(child(args.requests, args.concurrency))
+        return
+
+    results = {}
+    for mode in args.modes.split(","):
+        results[mode] = report = run_mode(mode, args)
+        if "error" in report:
+            print(f"{mode:>10} skipped: {report['error']}")
+            continue
+        print(f"{mode:>10} {report['rps']:8.1f} req/s")
+        for name, stats in report["endpoints"].items():
+            print(f"{'':>10} {name:<30} n={stats['count']:<6} p50 {stats['p50_ms']:7.2f}ms  p99 {stats['p99_ms']:7.2f}ms")
+
+    if "rps" in results.get("embedded", {}) and "rps" in results.get("postgres", {}):
+        ratio = results["embedded"]["rps"] / results["postgres"]["rps"]
+        print(f"embedded/postgres throughput: {ratio:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
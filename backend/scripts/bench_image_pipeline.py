@@ -0,0 +1,72 @@
+"""Benchmark image variant throughput for a batch of uploads.
+
+Usage (from backend/):
+    python -m scripts.bench_image_pipeline --count 500 --workers 4
+"""
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import hashlib
+import os
+import tempfile
+import time
+
+from app.services.image_service import render_variants
+
+VARIANT_SIZES = {"thumbnail": 160, "grid": 480, "detail": 1200}
+
+
+def make_source_images(directory: str, count: int, side: int) -> list[tuple[str, str]]:
+    """Generate distinct JPEG sources and return (path, digest) pairs"""
+    from PIL import Image
+
+    sources = []
+    for i in range(count):
+        img = Image.new("RGB", (side, side), ((i * 7) % 256, (i * 13) % 256, (i * 29) % 256))
+        path = os.path.join(directory, f"source-{i}.jpg")
+        img.save(path, format="JPEG", quality=90)
+        with open(path, "rb") as f:
+            digest = hashlib.sha256(f.read()).hexdigest()
+        sources.append((path, digest))
+    return sources
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=500)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--side", type=int, default=2000)
+    parser.add_argument("--quality", type=int, default=82)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        sources = make_source_images(tmp, args.count, args.side)
+        out_dir = os.path.join(tmp, "out")
+        os.makedirs(out_dir)
+
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            start = time.perf_counter()
+            futures = [
+                pool.submit(render_variants, path, digest, out_dir, VARIANT_SIZES, args.quality)
+                for path, digest in sources
+            ]
+            for future in futures:
+                future.result()
+            cold = time.perf_counter() - start
+
+            # Second pass hits the content-addressed dedupe path
+            start = time.perf_counter()
+            futures = [
+                pool.submit(render_variants, path, digest, out_dir, VARIANT_SIZES, args.quality)
+                for path, digest in sources
+            ]
+            for future in futures:
+                future.result()
+            warm = time.perf_counter() - start
+
+    print(f"images={args.count} workers={args.workers} side={args.side}px")
+    print(f"process: {cold:.2f}s ({args.count / cold:.1f} images/s)")
+    print(f"dedupe:  {warm:.2f}s ({args.count / warm:.1f} images/s)")
+
+
+if __name__ == "__main__":
+    main()
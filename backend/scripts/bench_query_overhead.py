@@ -0,0 +1,151 @@
+"""Per-query Python overhead for the ten hottest queries, before and after.
+
+"before" rebuilds each select() per call the way the services used to;
+"after" runs the prebuilt statements and lambda statements the services
+use now. Both execute through an ORM Session on an empty in-memory SQLite
+database, so the timings are dominated by statement construction, cache
+key generation, compilation and ORM result setup rather than the database.
+Compiled-cache hit rates are reported for each mode.
+
+Usage (from backend/):
+    python -m scripts.bench_query_overhead --iterations 2000
+"""
+from typing import Callable, Dict, List, Tuple
+import argparse
+import statistics
+import time
+
+from sqlalchemy import create_engine, event, func, lambda_stmt, or_, select
+from sqlalchemy.engine.interfaces import CacheStats
+from sqlalchemy.orm import Session, selectinload
+
+from app.auth.security import USER_BY_USERNAME
+from app.database import Base
+from app.models.order import Cart, CartItem, Order, OrderItem
+from app.models.product import Category, Product
+from app.models.user import User
+from app.services.cart_service import CART_BY_USER
+from app.services.order_service import ALL_ORDERS_SINCE, USER_ORDERS
+from app.services.product_service import (
+    ACTIVE_CATEGORIES, FEATURED_PRODUCTS, PRODUCT_BY_ID, product_list_statements
+)
+
+Query = Tuple[str, Callable[[], Tuple[object, dict]]]
+
+
+def product_options():
+    return (selectinload(Product.category), selectinload(Product.images), selectinload(Product.variants))
+
+
+def before_products(category_id=None, search=None):
+    query = select(Product).options(*product_options()).where(Product.is_active == True)
+    if category_id:
+        query = query.where(Product.category_id == category_id)
+    if search:
+        term = f"%{search}%"
+        query = query.where(or_(Product.name.ilike(term), Product.description.ilike(term), Product.brand.ilike(term)))
+    return query
+
+
+BEFORE: List[Query] = [
+    ("get_current_user", lambda: (select(User).where(User.username == "user7"), {})),
+    ("get_products", lambda: (before_products().order_by(Product.created_at.desc()).offset(0).limit(20), {})),
+    ("get_products(count)", lambda: (select(func.count()).select_from(before_products().subquery()), {})),
+    ("get_products(category, search)", lambda: (
+        before_products(3, "air").order_by(Product.created_at.desc()).offset(20).limit(20), {}
+    )),
+    ("get_product_by_id", lambda: (select(Product).options(*product_options()).where(Product.id == 42), {})),
+    ("get_featured_products", lambda: (
+        select(Product).options(*product_options())
+        .where(Product.is_active == True, Product.is_featured == True)
+        .order_by(Product.created_at.desc()).limit(8), {}
+    )),
+    ("get_categories", lambda: (select(Category).where(Category.is_active == True).order_by(Category.name), {})),
+    ("get_or_create_cart", lambda: (
+        select(Cart).options(selectinload(Cart.items).selectinload(CartItem.product)).where(Cart.user_id == 7), {}
+    )),
+    ("get_user_orders", lambda: (
+        select(Order).options(selectinload(Order.items).selectinload(OrderItem.product))
+        .where(Order.user_id == 7).order_by(Order.created_at.desc()).offset(0).limit(10), {}
+    )),
+    ("get_order_by_id", lambda: (
+        select(Order).options(selectinload(Order.items).selectinload(OrderItem.product), selectinload(Order.user))
+        .where(Order.id == 42).where(Order.user_id == 7), {}
+    )),
+]
+
+
+def after_order_by_id():
+    order_id, user_id = 42, 7
+    query = lambda_stmt(lambda: select(Order).options(
+        selectinload(Order.items).selectinload(OrderItem.product),
+        selectinload(Order.user)
+    ).where(Order.id == order_id))
+    query += lambda q: q.where(Order.user_id == user_id)
+    return query
+
+
+AFTER: List[Query] = [
+    ("get_current_user", lambda: (USER_BY_USERNAME, {"username": "user7"})),
+    ("get_products", lambda: (product_list_statements(0, 20)[0], {})),
+    ("get_products(count)", lambda: (product_list_statements(0, 20)[1], {})),
+    ("get_products(category, search)", lambda: (product_list_statements(20, 20, 3, "air")[0], {})),
+    ("get_product_by_id", lambda: (PRODUCT_BY_ID, {"product_id": 42})),
+    ("get_featured_products", lambda: (FEATURED_PRODUCTS, {"limit": 8})),
+    ("get_categories", lambda: (ACTIVE_CATEGORIES, {})),
+    ("get_or_create_cart", lambda: (CART_BY_USER, {"user_id": 7})),
+    ("get_user_orders", lambda: (USER_ORDERS, {"user_id": 7, "since": ALL_ORDERS_SINCE, "skip": 0, "limit": 10})),
+    # Mirrors OrderService.get_order_by_id, which builds its lambda inline
+    ("get_order_by_id", lambda: (after_order_by_id(), {})),
+]
+
+
+def run(engine, queries: List[Query], iterations: int) -> Dict[str, float]:
+    timings = {}
+    with Session(engine) as db:
+        for label, build in queries:
+            # Warm the compiled cache once, as a running server would have
+            statement, params = build()
+            db.execute(statement, params).all()
+            samples = []
+            for _ in range(iterations):
+                start = time.perf_counter()
+                statement, params = build()
+                db.execute(statement, params).all()
+                samples.append(time.perf_counter() - start)
+            timings[label] = statistics.median(samples) * 1_000_000
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+
+    outcomes = {CacheStats.CACHE_HIT: 0, CacheStats.CACHE_MISS: 0}
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def count(conn, cursor, statement, parameters, context, executemany):
+        if context.cache_hit in outcomes:
+            outcomes[context.cache_hit] += 1
+
+    results = {}
+    for mode, queries in (("before", BEFORE), ("after", AFTER)):
+        for key in outcomes:
+            outcomes[key] = 0
+        results[mode] = run(engine, queries, args.iterations)
+        lookups = sum(outcomes.values())
+        rate = outcomes[CacheStats.CACHE_HIT] / lookups if lookups else 0
+        print(f"{mode:6} compiled cache hit rate {rate:.2%} over {lookups} executions")
+
+    print(f"\n{'query':32} {'before':>10} {'after':>10} {'change':>8}")
+    for label, _ in BEFORE:
+        before, after = results["before"][label], results["after"][label]
+        print(f"{label:32} {before:8.1f}us {after:8.1f}us {(after - before) / before:+8.1%}")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,46 @@
+"""Measure rate limiter decision latency (p50/p99) for Redis and the local fallback.
+
+Usage (from backend/, with REDIS_URL pointing at a running Redis):
+    python -m scripts.bench_rate_limiter --decisions 20000
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from app.rate_limit import RateLimiter
+
+
+def report(label: str, samples: list[float]):
+    samples.sort()
+    p50 = statistics.median(samples) * 1000
+    p99 = samples[int(len(samples) * 0.99) - 1] * 1000
+    print(f"{label:8} p50={p50:.3f}ms p99={p99:.3f}ms")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--decisions", type=int, default=20000)
+    parser.add_argument("--identities", type=int, default=500)
+    args = parser.parse_args()
+
+    limiter = RateLimiter(prefix="rl-bench")
+    redis_samples, local_samples = [], []
+    for i in range(args.decisions):
+        key = f"bench:ip:10.0.{i % args.identities // 256}.{i % 256}"
+
+        start = time.perf_counter()
+        await limiter.hit(key, 60, 1.0)
+        redis_samples.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        limiter.local.hit(key, 60, 1.0)
+        local_samples.append(time.perf_counter() - start)
+
+    report("redis", redis_samples)
+    report("local", local_samples)
+    await limiter.redis.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
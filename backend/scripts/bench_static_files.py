@@ -0,0 +1,81 @@
+"""Benchmark CachedStaticFiles against Starlette's plain FileResponse.
+
+Requests are driven in-process through httpx's ASGI transport, so the numbers
+measure per-request server overhead rather than network throughput.
+
+Usage (from backend/):
+    python -m scripts.bench_static_files --requests 5000
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+import httpx
+from fastapi import FastAPI
+from fastapi.responses import FileResponse
+
+from app.static_files import CachedStaticFiles, MemoryFileCache
+
+FILES = {
+    "index-3f2a1b9c.js": 120 * 1024,
+    "logo.svg": 4 * 1024,
+    "hero-9e8d7c6b.jpg": 900 * 1024,
+}
+
+
+def build_apps(directory: str) -> dict:
+    plain = FastAPI()
+
+    @plain.get("/{name}")
+    async def serve(name: str):
+        return FileResponse(os.path.join(directory, name))
+
+    cached = FastAPI()
+    cached.mount("/", CachedStaticFiles(directory, memory_cache=MemoryFileCache(32 * 1024 * 1024, 256 * 1024)))
+    return {"FileResponse": plain, "CachedStaticFiles": cached}
+
+
+async def run(app, names: list[str], total: int, concurrency: int, headers: dict) -> float:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def one(i: int):
+            async with semaphore:
+                response = await client.get(f"/{names[i % len(names)]}", headers=headers)
+                assert response.status_code in (200, 304)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(total)))
+        return time.perf_counter() - start
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, size in FILES.items():
+            with open(os.path.join(tmp, name), "wb") as f:
+                f.write(os.urandom(size))
+
+        names = list(FILES)
+        for label, app in build_apps(tmp).items():
+            elapsed = await run(app, names, args.requests, args.concurrency, {})
+            print(f"{label:18} full:  {args.requests / elapsed:8.0f} req/s")
+
+        # Revalidation with a matching ETag only applies to CachedStaticFiles
+        cached = build_apps(tmp)["CachedStaticFiles"]
+        transport = httpx.ASGITransport(app=cached)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            etag = (await client.get(f"/{names[1]}")).headers["etag"]
+        elapsed = await run(cached, [names[1]], args.requests, args.concurrency, {"if-none-match": etag})
+        print(f"{'CachedStaticFiles':18} 304:   {args.requests / elapsed:8.0f} req/s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,85 @@
+"""Measure tracing overhead per request at several sample rates.
+
+Drives a small ASGI app through TracingMiddleware. Each request runs a
+traced service method that issues five SQL statements on an instrumented
+in-memory SQLite engine. The baseline has tracing disabled. Spans are
+exported to a temporary file, and export time is counted.
+
+Usage (from backend/):
+    python -m scripts.bench_tracing --requests 5000 --rates 0,0.01,0.1,1
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from sqlalchemy import create_engine, text
+
+from app.config import settings
+from app.tracing import TracingMiddleware, instrument_engine, trace_methods, tracer
+
+engine = instrument_engine(create_engine("sqlite://"))
+
+
+@trace_methods
+class BenchService:
+    async def load(self, n: int) -> int:
+        with engine.connect() as conn:
+            for _ in range(5):
+                conn.execute(text("SELECT :n"), {"n": n}).scalar()
+        return n
+
+
+async def app(scope, receive, send):
+    await BenchService().load(1)
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+async def run(requests: int) -> float:
+    traced = TracingMiddleware(app)
+    scope = {"type": "http", "method": "GET", "path": "/bench", "headers": []}
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        pass
+
+    samples = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        await traced(scope, receive, send)
+        samples.append(time.perf_counter() - start)
+    start = time.perf_counter()
+    await tracer.flush()
+    export = time.perf_counter() - start
+    return (sum(samples) + export) / requests * 1_000_000
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--rates", default="0,0.01,0.1,1")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        settings.trace_file = os.path.join(directory, "traces.jsonl")
+        settings.trace_exporter = "file"
+
+        settings.tracing_enabled = False
+        await run(args.requests)  # warm up
+        baseline = await run(args.requests)
+        print(f"{'disabled':>10} {baseline:8.1f}us/request")
+
+        settings.tracing_enabled = True
+        for rate in (float(value) for value in args.rates.split(",")):
+            settings.trace_sample_rate = rate
+            per_request = await run(args.requests)
+            overhead = (per_request - baseline) / baseline
+            print(f"{rate:>10.2%} {per_request:8.1f}us/request {overhead:+7.2%}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
\ No newline at end of file
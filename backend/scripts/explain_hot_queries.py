@@ -0,0 +1,175 @@
+"""Query-plan regression harness for the hot service queries.
+
+Runs the real service methods against a Postgres database, captures every
+SELECT they issue, EXPLAINs each one with its bound parameters and fails if
+any plan falls back to a sequential scan on a large table.
+
+Usage (from backend/, against a scratch database migrated to head):
+    python -m scripts.explain_hot_queries --seed --products 50000 --orders 200000
+"""
+from typing import Awaitable, Callable, List, Tuple
+from datetime import datetime, timedelta, timezone
+import argparse
+import asyncio
+import json
+import re
+import sys
+
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.config import settings
+from app.services.cart_service import CartService
+from app.services.order_service import OrderService
+from app.services.product_service import ProductService
+
+# Partitions are checked as their parent table, against their own row count
+PARTITION_SUFFIX = re.compile(r"_(p\d{6}|default)$")
+LARGE_TABLES = {"products", "product_images", "product_variants", "orders", "order_items", "cart_items", "carts", "users"}
+
+SEED_SQL = [
+    "TRUNCATE cart_items, carts, order_items, orders, product_images, products, categories, users RESTART IDENTITY CASCADE",
+    """INSERT INTO users (email, username, first_name, last_name, hashed_password, is_active, is_admin)
+       SELECT 'user' || g || '@example.com', 'user' || g, 'First', 'Last', 'x', true, false
+       FROM generate_series(1, :users) g""",
+    """INSERT INTO categories (name, slug, is_active)
+       SELECT 'Category ' || g, 'category-' || g, true FROM generate_series(1, 20) g""",
+    """INSERT INTO products (name, description, price, original_price, sku, category_id, brand,
+                             is_featured, is_active, stock_quantity, created_at)
+       SELECT 'Shoe ' || g, 'Description ' || g, 50 + (g % 150), NULL, 'SKU-' || g, 1 + (g % 20), 'Nike',
+              g % 50 = 0, g % 10 <> 0, 100, now() - (g || ' minutes')::interval
+       FROM generate_series(1, :products) g""",
+    """INSERT INTO product_images (product_id, image_url, is_main, sort_order)
+       SELECT g, '/uploads/' || g || '.webp', true, 0 FROM generate_series(1, :products) g""",
+    """INSERT INTO product_variants (product_id, size, color, sku, stock_quantity)
+       SELECT p, s, c, 'SKU-' || p || '-' || s || '-' || c, (p + s) % 5
+       FROM generate_series(1, :products) p, generate_series(7, 12) s,
+            unnest(ARRAY['Black', 'White', 'Red']) c""",
+    """INSERT INTO orders (user_id, order_number, status, payment_status, subtotal, total_amount,
+                           shipping_first_name, shipping_last_name, shipping_address, shipping_city,
+                           shipping_state, shipping_zip_code, shipping_country, created_at)
+       SELECT 1 + (g % :users), 'NK' || g,
+              (ARRAY['PENDING','CONFIRMED','PROCESSING','SHIPPED','DELIVERED','CANCELLED','REFUNDED'])[1 + g % 7]::orderstatus,
+              (ARRAY['PAID','PAID','PAID','PENDING','FAILED','REFUNDED'])[1 + g % 6]::paymentstatus, 100, 108, 'F', 'L', 'Addr', 'City', 'ST', '00000', 'US',
+              now() - (g || ' minutes')::interval
+       FROM generate_series(1, :orders) g""",
+    """INSERT INTO order_items (order_id, order_created_at, product_id, quantity, size, color, unit_price, total_price)
+       SELECT o.id, o.created_at, 1 + (g % :products), 1, '10', 'Black', 50, 50
+       FROM generate_series(1, :orders * 2 - 1) g
+       JOIN orders o ON o.id = 1 + (g / 2)""",
+    "INSERT INTO carts (user_id) SELECT g FROM generate_series(1, :users) g",
+    """INSERT INTO cart_items (cart_id, product_id, quantity, size, color)
+       SELECT 1 + (g % :users), 1 + (g % :products), 1, '10', 'Black'
+       FROM generate_series(1, :users * 3) g""",
+]
+
+HotQuery = Tuple[str, Callable[[AsyncSession], Awaitable[object]]]
+
+HOT_QUERIES: List[HotQuery] = [
+    ("ProductService.get_products", lambda db: ProductService(db).get_products(skip=0, limit=20)),
+    ("ProductService.get_products(category)", lambda db: ProductService(db).get_products(category_id=3)),
+    ("ProductService.get_products(price)", lambda db: ProductService(db).get_products(min_price=190, max_price=195)),
+    ("ProductService.get_products(size, color)", lambda db: ProductService(db).get_products(size="9", color="Red")),
+    ("ProductService.get_variant_stock", lambda db: ProductService(db).get_variant_stock(42)),
+    ("ProductService.get_featured_products", lambda db: ProductService(db).get_featured_products()),
+    ("ProductService.get_product_by_id", lambda db: ProductService(db).get_product_by_id(42)),
+    ("ProductService.get_categories", lambda db: ProductService(db).get_categories()),
+    ("OrderService.get_user_orders", lambda db: OrderService(db).get_user_orders(7)),
+    ("OrderService.get_order_summaries", lambda db: OrderService(db).get_order_summaries()),
+    ("OrderService.get_order_summaries(status)", lambda db: OrderService(db).get_order_summaries(status="SHIPPED")),
+    ("OrderService.get_order_summaries(payment)", lambda db: OrderService(db).get_order_summaries(payment_status="FAILED")),
+    ("OrderService.get_order_summaries(customer)", lambda db: OrderService(db).get_order_summaries(customer_email="user7@example.com")),
+    ("OrderService.get_order_summaries(dates)", lambda db: OrderService(db).get_order_summaries(
+        created_from=datetime.now(timezone.utc) - timedelta(days=2), created_to=datetime.now(timezone.utc) - timedelta(days=1)
+    )),
+    ("OrderService.get_order_by_id", lambda db: OrderService(db).get_order_by_id(42)),
+    ("OrderService.get_order_by_number", lambda db: OrderService(db).get_order_by_number("NK42")),
+    ("OrderService.get_order_by_number(dated)", lambda db: OrderService(db).get_order_by_number(
+        f"NK{datetime.now():%Y%m%d}AB12CD34"
+    )),
+    ("CartService.get_cart", lambda db: CartService(db).get_cart(7)),
+]
+
+
+def find_seq_scans(plan: dict) -> List[str]:
+    """Relations read by a Seq Scan anywhere in a JSON plan tree"""
+    found = []
+    if plan.get("Node Type") == "Seq Scan":
+        found.append(plan.get("Relation Name"))
+    for child in plan.get("Plans", []):
+        found.extend(find_seq_scans(child))
+    return found
+
+
+async def seed(engine, users: int, products: int, orders: int):
+    params = {"users": users, "products": products, "orders": orders}
+    async with engine.begin() as conn:
+        for statement in SEED_SQL:
+            await conn.execute(text(statement), params)
+    print(f"seeded {users} users, {products} products, {orders} orders")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--database-url", default=settings.database_url)
+    parser.add_argument("--seed", action="store_true", help="truncate and seed the database first")
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--products", type=int, default=50000)
+    parser.add_argument("--orders", type=int, default=200000)
+    parser.add_argument("--min-rows", type=int, default=10000, help="tables smaller than this may be scanned")
+    parser.add_argument("--verbose", action="store_true", help="print every plan")
+    args = parser.parse_args()
+
+    engine = create_async_engine(args.database_url)
+    if args.seed:
+        await seed(engine, args.users, args.products, args.orders)
+
+    # Fresh statistics and visibility map so the planner sees the real sizes
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.execute(text("VACUUM ANALYZE"))
+        result = await conn.execute(text(
+            "SELECT relname, reltuples::bigint FROM pg_class WHERE relkind IN ('r', 'p')"
+        ))
+        table_rows = dict(result.all())
+
+    captured: List[Tuple[str, str, object]] = []
+    current = {"label": None}
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT") and current["label"]:
+            captured.append((current["label"], statement, parameters))
+
+    for label, run in HOT_QUERIES:
+        current["label"] = label
+        async with AsyncSession(engine, expire_on_commit=False) as db:
+            await run(db)
+    current["label"] = None
+
+    failures = 0
+    async with engine.connect() as conn:
+        for label, statement, parameters in captured:
+            result = await conn.exec_driver_sql("EXPLAIN (FORMAT JSON) " + statement, parameters)
+            plan = result.scalar()
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            root = plan[0]["Plan"]
+            scans = [
+                relation for relation in find_seq_scans(root)
+                if PARTITION_SUFFIX.sub("", relation) in LARGE_TABLES
+                and table_rows.get(relation, 0) >= args.min_rows
+            ]
+            status = "FAIL" if scans else "ok"
+            print(f"[{status}] {label}: cost={root['Total Cost']:.0f} {', '.join(f'seq scan on {r}' for r in scans)}")
+            if args.verbose or scans:
+                print("    " + " ".join(statement.split()))
+            failures += bool(scans)
+
+    await engine.dispose()
+    print(f"\n{len(captured)} statements checked, {failures} regressed to sequential scans")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,76 @@
+"""Rebuild or verify the materialized product detail documents.
+
+    rebuild   re-render every product's document (run after bulk imports
+              or schema changes to ProductResponse)
+    check     compare stored documents with freshly rendered ones and exit
+              non-zero on missing, stale or orphaned documents; --fix
+              re-renders the bad ones and removes orphans
+
+Usage (from backend/):
+    python -m scripts.product_documents rebuild
+    python -m scripts.product_documents check --fix
+"""
+import argparse
+import asyncio
+import sys
+import time
+
+from sqlalchemy import delete
+
+from app.cache import catalog_cache
+from app.database import AsyncSessionLocal, close_db
+from app.models.product import ProductDocument
+from app.services.product_document_service import ProductDocumentService
+from app.services.product_service import product_cache_key
+
+
+async def rebuild(batch_size: int) -> int:
+    start = time.perf_counter()
+    async with AsyncSessionLocal() as db:
+        rebuilt = await ProductDocumentService(db).rebuild_all(batch_size=batch_size)
+    print(f"rebuilt {rebuilt} documents in {time.perf_counter() - start:.1f}s")
+    print("cached copies refresh within cache_ttl_seconds")
+    return 0
+
+
+async def check(batch_size: int, fix: bool) -> int:
+    async with AsyncSessionLocal() as db:
+        service = ProductDocumentService(db)
+        report = await service.check(batch_size=batch_size)
+        for kind, product_ids in report.items():
+            preview = ", ".join(map(str, product_ids[:20])) + (" ..." if len(product_ids) > 20 else "")
+            print(f"{kind:9} {len(product_ids)} {preview}")
+
+        bad = report["missing"] + report["stale"]
+        if fix and (bad or report["orphaned"]):
+            for offset in range(0, len(bad), batch_size):
+                await service.refresh(*bad[offset:offset + batch_size])
+            if report["orphaned"]:
+                await db.execute(
+                    delete(ProductDocument).where(ProductDocument.product_id.in_(report["orphaned"]))
+                )
+                await db.commit()
+            if bad:
+                await catalog_cache.invalidate(*(product_cache_key(product_id) for product_id in bad))
+            print(f"fixed {len(bad)} documents, removed {len(report['orphaned'])} orphans")
+            return 0
+    return 1 if bad or report["orphaned"] else 0
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["rebuild", "check"])
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--fix", action="store_true", help="with check: repair what it finds")
+    args = parser.parse_args()
+
+    if args.command == "rebuild":
+        code = await rebuild(args.batch_size)
+    else:
+        code = await check(args.batch_size, args.fix)
+    await close_db()
+    sys.exit(code)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,106 @@
+"""Profile API cold start: per-module import time and time to first request.
+
+Exits non-zero when a budget is exceeded, so it can gate CI against
+cold-start regressions.
+
+Usage (from backend/, with the database migrated to head):
+    python -m scripts.profile_startup --top 20 --import-budget-ms 1500 --startup-budget-ms 3000
+"""
+import argparse
+import os
+import re
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+IMPORTTIME_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)$")
+
+
+def profile_imports(module: str) -> list[tuple[str, int, int]]:
+    """Return (module, self us, cumulative us) for every import of a module tree"""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    rows = []
+    for line in proc.stderr.splitlines():
+        match = IMPORTTIME_RE.match(line)
+        if match:
+            self_us, cumulative_us, _, name = match.groups()
+            rows.append((name, int(self_us), int(cumulative_us)))
+    return rows
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def time_to_first_request(timeout: float) -> float:
+    """Start uvicorn and measure seconds until /health answers 200"""
+    port = free_port()
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            if proc.poll() is not None:
+                raise RuntimeError(f"uvicorn exited with code {proc.returncode}")
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - start
+            except (urllib.error.URLError, ConnectionError):
+                time.sleep(0.01)
+        raise RuntimeError(f"No response within {timeout}s")
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--import-budget-ms", type=float, default=None)
+    parser.add_argument("--startup-budget-ms", type=float, default=None)
+    parser.add_argument("--skip-server", action="store_true", help="only profile imports")
+    args = parser.parse_args()
+
+    rows = profile_imports(args.module)
+    total_ms = next((cum for name, _, cum in rows if name == args.module), 0) / 1000
+    print(f"import {args.module}: {total_ms:.1f}ms cumulative")
+    print(f"{'module':50} {'self ms':>9} {'cum ms':>9}")
+    for name, self_us, cumulative_us in sorted(rows, key=lambda row: row[2], reverse=True)[:args.top]:
+        print(f"{name:50} {self_us / 1000:9.1f} {cumulative_us / 1000:9.1f}")
+
+    app_rows = [row for row in rows if row[0] == "app" or row[0].startswith("app.")]
+    print(f"\n{'app module':50} {'self ms':>9}")
+    for name, self_us, _ in sorted(app_rows, key=lambda row: row[1], reverse=True):
+        print(f"{name:50} {self_us / 1000:9.1f}")
+
+    failed = False
+    if args.import_budget_ms is not None and total_ms > args.import_budget_ms:
+        print(f"FAIL: import time {total_ms:.1f}ms exceeds budget {args.import_budget_ms:.0f}ms")
+        failed = True
+
+    if not args.skip_server:
+        startup_ms = time_to_first_request(timeout=30) * 1000
+        print(f"\ntime to first request: {startup_ms:.1f}ms")
+        if args.startup_budget_ms is not None and startup_ms > args.startup_budget_ms:
+            print(f"FAIL: time to first request exceeds budget {args.startup_budget_ms:.0f}ms")
+            failed = True
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Minimal OTLP/HTTP JSON collector for local tracing.
+
+Accepts POST /v1/traces (set TRACE_EXPORTER=otlp), appends each export
+request to a JSON lines file, and prints every finished trace as an
+indented span tree with durations.
+
+Usage (from backend/):
+    python -m scripts.trace_collector --port 4318 --output traces.jsonl
+    python -m scripts.trace_collector --replay traces.jsonl
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+import argparse
+import json
+
+
+def print_spans(spans: List[dict]):
+    by_parent: Dict[str, List[dict]] = {}
+    ids = {span["spanId"] for span in spans}
+    for span in spans:
+        parent = span.get("parentSpanId")
+        by_parent.setdefault(parent if parent in ids else None, []).append(span)
+
+    def walk(parent, depth):
+        for span in sorted(by_parent.get(parent, []), key=lambda s: int(s["startTimeUnixNano"])):
+            duration = (int(span["endTimeUnixNano"]) - int(span["startTimeUnixNano"])) / 1_000_000
+            error = " ERROR" if span.get("status", {}).get("code") == 2 else ""
+            print(f"{'  ' * depth}{span['name']}  {duration:.2f}ms{error}")
+            walk(span["spanId"], depth + 1)
+
+    walk(None, 0)
+
+
+def print_export(request: dict):
+    traces: Dict[str, List[dict]] = {}
+    for resource in request.get("resourceSpans", []):
+        for scope in resource.get("scopeSpans", []):
+            for span in scope.get("spans", []):
+                traces.setdefault(span["traceId"], []).append(span)
+    for trace_id, spans in traces.items():
+        print(f"trace {trace_id} ({len(spans)} spans)")
+        print_spans(spans)
+
+
+def make_handler(output: str):
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            if self.path != "/v1/traces":
+                self.send_response(404)
+                self.end_headers()
+                return
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            request = json.loads(body)
+            with open(output, "a", encoding="utf-8") as file:
+                file.write(json.dumps(request, separators=(",", ":")) + "\n")
+            print_export(request)
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.end_headers()
+            self.wfile.write(b"{}")
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=4318)
+    parser.add_argument("--output", default="traces.jsonl")
+    parser.add_argument("--replay", help="print the traces in a JSON lines file and exit")
+    args = parser.parse_args()
+
+    if args.replay:
+        with open(args.replay, encoding="utf-8") as file:
+            for line in file:
+                print_export(json.loads(line))
+        return
+
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), make_handler(args.output))
+    print(f"collecting on http://127.0.0.1:{args.port}/v1/traces -> {args.output}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
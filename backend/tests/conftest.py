@@ -0,0 +1,42 @@
+"""Test configuration: the app runs in embedded mode (SQLite, in-process Redis)
+
+The environment is set before anything imports app.config, so settings,
+the engine and the caches all pick it up. DATABASE_URL may be overridden to
+run against a Postgres database already migrated to head.
+"""
+import asyncio
+import os
+import tempfile
+
+_tmp = tempfile.mkdtemp(prefix="nike-store-tests-")
+os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{os.path.join(_tmp, 'test.db')}")
+os.environ.setdefault("REDIS_URL", "memory://")
+os.environ.setdefault("UPLOAD_DIR", os.path.join(_tmp, "uploads"))
+os.environ["DEBUG"] = "false"
+os.environ["TRACING_ENABLED"] = "false"
+os.environ["LOOP_MONITOR_ENABLED"] = "false"
+os.environ["RATE_LIMIT_ENABLED"] = "false"
+
+import pytest
+
+from app.database import IS_SQLITE, engine, init_db
+
+
+@pytest.fixture(scope="session")
+def run():
+    """Run a coroutine on a fresh event loop
+
+    Pooled connections belong to the loop that opened them, so the engine
+    is disposed before each loop closes.
+    """
+    def run(coro):
+        async def scoped():
+            try:
+                return await coro
+            finally:
+                await engine.dispose()
+        return asyncio.run(scoped())
+
+    if IS_SQLITE:
+        run(init_db())
+    return run
\ No newline at end of file
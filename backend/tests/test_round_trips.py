@@ -0,0 +1,160 @@
+"""Round-trip budgets for the service write paths
+
+Each mutation runs once and the SQL statements it sends are counted (an
+executemany counts once; BEGIN and COMMIT are not counted). The conflict
+paths are checked too: they must still raise the same HTTP errors.
+"""
+from typing import Awaitable, Callable, Dict, List, Optional
+import uuid
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import event
+
+from app.database import AsyncSessionLocal, engine
+from app.models.order import OrderStatus
+from app.schemas.order import CartItemCreate, CartItemUpdate, OrderCreate, OrderUpdate
+from app.schemas.product import CategoryCreate, ProductCreate, ProductUpdate, ProductVariantCreate
+from app.schemas.user import UserCreate, UserUpdate
+from app.services.cart_service import CartService
+from app.services.order_service import OrderService
+from app.services.product_service import ProductService
+from app.services.user_service import UserService
+
+# Statements allowed per operation. Product writes re-render the product
+# document (a joined product/category SELECT, one SELECT each for images and
+# variants, and the document upsert) and reload the product for the response
+# (the product and one SELECT per relationship). Checkout empties the cart,
+# reserves stock, reads prices, claims the order number, inserts the order
+# and its items, and queues the confirmation job.
+BUDGETS: Dict[str, int] = {
+    "UserService.create_user": 1,
+    "UserService.create_user(conflict)": 2,
+    "UserService.update_user": 1,
+    "ProductService.create_category": 1,
+    "ProductService.create_product": 11,
+    "ProductService.create_product(conflict)": 1,
+    "ProductService.update_product": 9,
+    "CartService.add_item_to_cart": 4,
+    "CartService.add_item_to_cart(existing line)": 4,
+    "CartService.update_cart_item": 2,
+    "CartService.remove_cart_item": 1,
+    "OrderService.create_order_from_cart": 7,
+    "OrderService.update_order": 3,
+    "CartService.clear_cart": 1,
+    "ProductService.delete_product": 5,
+    "UserService.delete_user": 1,
+}
+
+
+async def measure_write_paths() -> Dict[str, int]:
+    """Run every operation in order and return the statements each sent"""
+    statements: List[str] = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        if statement not in ("BEGIN", "COMMIT"):
+            statements.append(statement)
+
+    tag = uuid.uuid4().hex[:8]
+    state: dict = {}
+    used: Dict[str, int] = {}
+
+    async def measure(label: str, run: Callable[[object], Awaitable[object]], expect_status: Optional[int] = None):
+        async with AsyncSessionLocal() as db:
+            statements.clear()
+            try:
+                await run(db)
+            except HTTPException as exc:
+                assert exc.status_code == expect_status, f"{label}: HTTP {exc.status_code}: {exc.detail}"
+            else:
+                assert expect_status is None, f"{label}: expected HTTP {expect_status}, got success"
+            used[label] = len(statements)
+
+    async def create_user(db):
+        state["user"] = await UserService(db).create_user(UserCreate(
+            email=f"rt-{tag}@example.com", username=f"rt-{tag}", first_name="Round",
+            last_name="Trip", password="round-trip-password"
+        ))
+
+    async def create_duplicate_user(db):
+        await UserService(db).create_user(UserCreate(
+            email=f"rt-{tag}@example.com", username=f"rt-other-{tag}", first_name="Round",
+            last_name="Trip", password="round-trip-password"
+        ))
+
+    async def create_category(db):
+        state["category"] = await ProductService(db).create_category(
+            CategoryCreate(name=f"Round trip {tag}", slug=f"round-trip-{tag}")
+        )
+
+    def product_data() -> ProductCreate:
+        return ProductCreate(
+            name="Round Trip Runner", description="Budget check", price="120.00", sku=f"RT-{tag}",
+            category_id=state["category"].id, images=[{"image_url": "/uploads/rt.webp", "is_main": True}],
+            variants=[ProductVariantCreate(size="10", color="Black", stock_quantity=10)]
+        )
+
+    async def create_product(db):
+        state["product"] = await ProductService(db).create_product(product_data())
+
+    async def create_duplicate_product(db):
+        await ProductService(db).create_product(product_data())
+
+    def line() -> CartItemCreate:
+        return CartItemCreate(product_id=state["product"].id, quantity=1, size="10", color="Black")
+
+    async def add_item(db):
+        state["item"] = await CartService(db).add_item_to_cart(state["user"].id, line())
+
+    async def create_order(db):
+        state["order"] = await OrderService(db).create_order_from_cart(state["user"].id, OrderCreate(
+            shipping_first_name="Round", shipping_last_name="Trip", shipping_address="1 Main St",
+            shipping_city="Portland", shipping_state="OR", shipping_zip_code="97201", shipping_country="US"
+        ))
+
+    async def refill_cart(db):
+        await CartService(db).add_item_to_cart(state["user"].id, line())
+
+    operations = [
+        ("UserService.create_user", create_user, None),
+        ("UserService.create_user(conflict)", create_duplicate_user, 400),
+        ("UserService.update_user", lambda db: UserService(db).update_user(state["user"].id, UserUpdate(city="Portland")), None),
+        ("ProductService.create_category", create_category, None),
+        ("ProductService.create_product", create_product, None),
+        ("ProductService.create_product(conflict)", create_duplicate_product, 400),
+        ("ProductService.update_product", lambda db: ProductService(db).update_product(state["product"].id, ProductUpdate(price="110.00")), None),
+        ("CartService.add_item_to_cart", add_item, None),
+        ("CartService.add_item_to_cart(existing line)", add_item, None),
+        ("CartService.update_cart_item", lambda db: CartService(db).update_cart_item(state["user"].id, state["item"].id, CartItemUpdate(quantity=3)), None),
+        ("CartService.remove_cart_item", lambda db: CartService(db).remove_cart_item(state["user"].id, state["item"].id), None),
+        (None, refill_cart, None),
+        ("OrderService.create_order_from_cart", create_order, None),
+        ("OrderService.update_order", lambda db: OrderService(db).update_order(state["order"].id, OrderUpdate(status=OrderStatus.SHIPPED)), None),
+        ("CartService.clear_cart", lambda db: CartService(db).clear_cart(state["user"].id), None),
+        ("ProductService.delete_product", lambda db: ProductService(db).delete_product(state["product"].id), None),
+        ("UserService.delete_user", lambda db: UserService(db).delete_user(state["user"].id), None),
+    ]
+
+    event.listen(engine.sync_engine, "before_cursor_execute", count)
+    try:
+        for label, run, expect_status in operations:
+            if label is None:
+                async with AsyncSessionLocal() as db:
+                    await run(db)
+            else:
+                await measure(label, run, expect_status)
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", count)
+    return used
+
+
+@pytest.fixture(scope="module")
+def statements_used(run) -> Dict[str, int]:
+    return run(measure_write_paths())
+
+
+@pytest.mark.parametrize("operation", list(BUDGETS))
+def test_round_trip_budget(statements_used, operation):
+    assert statements_used[operation] <= BUDGETS[operation], (
+        f"{operation} sent {statements_used[operation]} statements, budget {BUDGETS[operation]}"
+    )
\ No newline at end of file
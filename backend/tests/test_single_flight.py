@@ -0,0 +1,123 @@
+"""Single-flight loading of product documents through the catalog cache
+
+Statements reaching the database are counted while many readers ask for
+one product at once: a cold key must be loaded by exactly one query, and a
+stale one refreshed by exactly one while every reader gets the old value.
+An edit, though, must never be answered with the old document.
+"""
+from typing import List
+import asyncio
+import uuid
+
+import pytest
+from sqlalchemy import event, update
+
+from app.cache import TwoTierCache, catalog_cache
+from app.database import AsyncSessionLocal, engine
+from app.models.product import ProductDocument
+from app.schemas.product import CategoryCreate, ProductCreate, ProductUpdate
+from app.services.product_document_service import ProductDocumentService
+from app.services.product_service import ProductService, get_cached_product, product_cache_key
+
+READERS = 1000
+
+
+@pytest.fixture
+def statements():
+    """SQL statements sent while the test runs (BEGIN and COMMIT excluded)"""
+    sent: List[str] = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        if statement not in ("BEGIN", "COMMIT"):
+            sent.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", count)
+    yield sent
+    event.remove(engine.sync_engine, "before_cursor_execute", count)
+
+
+async def create_product() -> int:
+    tag = uuid.uuid4().hex[:8]
+    async with AsyncSessionLocal() as db:
+        service = ProductService(db)
+        category = await service.create_category(CategoryCreate(name=f"Single flight {tag}", slug=f"sf-{tag}"))
+        product = await service.create_product(ProductCreate(
+            name="Single Flight Runner", description="Cache check", price="90.00", sku=f"SF-{tag}",
+            category_id=category.id
+        ))
+    await catalog_cache.delete(product_cache_key(product.id))
+    return product.id
+
+
+def test_concurrent_misses_load_once(run, statements):
+    async def check():
+        product_id = await create_product()
+        statements.clear()
+        documents = await asyncio.gather(*(get_cached_product(product_id) for _ in range(READERS)))
+        return product_id, documents
+
+    product_id, documents = run(check())
+    assert len(statements) == 1, statements
+    assert documents[0] is not None and f'"id":{product_id}' in documents[0].replace(" ", "")
+    assert all(document == documents[0] for document in documents)
+
+
+def test_concurrent_misses_load_once_across_workers(run, statements):
+    # Separate caches sharing one store stand in for worker processes
+    workers = [catalog_cache] + [TwoTierCache(prefix=catalog_cache.prefix) for _ in range(3)]
+
+    async def check():
+        product_id = await create_product()
+
+        async def load():
+            async with AsyncSessionLocal() as db:
+                return await ProductDocumentService(db).get_document(product_id)
+
+        statements.clear()
+        return await asyncio.gather(*(
+            workers[i % len(workers)].get_or_load(product_cache_key(product_id), load)
+            for i in range(READERS)
+        ))
+
+    documents = run(check())
+    assert len(statements) == 1, statements
+    assert documents[0] is not None
+    assert all(document == documents[0] for document in documents)
+
+
+def test_stale_entry_refreshed_once(run, statements):
+    async def check():
+        product_id = await create_product()
+        cached = await get_cached_product(product_id)
+        # Change the stored document behind the cache, then mark it stale
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                update(ProductDocument).where(ProductDocument.product_id == product_id).values(document='{"changed":true}')
+            )
+            await db.commit()
+        await catalog_cache.invalidate(product_cache_key(product_id))
+
+        statements.clear()
+        documents = await asyncio.gather(*(get_cached_product(product_id) for _ in range(READERS)))
+        # Let the background refresh finish
+        while catalog_cache._refreshing:
+            await asyncio.sleep(0.01)
+        refreshed = await get_cached_product(product_id)
+        return cached, documents, refreshed
+
+    cached, documents, refreshed = run(check())
+    assert len(statements) == 1, statements
+    assert all(document == cached for document in documents)
+    assert refreshed == '{"changed":true}'
+
+def test_update_is_not_served_stale(run):
+    async def check():
+        product_id = await create_product()
+        before = await get_cached_product(product_id)
+        async with AsyncSessionLocal() as db:
+            await ProductService(db).update_product(product_id, ProductUpdate(price="75.00"))
+        return before, await get_cached_product(product_id)
+
+    before, after = run(check())
+    assert '"90.00"' in before
+    assert '"75.00"' in after
\ No newline at end of file
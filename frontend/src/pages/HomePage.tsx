@@ -1,7 +1,7 @@
 import { useEffect } from 'react'
 import { Link } from 'react-router-dom'
 import { useQuery } from '@tanstack/react-query'
-import { productsApi } from '../services/api'
+import { storefrontApi } from '../services/api'
 import ProductCard from '../components/ProductCard'
 import LoadingSpinner from '../components/LoadingSpinner'
 import { useCartStore } from '../store/cartStore'
@@ -18,10 +18,12 @@ const HomePage = () => {
     }
   }, [isAuthenticated, fetchCart])
 
-  const { data: featuredProducts, isLoading } = useQuery({
-    queryKey: ['featured-products'],
-    queryFn: () => productsApi.getFeaturedProducts(8)
+  // One precomputed payload for every section of the page
+  const { data: home, isLoading } = useQuery({
+    queryKey: ['storefront-home'],
+    queryFn: storefrontApi.getHome
   })
+  const featuredProducts = home?.featured
 
   return (
     <div className="min-h-screen">
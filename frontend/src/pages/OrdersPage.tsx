@@ -7,12 +7,27 @@ import { Order, OrderStatus } from '../types'
 
 const OrdersPage = () => {
   const [currentPage, setCurrentPage] = useState(1)
+  const [showOlder, setShowOlder] = useState(false)
 
   const { data: ordersData, isLoading } = useQuery({
-    queryKey: ['orders', currentPage],
-    queryFn: () => ordersApi.getOrders({ page: currentPage, per_page: 10 })
+    queryKey: ['orders', currentPage, showOlder],
+    queryFn: () => ordersApi.getOrders({ page: currentPage, per_page: 10, older: showOlder })
   })
 
+  const olderOrdersButton = !showOlder && (
+    <div className="text-center mt-8">
+      <button
+        onClick={() => {
+          setShowOlder(true)
+          setCurrentPage(1)
+        }}
+        className="btn-secondary text-sm py-2 px-4"
+      >
+        Show older orders
+      </button>
+    </div>
+  )
+
   const getStatusColor = (status: OrderStatus) => {
     switch (status) {
       case 'pending':
@@ -59,6 +74,7 @@ const OrdersPage = () => {
             <Link to="/products" className="btn-primary">
               Start Shopping
             </Link>
+            {olderOrdersButton}
           </div>
         ) : (
           <>
@@ -177,6 +193,7 @@ const OrdersPage = () => {
                 </div>
               </div>
             )}
+            {olderOrdersButton}
           </>
         )}
       </div>
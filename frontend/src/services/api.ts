@@ -4,15 +4,19 @@ import {
   LoginCredentials, 
   RegisterData, 
   AuthResponse,
+  RefreshResponse,
   Product,
   ProductListResponse,
+  ProductVariantStock,
   Category,
   Cart,
   CartItem,
   AddToCartData,
   Order,
   OrderListResponse,
-  CreateOrderData
+  CreateOrderData,
+  BatchResult,
+  StorefrontHome
 } from '../types'
 
 // Create axios instance
@@ -39,10 +43,51 @@ api.interceptors.request.use((config) => {
   return config
 })
 
+// Refresh the access token with the stored refresh token. Concurrent 401s
+// share one in-flight refresh so a rotated token is never presented twice.
+let refreshPromise: Promise<string | null> | null = null
+
+const refreshAccessToken = (): Promise<string | null> => {
+  if (!refreshPromise) {
+    refreshPromise = (async () => {
+      try {
+        const authData = localStorage.getItem('auth-storage')
+        const refreshToken = authData ? JSON.parse(authData).state?.refreshToken : null
+        if (!refreshToken) {
+          return null
+        }
+        const response = await axios.post<RefreshResponse>('/api/v1/auth/refresh', {
+          refresh_token: refreshToken
+        })
+        const { useAuthStore } = await import('../store/authStore')
+        useAuthStore.getState().setTokens(response.data.access_token, response.data.refresh_token)
+        return response.data.access_token
+      } catch (error) {
+        return null
+      } finally {
+        refreshPromise = null
+      }
+    })()
+  }
+  return refreshPromise
+}
+
+// Endpoints whose 401s mean bad credentials, not an expired access token
+const NO_REFRESH_URLS = ['/auth/login', '/auth/login-json', '/auth/refresh']
+
 // Response interceptor for error handling
 api.interceptors.response.use(
   (response) => response,
-  (error) => {
+  async (error) => {
+    const original = error.config
+    if (error.response?.status === 401 && original && !original._retry && !NO_REFRESH_URLS.includes(original.url)) {
+      original._retry = true
+      const token = await refreshAccessToken()
+      if (token) {
+        original.headers.Authorization = `Bearer ${token}`
+        return api(original)
+      }
+    }
     if (error.response?.status === 401) {
       // Clear auth data on 401
       localStorage.removeItem('auth-storage')
@@ -69,8 +114,14 @@ export const authApi = {
     return response.data
   },
 
-  logout: async (): Promise<void> => {
-    await api.post('/auth/logout')
+  logout: async (refreshToken?: string | null, accessToken?: string | null): Promise<void> => {
+    // Tokens are passed explicitly because the store is cleared on logout
+    // before the request interceptor would read them
+    await api.post(
+      '/auth/logout',
+      refreshToken ? { refresh_token: refreshToken } : undefined,
+      accessToken ? { headers: { Authorization: `Bearer ${accessToken}` } } : undefined
+    )
   }
 }
 
@@ -84,6 +135,8 @@ export const productsApi = {
     is_featured?: boolean
     min_price?: number
     max_price?: number
+    size?: string
+    color?: string
   }): Promise<ProductListResponse> => {
     const response = await api.get('/products', { params })
     return response.data
@@ -94,6 +147,19 @@ export const productsApi = {
     return response.data
   },
 
+  // Up to 200 products in one request, in the order given; pass fields to get only those keys
+  getProductsBatch: async (ids: number[], fields?: (keyof Product)[]): Promise<Partial<Product>[]> => {
+    const response = await api.get('/products/batch', {
+      params: { ids: ids.join(','), fields: fields?.join(',') }
+    })
+    return response.data
+  },
+
+  getAvailability: async (id: number): Promise<ProductVariantStock[]> => {
+    const response = await api.get(`/products/${id}/availability`)
+    return response.data
+  },
+
   getFeaturedProducts: async (limit?: number): Promise<Product[]> => {
     const response = await api.get('/products/featured', { 
       params: { limit } 
@@ -107,6 +173,14 @@ export const productsApi = {
   }
 }
 
+// Storefront API
+export const storefrontApi = {
+  getHome: async (): Promise<StorefrontHome> => {
+    const response = await api.get('/storefront/home')
+    return response.data
+  }
+}
+
 // Cart API
 export const cartApi = {
   getCart: async (): Promise<Cart> => {
@@ -115,7 +189,9 @@ export const cartApi = {
   },
 
   addItem: async (data: AddToCartData): Promise<CartItem> => {
-    const response = await api.post('/cart/items', data)
+    const response = await api.post('/cart/items', data, {
+      headers: { 'Idempotency-Key': crypto.randomUUID() },
+    })
     return response.data
   },
 
@@ -136,13 +212,17 @@ export const cartApi = {
 // Orders API
 export const ordersApi = {
   createOrder: async (data: CreateOrderData): Promise<Order> => {
-    const response = await api.post('/orders', data)
+    const response = await api.post('/orders', data, {
+      headers: { 'Idempotency-Key': crypto.randomUUID() },
+    })
     return response.data
   },
 
+  // Recent orders only, unless older is set
   getOrders: async (params?: {
     page?: number
     per_page?: number
+    older?: boolean
   }): Promise<OrderListResponse> => {
     const response = await api.get('/orders', { params })
     return response.data
@@ -159,4 +239,15 @@ export const ordersApi = {
   }
 }
 
+// Batch API: several GETs in one round-trip, e.g. on app launch
+export const batchApi = {
+  // Paths are relative to the API root, e.g. '/products/categories'
+  get: async (paths: string[]): Promise<BatchResult[]> => {
+    const response = await api.post('/batch', {
+      requests: paths.map((path) => ({ path: `/api/v1${path}` })),
+    })
+    return response.data.responses
+  }
+}
+
 export default api
\ No newline at end of file
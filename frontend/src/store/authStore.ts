@@ -7,11 +7,13 @@ import toast from 'react-hot-toast'
 interface AuthState {
   user: User | null
   token: string | null
+  refreshToken: string | null
   isAuthenticated: boolean
   isLoading: boolean
   login: (credentials: LoginCredentials) => Promise<boolean>
   register: (data: RegisterData) => Promise<boolean>
   logout: () => void
+  setTokens: (token: string, refreshToken: string) => void
   initializeAuth: () => void
 }
 
@@ -20,6 +22,7 @@ export const useAuthStore = create<AuthState>()(
     (set, get) => ({
       user: null,
       token: null,
+      refreshToken: null,
       isAuthenticated: false,
       isLoading: false,
 
@@ -27,11 +30,12 @@ export const useAuthStore = create<AuthState>()(
         set({ isLoading: true })
         try {
           const response = await authApi.login(credentials)
-          const { access_token, user } = response
+          const { access_token, refresh_token, user } = response
           
           set({
             user,
             token: access_token,
+            refreshToken: refresh_token,
             isAuthenticated: true,
             isLoading: false
           })
@@ -63,14 +67,24 @@ export const useAuthStore = create<AuthState>()(
       },
 
       logout: () => {
+        const { token, refreshToken } = get()
+        if (token || refreshToken) {
+          // Revoke server-side; the local session is cleared regardless
+          authApi.logout(refreshToken, token).catch(() => {})
+        }
         set({
           user: null,
           token: null,
+          refreshToken: null,
           isAuthenticated: false
         })
         toast.success('Logged out successfully')
       },
 
+      setTokens: (token: string, refreshToken: string) => {
+        set({ token, refreshToken })
+      },
+
       initializeAuth: () => {
         const state = get()
         if (state.token && state.user) {
@@ -83,6 +97,7 @@ export const useAuthStore = create<AuthState>()(
       partialize: (state) => ({
         user: state.user,
         token: state.token,
+        refreshToken: state.refreshToken,
         isAuthenticated: state.isAuthenticated
       })
     }
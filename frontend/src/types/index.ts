@@ -38,10 +38,17 @@ export interface RegisterData {
 
 export interface AuthResponse {
   access_token: string
+  refresh_token: string
   token_type: string
   user: User
 }
 
+export interface RefreshResponse {
+  access_token: string
+  refresh_token: string
+  token_type: string
+}
+
 // Product types
 export interface Category {
   id: number
@@ -62,6 +69,20 @@ export interface ProductImage {
   created_at: string
 }
 
+export interface ProductVariant {
+  id: number
+  size: string
+  color: string
+  sku: string
+}
+
+export interface ProductVariantStock {
+  id: number
+  size: string
+  color: string
+  stock_quantity: number
+}
+
 export interface Product {
   id: number
   name: string
@@ -81,6 +102,7 @@ export interface Product {
   updated_at?: string
   category: Category
   images: ProductImage[]
+  variants: ProductVariant[]
   main_image?: string
   is_on_sale: boolean
   discount_percentage: number
@@ -207,4 +229,20 @@ export interface ProductFilters {
   max_price?: number
   page?: number
   per_page?: number
+}
+
+// Storefront types
+export interface StorefrontHome {
+  catalog_version: number
+  categories: Category[]
+  featured: Product[]
+  on_sale: Product[]
+  new_arrivals: Product[]
+}
+
+// Batch types
+export interface BatchResult<T = unknown> {
+  status: number
+  headers: Record<string, string>
+  body: T
 }
\ No newline at end of file